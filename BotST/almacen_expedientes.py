@@ -0,0 +1,283 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from config import RUTA_ALMACEN, TAM_LOTE_ALMACEN
+from export_utils import SCHEMA
+
+CAMPOS = [k for k, _ in SCHEMA if k != "numero_cuenta"]
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS expedientes (
+    numero_cuenta     TEXT PRIMARY KEY,
+    url               TEXT,
+    {", ".join(f"{c} TEXT" for c in CAMPOS)},
+    huella            TEXT NOT NULL,        -- sha1 de los campos; cambia si cambia algún dato
+    activo            INTEGER NOT NULL DEFAULT 1,   -- 0: ya no apareció (eliminado)
+    primera_ejecucion INTEGER,
+    ultima_ejecucion  INTEGER,
+    actualizado       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_expedientes_cita_fecha ON expedientes (cita_fecha);
+CREATE INDEX IF NOT EXISTS idx_expedientes_carrera ON expedientes (carrera);
+CREATE INDEX IF NOT EXISTS idx_expedientes_plantel ON expedientes (plantel);
+CREATE INDEX IF NOT EXISTS idx_expedientes_url ON expedientes (url);
+
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    inicio  TEXT NOT NULL,
+    fin     TEXT,                           -- NULL: interrumpida (--resume la continúa)
+    estados TEXT                            -- JSON; NULL = todos
+);
+
+CREATE TABLE IF NOT EXISTS cambios (
+    ejecucion     INTEGER NOT NULL,
+    numero_cuenta TEXT NOT NULL,
+    tipo          TEXT NOT NULL,            -- nuevo | cambiado | eliminado
+    campos        TEXT,                     -- JSON: campos que cambiaron
+    anterior      TEXT,                     -- JSON: registro anterior (cambiado / eliminado)
+    PRIMARY KEY (ejecucion, numero_cuenta)
+);
+"""
+
+_UPSERT = f"""
+INSERT INTO expedientes
+    (numero_cuenta, url, {", ".join(CAMPOS)}, huella, activo, primera_ejecucion, ultima_ejecucion, actualizado)
+VALUES (?, ?, {", ".join("?" for _ in CAMPOS)}, ?, 1, ?, ?, ?)
+ON CONFLICT (numero_cuenta) DO UPDATE SET
+    url = COALESCE(excluded.url, expedientes.url),
+    {", ".join(f"{c} = excluded.{c}" for c in CAMPOS)},
+    huella = excluded.huella,
+    activo = 1,
+    ultima_ejecucion = excluded.ultima_ejecucion,
+    actualizado = excluded.actualizado
+"""
+
+
+def _valores(datos) -> list:
+    return ["" if datos.get(c) is None else str(datos.get(c)) for c in CAMPOS]
+
+
+def _huella(valores) -> str:
+    return hashlib.sha1("\x1f".join(valores).encode("utf-8")).hexdigest()
+
+
+class AlmacenExpedientes:
+    """
+    Almacén persistente (SQLite) de expedientes por número de cuenta, para saber qué
+    cambió entre ejecuciones:
+    - iniciar_ejecucion() abre una ejecución (o continúa la interrumpida con --resume);
+    - registrar(url, datos, error) (misma firma que Bitacora.registrar) compara cada
+      expediente con el guardado y devuelve "nuevo", "cambiado" o "igual"; los upserts
+      se agrupan en transacciones de TAM_LOTE_ALMACEN registros;
+    - cerrar_ejecucion() marca como eliminados los que ya no aparecieron y devuelve
+      el resumen de cambios.
+    Un expediente "eliminado" es uno activo, de alguno de los estados recolectados, que
+    en esta ejecución no trajo datos (ya no está en el listado o ya no tiene cita). Las
+    URLs que terminaron en error no cuentan: su expediente se conserva como estaba.
+    """
+
+    def __init__(self, ruta=RUTA_ALMACEN, tam_lote: int = TAM_LOTE_ALMACEN):
+        self.ruta = str(ruta)
+        self.tam_lote = tam_lote
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_ESQUEMA)
+        self._conn.commit()
+        self.ejecucion = None
+        self._lote, self._lote_cambios = [], []
+
+    # ---------- ejecución ----------
+    def iniciar_ejecucion(self, estados=None, continuar: bool = False) -> int:
+        """`estados`: los de --estados (acota los eliminados); con `continuar`, retoma la última sin terminar."""
+        with self._lock:
+            fila = None
+            if continuar:
+                fila = self._conn.execute(
+                    "SELECT id FROM ejecuciones WHERE fin IS NULL ORDER BY id DESC LIMIT 1"
+                ).fetchone()
+            if fila is not None:
+                self.ejecucion = fila[0]
+                self._conn.execute(
+                    "UPDATE ejecuciones SET estados = ? WHERE id = ?",
+                    (json.dumps(estados, ensure_ascii=False) if estados else None, self.ejecucion),
+                )
+            else:
+                cur = self._conn.execute(
+                    "INSERT INTO ejecuciones (inicio, estados) VALUES (?, ?)",
+                    (_ahora(), json.dumps(estados, ensure_ascii=False) if estados else None),
+                )
+                self.ejecucion = cur.lastrowid
+            self._conn.commit()
+            self.estados = list(estados) if estados else None
+
+            # estado guardado en memoria: número -> huella / url -> número
+            self._huellas, self._por_url = {}, {}
+            for numero, url, huella, activo in self._conn.execute(
+                "SELECT numero_cuenta, url, huella, activo FROM expedientes"
+            ):
+                self._huellas[numero] = huella if activo else None
+                if url:
+                    self._por_url[url] = numero
+            # lo ya registrado en esta ejecución (si se continúa)
+            self._vistos = {
+                numero for (numero,) in self._conn.execute(
+                    "SELECT numero_cuenta FROM expedientes WHERE ultima_ejecucion = ? AND activo = 1",
+                    (self.ejecucion,),
+                )
+            }
+            self._tipo_en_ejecucion = dict(self._conn.execute(
+                "SELECT numero_cuenta, tipo FROM cambios WHERE ejecucion = ?", (self.ejecucion,)
+            ))
+            self._con_error = set()
+        return self.ejecucion
+
+    def registrar(self, url: str = None, datos=None, error: Exception = None):
+        """
+        "nuevo" | "cambiado" | "igual" para un expediente con datos; None si no hubo datos
+        (sin cita o error). `url` puede ser None (registros tomados de la bitácora).
+        """
+        if error is not None:
+            with self._lock:
+                numero = self._por_url.get(url)
+                if numero is not None:
+                    self._con_error.add(numero)
+            return None
+        if not datos or not datos.get("numero_cuenta"):
+            return None
+
+        numero = str(datos["numero_cuenta"])
+        valores = _valores(datos)
+        huella = _huella(valores)
+        with self._lock:
+            anterior = self._huellas.get(numero)
+            if numero in self._tipo_en_ejecucion:
+                tipo = self._tipo_en_ejecucion[numero]   # ya visto en esta ejecución (--resume)
+            elif anterior is None:
+                tipo = "nuevo"
+            elif anterior != huella:
+                tipo = "cambiado"
+            else:
+                tipo = "igual"
+
+            if tipo != "igual" and numero not in self._tipo_en_ejecucion:
+                self._tipo_en_ejecucion[numero] = tipo
+                self._lote_cambios.append((numero, tipo, valores))
+            self._huellas[numero] = huella
+            self._vistos.add(numero)
+            if url:
+                self._por_url[url] = numero
+            self._lote.append((numero, url, *valores, huella, self.ejecucion, self.ejecucion, _ahora()))
+            if len(self._lote) >= self.tam_lote:
+                self._vaciar_lote()
+        return tipo
+
+    def _vaciar_lote(self):
+        """Un lote = una transacción: cambios (con el registro anterior) + upserts."""
+        if not self._lote:
+            return
+        with self._conn:
+            for numero, tipo, valores in self._lote_cambios:
+                campos, anterior = None, None
+                if tipo == "cambiado":
+                    previo = self._leer(numero)
+                    if previo is not None:
+                        anterior = json.dumps(previo, ensure_ascii=False)
+                        campos = json.dumps(
+                            [c for c, v in zip(CAMPOS, valores) if previo.get(c, "") != v]
+                        )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cambios (ejecucion, numero_cuenta, tipo, campos, anterior) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.ejecucion, numero, tipo, campos, anterior),
+                )
+            self._conn.executemany(_UPSERT, self._lote)
+        self._lote, self._lote_cambios = [], []
+
+    def _leer(self, numero):
+        fila = self._conn.execute(
+            f"SELECT numero_cuenta, {', '.join(CAMPOS)} FROM expedientes WHERE numero_cuenta = ?", (numero,)
+        ).fetchone()
+        return dict(zip(["numero_cuenta", *CAMPOS], fila)) if fila else None
+
+    def cerrar_ejecucion(self):
+        """
+        Marca los eliminados y da por terminada la ejecución.
+        Devuelve {"nuevos": [...], "cambiados": [...], "eliminados": [...]} (registros).
+        """
+        with self._lock:
+            self._vaciar_lote()
+            filtro, params = "activo = 1", []
+            if self.estados:
+                filtro += f" AND estado IN ({', '.join('?' for _ in self.estados)})"
+                params += self.estados
+            candidatos = [
+                dict(zip(["numero_cuenta", *CAMPOS], f)) for f in self._conn.execute(
+                    f"SELECT numero_cuenta, {', '.join(CAMPOS)} FROM expedientes WHERE {filtro}", params
+                )
+            ]
+            eliminados = [
+                r for r in candidatos
+                if r["numero_cuenta"] not in self._vistos and r["numero_cuenta"] not in self._con_error
+            ]
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE expedientes SET activo = 0, ultima_ejecucion = ?, actualizado = ? "
+                    "WHERE numero_cuenta = ?",
+                    [(self.ejecucion, _ahora(), r["numero_cuenta"]) for r in eliminados],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cambios (ejecucion, numero_cuenta, tipo, campos, anterior) "
+                    "VALUES (?, ?, 'eliminado', NULL, ?)",
+                    [(self.ejecucion, r["numero_cuenta"], json.dumps(r, ensure_ascii=False)) for r in eliminados],
+                )
+                self._conn.execute("UPDATE ejecuciones SET fin = ? WHERE id = ?", (_ahora(), self.ejecucion))
+            return self.cambios(self.ejecucion)
+
+    # ---------- consultas ----------
+    def cambios(self, ejecucion: int) -> dict:
+        """Registros nuevos/cambiados (datos actuales, con "campos") y eliminados (últimos datos) de una ejecución."""
+        salida = {"nuevos": [], "cambiados": [], "eliminados": []}
+        filas = self._conn.execute(
+            f"SELECT c.tipo, c.campos, c.anterior, e.numero_cuenta, {', '.join('e.' + c for c in CAMPOS)} "
+            "FROM cambios c JOIN expedientes e ON e.numero_cuenta = c.numero_cuenta "
+            "WHERE c.ejecucion = ? ORDER BY c.tipo, e.numero_cuenta",
+            (ejecucion,),
+        ).fetchall()
+        for tipo, campos, anterior, *fila in filas:
+            if tipo == "eliminado":
+                salida["eliminados"].append(json.loads(anterior))
+                continue
+            registro = dict(zip(["numero_cuenta", *CAMPOS], fila))
+            if tipo == "cambiado":
+                registro["campos"] = json.loads(campos) if campos else []
+            salida["nuevos" if tipo == "nuevo" else "cambiados"].append(registro)
+        return salida
+
+    def cerrar(self):
+        """Guarda lo pendiente sin cerrar la ejecución (si se interrumpe, --resume la continúa)."""
+        with self._lock:
+            if self.ejecucion is not None:
+                self._vaciar_lote()
+            self._conn.close()
+
+
+def imprimir_cambios(cambios: dict, ejecucion: int, limite: int = 20):
+    nuevos, cambiados, eliminados = cambios["nuevos"], cambios["cambiados"], cambios["eliminados"]
+    print(
+        f"\n-> Cambios (ejecución #{ejecucion}): {len(nuevos)} nuevos | "
+        f"{len(cambiados)} cambiados | {len(eliminados)} eliminados"
+    )
+    for signo, registros in (("+", nuevos), ("~", cambiados), ("-", eliminados)):
+        for r in registros[:limite]:
+            detalle = f" [{', '.join(r['campos'])}]" if r.get("campos") else ""
+            print(f"   {signo} {r['numero_cuenta']} {r.get('nombre', '')} | {r.get('cita_fecha', '')}{detalle}")
+        if len(registros) > limite:
+            print(f"   {signo} ... y {len(registros) - limite} más")
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,162 @@
+"""
+Benchmark de la fase B (procesar_urls_concurrente, o procesar_urls_hibrido con
+--procesos) contra el portal simulado.
+
+Por cada número de hilos: descarga y extrae las mismas URLs y reporta rendimiento
+(URLs/s), latencia por URL (p50/p95/p99, desde que sale su primera petición hasta que
+termina su extracción, con reintentos y renovación de sesión incluidos) y errores.
+
+    python benchmark_descarga.py                              # 1, 4, 8 y 16 hilos, 300 URLs
+    python benchmark_descarga.py --hilos 6 12 --urls 500 --latencia 0.1 --p-503 0.05
+    python benchmark_descarga.py --expira-cada 150 --p-lento 0.1 --adaptativo --streaming
+    python benchmark_descarga.py --hilos 8 32 --procesos 4    # parseo en procesos (procesar_urls_hibrido)
+
+Sale con código 1 si algún expediente no coincide con lo esperado.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from expedientes_service import (
+    procesar_urls_concurrente,
+    procesar_urls_hibrido,
+    crear_gestor_sesion,
+    ControladorConcurrencia,
+    EstadisticasStreaming,
+)
+from portal_simulado import PortalSimulado, NavegadorSimulado, tiene_cita, RUTA_EXPEDIENTE
+
+
+def percentil(valores, p: float) -> float:
+    """Percentil por rango más cercano (valores ya ordenados)."""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[k]
+
+
+def _medir_envios(gestor, inicios: dict):
+    """Anota cuándo sale la primera petición de cada URL (el HTTPAdapter es compartido)."""
+    adapter = gestor.actual()[0].get_adapter("http://")
+    enviar = adapter.send
+
+    def send(request, **kwargs):
+        inicios.setdefault(request.url, time.perf_counter())
+        return enviar(request, **kwargs)
+
+    adapter.send = send
+
+
+def correr(portal, urls, hilos, adaptativo=False, streaming=False, procesos=None):
+    portal.reiniciar_estadisticas()
+    controlador = ControladorConcurrencia(maximo=hilos) if adaptativo else None
+    gestor = crear_gestor_sesion(NavegadorSimulado(portal), adaptativo=adaptativo)
+    estadisticas = EstadisticasStreaming() if streaming else None
+
+    inicios, latencias = {}, []
+    conteo = {"ok": 0, "sin_cita": 0, "errores": 0, "incorrectos": 0}
+    lock = threading.Lock()   # con --procesos, al_completar llega desde varios hilos
+    _medir_envios(gestor, inicios)
+
+    def al_completar(u, datos, error):
+        n = int(u.rsplit(RUTA_EXPEDIENTE, 1)[1])
+        with lock:
+            latencias.append(time.perf_counter() - inicios.get(u, t0))
+            if error is not None:
+                conteo["errores"] += 1
+                return
+            conteo["ok" if datos else "sin_cita"] += 1
+            if bool(datos) != tiene_cita(n) or (datos and datos["numero_cuenta"] != f"3{n:08d}"):
+                conteo["incorrectos"] += 1
+
+    t0 = time.perf_counter()
+    if procesos:
+        procesar_urls_hibrido(
+            gestor, lambda encolar: [encolar(u) for u in urls], max_workers=hilos,
+            procesos=procesos, controlador=controlador, al_completar=al_completar, acumular=False,
+        )
+    else:
+        procesar_urls_concurrente(
+            None, None, urls, max_workers=hilos, controlador=controlador, gestor=gestor,
+            streaming=estadisticas, al_completar=al_completar, acumular=False,
+        )
+    segundos = time.perf_counter() - t0
+    latencias.sort()
+    return {
+        "hilos": hilos,
+        "segundos": segundos,
+        "urls_s": len(urls) / segundos if segundos else 0.0,
+        "p50": percentil(latencias, 50),
+        "p95": percentil(latencias, 95),
+        "p99": percentil(latencias, 99),
+        "renovaciones": gestor.renovaciones,
+        "servidor": portal.estadisticas(),
+        **conteo,
+    }
+
+
+def imprimir(filas):
+    print(
+        f"\n{'hilos':>5} {'seg':>7} {'URLs/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'ok':>5} {'sin cita':>8} {'errores':>7} {'401':>5} {'429':>5} {'503':>5} {'renov.':>6}"
+    )
+    for f in filas:
+        status = f["servidor"]["por_status"]
+        print(
+            f"{f['hilos']:>5} {f['segundos']:>7.2f} {f['urls_s']:>8.1f} "
+            f"{f['p50'] * 1000:>8.1f} {f['p95'] * 1000:>8.1f} {f['p99'] * 1000:>8.1f} "
+            f"{f['ok']:>5} {f['sin_cita']:>8} {f['errores']:>7} "
+            f"{status.get(401, 0):>5} {status.get(429, 0):>5} {status.get(503, 0):>5} {f['renovaciones']:>6}"
+        )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de descarga de expedientes contra el portal simulado")
+    ap.add_argument("--hilos", type=int, nargs="+", default=[1, 4, 8, 16], help="Números de hilos a comparar")
+    ap.add_argument("--urls", type=int, default=300, help="Expedientes por corrida")
+    ap.add_argument("--latencia", type=float, default=0.05, help="Segundos por respuesta del portal")
+    ap.add_argument("--variacion", type=float, default=0.02, help="± segundos de variación aleatoria")
+    ap.add_argument("--p-429", type=float, default=0.0)
+    ap.add_argument("--p-503", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=0)
+    ap.add_argument("--expira-cada", type=int, default=0, help="Peticiones entre expiraciones de sesión (0 = nunca)")
+    ap.add_argument("--p-lento", type=float, default=0.0, help="Probabilidad de cuerpo lento")
+    ap.add_argument("--cuerpo-lento", type=float, default=0.5, help="Segundos que tarda un cuerpo lento")
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--adaptativo", action="store_true", help="Usar ControladorConcurrencia (máximo = hilos)")
+    ap.add_argument("--streaming", action="store_true", help="Descarte temprano de expedientes sin cita")
+    ap.add_argument("--procesos", type=int, default=None, help="Parsear en N procesos (procesar_urls_hibrido)")
+    args = ap.parse_args()
+
+    portal = PortalSimulado(
+        latencia=args.latencia,
+        variacion=args.variacion,
+        p_429=args.p_429,
+        p_503=args.p_503,
+        retry_after=args.retry_after,
+        expira_cada=args.expira_cada,
+        p_lento=args.p_lento,
+        cuerpo_lento=args.cuerpo_lento,
+        semilla=args.semilla,
+    ).iniciar()
+    urls = portal.urls(args.urls)
+    print(f"-> Portal simulado en {portal.base_url} | {len(urls)} URLs por corrida")
+
+    filas = []
+    try:
+        for hilos in args.hilos:
+            print(f"-> Corriendo con {hilos} hilos...")
+            filas.append(correr(portal, urls, hilos, args.adaptativo, args.streaming, args.procesos))
+    finally:
+        portal.detener()
+
+    imprimir(filas)
+    incorrectos = sum(f["incorrectos"] for f in filas)
+    if incorrectos:
+        print(f"\n-> {incorrectos} expedientes no coinciden con lo que sirvió el portal")
+    return 1 if incorrectos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
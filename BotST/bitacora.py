@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+from config import RUTA_BITACORA
+
+FSYNC_CADA = 50  # líneas entre os.fsync (cada línea se hace flush al escribirse)
+
+
+class Bitacora:
+    """
+    Bitácora append-only (JSONL) de las URLs procesadas en la fase B. Cada línea:
+        {"url": ..., "estado": "ok" | "sin_cita" | "error", "datos": {...} | null,
+         "error": "...", "fecha": "..."}
+    Se escribe conforme termina cada descarga, así una ejecución interrumpida puede
+    retomarse con --resume sin volver a pedir lo que ya se procesó.
+    """
+
+    def __init__(self, ruta=RUTA_BITACORA, continuar: bool = False):
+        self.ruta = str(ruta)
+        self._lock = threading.Lock()
+        self._f = open(self.ruta, "a" if continuar else "w", encoding="utf-8")
+        self._pendientes_fsync = 0
+        if continuar and self._f.tell() > 0 and not _termina_en_salto(self.ruta):
+            # la última línea quedó truncada: que la siguiente empiece en su propia línea
+            self._f.write("\n")
+
+    def registrar(self, url: str, datos=None, error: Exception = None):
+        """Firma compatible con `al_completar(url, datos, error)`."""
+        if error is not None:
+            linea = {"url": url, "estado": "error", "datos": None, "error": str(error)}
+        elif datos:
+            linea = {"url": url, "estado": "ok", "datos": datos, "error": ""}
+        else:
+            linea = {"url": url, "estado": "sin_cita", "datos": None, "error": ""}
+        linea["fecha"] = datetime.now().isoformat(timespec="seconds")
+        texto = json.dumps(linea, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            self._f.write(texto)
+            self._f.flush()
+            self._pendientes_fsync += 1
+            if self._pendientes_fsync >= FSYNC_CADA:
+                os.fsync(self._f.fileno())
+                self._pendientes_fsync = 0
+
+    def cerrar(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.flush()
+                os.fsync(self._f.fileno())
+                self._f.close()
+
+
+def _termina_en_salto(ruta) -> bool:
+    with open(ruta, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def cargar_bitacora(ruta=RUTA_BITACORA) -> dict:
+    """
+    url -> última línea registrada. Ignora una última línea truncada (el proceso murió
+    a media escritura). {} si la bitácora no existe.
+    """
+    entradas = {}
+    if not os.path.exists(ruta):
+        return entradas
+    with open(ruta, "r", encoding="utf-8") as f:
+        for n, linea in enumerate(f, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                e = json.loads(linea)
+            except json.JSONDecodeError:
+                print(f"   -> Bitácora: línea {n} incompleta, se ignora")
+                continue
+            entradas[e["url"]] = e
+    return entradas
+
+
+def resumen_bitacora(entradas: dict):
+    """
+    (urls_hechas, resultados, omitidos) de una bitácora cargada. Las URLs con error
+    no cuentan como hechas: se vuelven a intentar al retomar.
+    """
+    hechas, resultados, omitidos = set(), [], 0
+    for url, e in entradas.items():
+        if e["estado"] == "ok":
+            hechas.add(url)
+            resultados.append(e["datos"])
+        elif e["estado"] == "sin_cita":
+            hechas.add(url)
+            omitidos += 1
+    return hechas, resultados, omitidos
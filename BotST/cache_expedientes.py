@@ -0,0 +1,160 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+
+from config import RUTA_CACHE
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS expedientes (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    sha256        TEXT NOT NULL,
+    encoding      TEXT,
+    cuerpo        BLOB NOT NULL,   -- zlib
+    registro      TEXT,            -- JSON de los datos extraídos; NULL = sin cita
+    actualizado   TEXT NOT NULL
+)
+"""
+
+
+class CacheExpedientes:
+    """
+    Caché HTTP persistente (SQLite) de las páginas de expediente, por URL.
+    Guarda el cuerpo comprimido, ETag/Last-Modified y el registro ya extraído:
+    - las peticiones llevan If-None-Match / If-Modified-Since; un 304 reutiliza el registro;
+    - con 200, si el sha256 del cuerpo no cambió, también se reutiliza sin parsear;
+    - reparsear() vuelve a extraer todo desde los cuerpos guardados, sin red.
+    Una sola conexión compartida por los hilos, serializada con un lock.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE):
+        self.ruta = str(ruta)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_ESQUEMA)
+        self._conn.commit()
+        self.no_modificados = 0   # 304
+        self.mismo_hash = 0       # 200 con el mismo contenido
+        self.descargados = 0      # nuevos o cambiados (se parsean)
+
+    # ---------- petición ----------
+    def encabezados_condicionales(self, url: str) -> dict:
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT etag, last_modified FROM expedientes WHERE url = ?", (url,)
+            ).fetchone()
+        if fila is None:
+            return {}
+        etag, last_modified = fila
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    # ---------- respuesta ----------
+    def resolver(self, url: str, r, extraer):
+        """
+        Datos del expediente a partir de la respuesta `r` (304 o 200).
+        `extraer(contenido: bytes, encoding) -> datos|None` solo se llama si el cuerpo cambió.
+        """
+        if r.status_code == 304:
+            with self._lock:
+                fila = self._conn.execute(
+                    "SELECT registro FROM expedientes WHERE url = ?", (url,)
+                ).fetchone()
+                if fila is not None:
+                    self.no_modificados += 1
+            if fila is not None:
+                return json.loads(fila[0]) if fila[0] else None
+            # 304 sin entrada (la caché se borró entre la petición y la respuesta)
+            raise RuntimeError(f"304 sin copia en caché para {url}")
+
+        contenido = r.content
+        sha = hashlib.sha256(contenido).hexdigest()
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT sha256, registro FROM expedientes WHERE url = ?", (url,)
+            ).fetchone()
+        if fila is not None and fila[0] == sha:
+            self._actualizar_validadores(url, etag, last_modified)
+            return json.loads(fila[1]) if fila[1] else None
+
+        datos = extraer(contenido, r.encoding)
+        self._guardar(url, etag, last_modified, sha, r.encoding, contenido, datos)
+        return datos
+
+    def _actualizar_validadores(self, url, etag, last_modified):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE expedientes SET etag = ?, last_modified = ?, actualizado = ? WHERE url = ?",
+                (etag, last_modified, _ahora(), url),
+            )
+            self._conn.commit()
+            self.mismo_hash += 1
+
+    def _guardar(self, url, etag, last_modified, sha, encoding, contenido, datos):
+        cuerpo = zlib.compress(contenido, 6)
+        registro = json.dumps(datos, ensure_ascii=False) if datos else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO expedientes "
+                "(url, etag, last_modified, sha256, encoding, cuerpo, registro, actualizado) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, sha, encoding, cuerpo, registro, _ahora()),
+            )
+            self._conn.commit()
+            self.descargados += 1
+
+    # ---------- sin red ----------
+    def reparsear(self, extraer):
+        """
+        Vuelve a extraer cada expediente desde su cuerpo guardado (p. ej. tras cambiar
+        el extractor) y actualiza el registro. Devuelve (resultados, omitidos).
+        """
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT url, encoding, cuerpo, registro FROM expedientes ORDER BY url"
+            ).fetchall()
+
+        resultados, omitidos, cambios = [], 0, []
+        for url, encoding, cuerpo, registro in filas:
+            datos = extraer(zlib.decompress(cuerpo), encoding)
+            nuevo = json.dumps(datos, ensure_ascii=False) if datos else None
+            if nuevo != registro:
+                cambios.append((nuevo, url))
+            if datos:
+                resultados.append(datos)
+            else:
+                omitidos += 1
+
+        if cambios:
+            with self._lock:
+                self._conn.executemany("UPDATE expedientes SET registro = ? WHERE url = ?", cambios)
+                self._conn.commit()
+        print(f"-> Reparseados {len(filas)} expedientes de la caché ({len(cambios)} registros cambiaron)")
+        return resultados, omitidos
+
+    def resumen(self) -> str:
+        return (
+            f"Caché: {self.no_modificados} sin cambios (304) | {self.mismo_hash} con el mismo contenido | "
+            f"{self.descargados} nuevos o modificados"
+        )
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec="seconds")
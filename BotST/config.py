@@ -1,3 +1,5 @@
+import os
+
 from selenium.webdriver.common.by import By
 
 # -------------------------------------------------------------------------
@@ -13,4 +15,35 @@ SEL_COL_ESTADO  = (By.CSS_SELECTOR, "table.tab-docs tbody tr td:nth-child(6)")
 SEL_TBODY       = (By.CSS_SELECTOR, "table.tab-docs tbody")
 
 DEFAULT_TIMEOUT = 120
-MAX_WORKERS = 6
\ No newline at end of file
+ESTADO_FILTRO = "Entrega electrónica y física de documentos"
+# Estados que se recolectan en una misma sesión (--estados); las URLs se deduplican
+# entre estados y cada registro guarda el estado en el que se encontró
+ESTADOS_FILTRO = [ESTADO_FILTRO]
+
+# Listado por HTTP (listado_http.py): parámetros que el componente Livewire
+# refleja en la query string de /listado/seguimiento
+URL_LISTADO = "https://seguimientotitulacion.unam.mx/control/listado/seguimiento"
+PARAM_ESTADO = "est_avance"
+PARAM_CANTIDAD = "cantidad"
+PARAM_PAGINA = "page"
+MAX_PAGINAS_LISTADO = 1000
+
+MAX_WORKERS = 6
+MAX_WORKERS_TOPE = 32     # techo del control adaptativo de concurrencia (--adaptativo)
+TAM_COLA_URLS = 500       # URLs en espera entre la recolección (Selenium) y la descarga
+TAM_COLA_PARSEO = 64      # cuerpos descargados en espera de un proceso de parseo (--procesos)
+RUTA_CACHE = "cache_expedientes.sqlite"   # --cache / --offline
+RUTA_BITACORA = "expedientes_bitacora.jsonl"   # URLs ya procesadas (--resume)
+RUTA_METRICAS = "expedientes_metricas"    # --metricas: .json (resumen) y .prom (Prometheus)
+RUTA_ALMACEN = "expedientes.sqlite"       # --almacen: expedientes por número de cuenta y sus cambios
+TAM_LOTE_ALMACEN = 200    # upserts por transacción en el almacén
+INTERVALO_PROGRESO = 10   # segundos entre líneas de avance (con --metricas)
+
+# chromedriver (navegador.py): con CHROMEDRIVER en el entorno se usa esa ruta fija; si no,
+# la que resolvió webdriver_manager la primera vez, guardada en RUTA_CHROMEDRIVER_GUARDADO
+CHROMEDRIVER_FIJO = os.environ.get("CHROMEDRIVER") or None
+RUTA_CHROMEDRIVER_GUARDADO = "chromedriver_ruta.txt"
+
+# Motor asyncio (expedientes_async.py)
+MAX_EN_VUELO = 200        # peticiones simultáneas (semáforo)
+LIMITE_POR_HOST = 100     # conexiones keep-alive por host
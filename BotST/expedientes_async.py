@@ -0,0 +1,147 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from http.cookies import SimpleCookie
+
+import aiohttp
+from yarl import URL as YURL
+
+from config import MAX_EN_VUELO, LIMITE_POR_HOST
+from expedientes_service import headers_desde_driver, extraer_expediente_desde_html, segundos_retry_after
+
+# Mismos criterios que el Retry de urllib3 en preparar_session()
+STATUS_REINTENTO = {429, 502, 503, 504}
+REINTENTOS = 3
+BACKOFF = 0.8
+
+
+# -------------------------------------------------------------------------
+# COOKIES DEL DRIVER -> aiohttp
+# -------------------------------------------------------------------------
+def cargar_cookies_desde_driver(driver, jar: aiohttp.CookieJar):
+    """
+    Copia las cookies del driver conservando domain, path y secure (como
+    construir_session_desde_driver): una cookie de dominio (".example.com" o
+    "example.com") también se envía a los subdominios, p. ej. www.example.com.
+    """
+    jar.clear()
+    for c in driver.get_cookies():
+        dominio = c.get("domain") or ""
+        if not dominio.lstrip("."):
+            continue
+        nombre = c.get("name")
+        cookie = SimpleCookie()
+        cookie[nombre] = c.get("value")
+        morsel = cookie[nombre]
+        morsel["domain"] = dominio
+        morsel["path"] = c.get("path") or "/"
+        if c.get("secure"):
+            morsel["secure"] = True
+        esquema = "https" if c.get("secure") else "http"
+        jar.update_cookies(cookie, response_url=YURL.build(scheme=esquema, host=dominio.lstrip(".")))
+
+
+def _espera_reintento(resp, intento: int) -> float:
+    # Retry-After en segundos o como fecha HTTP, igual que el Retry de urllib3
+    retry_after = segundos_retry_after(resp)
+    if retry_after > 0:
+        return retry_after
+    return BACKOFF * (2 ** intento)
+
+
+# -------------------------------------------------------------------------
+# MOTOR ASYNC
+# -------------------------------------------------------------------------
+async def _procesar_async(driver, urls, max_en_vuelo, limite_por_host, parse_pool, timeout, al_completar, acumular):
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(max_en_vuelo)
+    jar = aiohttp.CookieJar(unsafe=True)  # unsafe: permite hosts por IP (servidor local de pruebas)
+    cargar_cookies_desde_driver(driver, jar)
+
+    refresco = {"generacion": 0}
+    lock_refresco = asyncio.Lock()
+
+    async def renovar_cookies(generacion_vista):
+        # una sola renovación en vuelo; las demás tareas esperan y reutilizan el resultado
+        async with lock_refresco:
+            if refresco["generacion"] == generacion_vista:
+                cargar_cookies_desde_driver(driver, jar)
+                refresco["generacion"] += 1
+
+    connector = aiohttp.TCPConnector(limit=max_en_vuelo, limit_per_host=limite_por_host)
+    async with aiohttp.ClientSession(
+        connector=connector,
+        cookie_jar=jar,
+        headers=headers_desde_driver(driver),
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as http:
+
+        async def descargar(url):
+            renovado = False
+            intento = 0
+            while True:
+                generacion = refresco["generacion"]
+                async with http.get(url) as r:
+                    if r.status in (401, 403):
+                        if renovado:
+                            raise PermissionError(f"Sesión expirada o sin permisos al pedir {url}")
+                        renovado = True
+                        await renovar_cookies(generacion)
+                        continue
+                    if r.status in STATUS_REINTENTO and intento < REINTENTOS:
+                        espera = _espera_reintento(r, intento)
+                        intento += 1
+                        await asyncio.sleep(espera)
+                        continue
+                    r.raise_for_status()
+                    return await r.text()
+
+        async def tarea(url):
+            try:
+                async with sem:
+                    html = await descargar(url)
+                # el parseo no bloquea el event loop
+                datos = await loop.run_in_executor(parse_pool, extraer_expediente_desde_html, html)
+                return url, datos, None
+            except Exception as e:
+                return url, None, e
+
+        resultados, omitidos = [], 0
+        for fut in asyncio.as_completed([tarea(u) for u in urls]):
+            u, datos, error = await fut
+            if al_completar is not None:
+                al_completar(u, datos, error)
+            if error is not None:
+                print(f"   -> Error en {u}: {error}")
+                omitidos += 1
+            elif datos:
+                if acumular:
+                    resultados.append(datos)
+            else:
+                omitidos += 1
+        return resultados, omitidos
+
+
+def procesar_urls_async(
+    driver,
+    urls,
+    max_en_vuelo: int = MAX_EN_VUELO,
+    limite_por_host: int = LIMITE_POR_HOST,
+    parse_workers: int = 2,
+    parse_en_procesos: bool = False,
+    timeout: float = 30,
+    al_completar=None,
+    acumular: bool = True,
+):
+    """
+    Alternativa asyncio a procesar_urls_concurrente: cientos de peticiones en vuelo
+    sobre conexiones keep-alive, con las cookies y el User-Agent del driver.
+    Devuelve (resultados, omitidos) igual que la versión con hilos;
+    `al_completar(url, datos, error)` y `acumular` también igual.
+    """
+    Pool = ProcessPoolExecutor if parse_en_procesos else ThreadPoolExecutor
+    with Pool(max_workers=parse_workers) as parse_pool:
+        return asyncio.run(
+            _procesar_async(
+                driver, urls, max_en_vuelo, limite_por_host, parse_pool, timeout, al_completar, acumular
+            )
+        )
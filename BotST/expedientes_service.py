@@ -1,27 +1,42 @@
+import codecs
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
+from requests.compat import chardet
 from urllib3.util.retry import Retry
 
-from config import MAX_WORKERS
+from config import (
+    MAX_WORKERS, MAX_WORKERS_TOPE, TAM_COLA_URLS, TAM_COLA_PARSEO, INTERVALO_PROGRESO,
+)
+from metricas import AdapterMedido, Metricas
+from parser_expediente import extraer_campos, nuevo_parser
 
 
 # -------------------------------------------------------------------------
 # SESSION REQUESTS + RETRIES/POOL
 # -------------------------------------------------------------------------
+def headers_desde_driver(driver) -> dict:
+    """Headers HTTP con el mismo User-Agent que el navegador de Selenium."""
+    ua = driver.execute_script("return navigator.userAgent;")
+    return {
+        "User-Agent": ua,
+        "Accept-Language": "es-ES,es;q=0.9",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Connection": "keep-alive",
+    }
+
+
 def construir_session_desde_driver(driver) -> requests.Session:
     s = requests.Session()
-    ua = driver.execute_script("return navigator.userAgent;")
-    s.headers.update(
-        {
-            "User-Agent": ua,
-            "Accept-Language": "es-ES,es;q=0.9",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Connection": "keep-alive",
-        }
-    )
+    s.headers.update(headers_desde_driver(driver))
     for c in driver.get_cookies():
         s.cookies.set(
             c.get("name"),
@@ -32,22 +47,173 @@ def construir_session_desde_driver(driver) -> requests.Session:
     return s
 
 
-def preparar_session(session: requests.Session) -> requests.Session:
+def preparar_session(
+    session: requests.Session,
+    status_forcelist=(429, 503, 502, 504),
+    respetar_retry_after: bool = True,
+    medir: bool = False,
+) -> requests.Session:
+    """Con `medir`, el adapter anota conexión, primer byte y reintentos (metricas.AdapterMedido)."""
     retry = Retry(
         total=3,
         backoff_factor=0.8,
-        status_forcelist=[429, 503, 502, 504],
+        status_forcelist=list(status_forcelist),
+        # urllib3 reintenta 413/429/503 con Retry-After aunque no estén en status_forcelist
+        respect_retry_after_header=respetar_retry_after,
     )
-    adapter = HTTPAdapter(pool_connections=100, pool_maxsize=100, max_retries=retry)
+    Adapter = AdapterMedido if medir else HTTPAdapter
+    adapter = Adapter(pool_connections=100, pool_maxsize=100, max_retries=retry)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
 
+# -------------------------------------------------------------------------
+# SESSION COMPARTIDA CON RENOVACIÓN SINGLE-FLIGHT
+# -------------------------------------------------------------------------
+class GestorSesion:
+    """
+    Session compartida por todos los hilos. Cuando las cookies expiran, solo un hilo
+    las renueva desde el driver (que no es thread-safe); los demás esperan esa misma
+    renovación y después usan la session nueva, que reutiliza el mismo HTTPAdapter
+    (pool de conexiones y Retry).
+    """
+
+    def __init__(self, driver, session: requests.Session = None, **opciones_session):
+        self.driver = driver
+        # todo acceso al driver desde hilos debe hacerse con este lock
+        self.lock_driver = threading.RLock()
+        self._lock = threading.Lock()
+        with self.lock_driver:
+            base = session if session is not None else construir_session_desde_driver(driver)
+        self._session = preparar_session(base, **opciones_session)
+        self.generacion = 0
+        self.renovaciones = 0
+
+    def actual(self):
+        """(session, generación); la generación identifica qué cookies se usaron."""
+        return self._session, self.generacion
+
+    def renovar(self, generacion_vista: int) -> requests.Session:
+        with self._lock:
+            if self.generacion == generacion_vista:
+                with self.lock_driver:
+                    nueva = construir_session_desde_driver(self.driver)
+                for prefijo, adapter in self._session.adapters.items():
+                    nueva.mount(prefijo, adapter)
+                self._session = nueva
+                self.generacion += 1
+                self.renovaciones += 1
+                print(f"   -> Cookies renovadas desde el navegador (renovación #{self.renovaciones})")
+            return self._session
+
+
+# -------------------------------------------------------------------------
+# CONTROL ADAPTATIVO DE CONCURRENCIA (AIMD)
+# -------------------------------------------------------------------------
+STATUS_CONGESTION = (429, 503)
+REINTENTOS_CONGESTION = 8
+
+
+def segundos_retry_after(resp) -> float:
+    """Valor de Retry-After en segundos (entero o fecha HTTP); 0 si no viene."""
+    valor = (resp.headers.get("Retry-After") or "").strip() if resp is not None else ""
+    if not valor:
+        return 0.0
+    if valor.isdigit():
+        return float(valor)
+    try:
+        fecha = parsedate_to_datetime(valor)
+        return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ControladorConcurrencia:
+    """
+    Límite de peticiones en vuelo con AIMD:
+      - aumento aditivo: +1 por cada `limite` respuestas sanas
+      - recorte multiplicativo: limite * factor ante 429/503 o un pico de latencia
+        (latencia > umbral_latencia x latencia base), respetando Retry-After.
+    La latencia base es un promedio móvil (EWMA) de las respuestas sanas.
+    """
+
+    def __init__(
+        self,
+        inicial: int = MAX_WORKERS,
+        minimo: int = 1,
+        maximo: int = MAX_WORKERS_TOPE,
+        factor: float = 0.5,
+        umbral_latencia: float = 2.5,
+        alfa: float = 0.1,
+    ):
+        self.minimo, self.maximo = minimo, maximo
+        self.factor, self.umbral_latencia, self.alfa = factor, umbral_latencia, alfa
+        self.limite = float(max(minimo, min(inicial, maximo)))
+        self.en_vuelo = 0
+        self.latencia_base = None
+        self._pausa_hasta = 0.0
+        self._ultimo_recorte = 0.0
+        self._cond = threading.Condition()
+        self._t0 = time.monotonic()
+        self.historial = [(0.0, int(self.limite), "inicio")]
+
+    def adquirir(self):
+        with self._cond:
+            while True:
+                espera = self._pausa_hasta - time.monotonic()
+                if espera <= 0 and self.en_vuelo < int(self.limite):
+                    self.en_vuelo += 1
+                    return
+                self._cond.wait(timeout=espera if espera > 0 else None)
+
+    def liberar(self):
+        with self._cond:
+            self.en_vuelo -= 1
+            self._cond.notify_all()
+
+    def exito(self, latencia: float):
+        with self._cond:
+            if self.latencia_base is not None and latencia > self.umbral_latencia * self.latencia_base:
+                self._recortar(f"latencia {latencia:.2f}s (base {self.latencia_base:.2f}s)")
+                return
+            if self.latencia_base is None:
+                self.latencia_base = latencia
+            else:
+                self.latencia_base += self.alfa * (latencia - self.latencia_base)
+            antes = int(self.limite)
+            self.limite = min(self.maximo, self.limite + 1.0 / self.limite)
+            if int(self.limite) != antes:
+                self._registrar(f"latencia base {self.latencia_base:.2f}s")
+            self._cond.notify_all()
+
+    def congestion(self, status: int, retry_after: float = 0.0):
+        with self._cond:
+            if retry_after > 0:
+                self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + retry_after)
+            self._recortar(f"HTTP {status}" + (f", Retry-After {retry_after:.0f}s" if retry_after else ""))
+
+    def _recortar(self, motivo: str):
+        # un solo recorte por "ventana" de latencia: las respuestas ya en vuelo
+        # reflejan la congestión anterior y no deben recortar otra vez
+        ahora = time.monotonic()
+        if ahora - self._ultimo_recorte < max(self.latencia_base or 0.0, 0.5):
+            return
+        self._ultimo_recorte = ahora
+        self.limite = max(float(self.minimo), self.limite * self.factor)
+        self._registrar(motivo)
+
+    def _registrar(self, motivo: str):
+        t = time.monotonic() - self._t0
+        self.historial.append((round(t, 2), int(self.limite), motivo))
+        print(f"   -> [{t:7.1f}s] Concurrencia: {int(self.limite)} ({motivo})")
+
+
 # -------------------------------------------------------------------------
 # HELPERS BS4
 # -------------------------------------------------------------------------
-def bs4_obtener_valor(html_soup: BeautifulSoup, label_text: str) -> str:
+# bs4 solo se usa como referencia (verificar_extractor.py); se importa al usarlo
+def bs4_obtener_valor(html_soup: "BeautifulSoup", label_text: str) -> str:
     def _norm(s):
         return " ".join((s or "").split())
 
@@ -60,7 +226,7 @@ def bs4_obtener_valor(html_soup: BeautifulSoup, label_text: str) -> str:
     return ""
 
 
-def bs4_obtener_cita_programada(html_soup: BeautifulSoup):
+def bs4_obtener_cita_programada(html_soup: "BeautifulSoup"):
     def _norm(s):
         return " ".join((s or "").split())
 
@@ -80,16 +246,56 @@ def bs4_obtener_cita_programada(html_soup: BeautifulSoup):
 # -------------------------------------------------------------------------
 # DESCARGA + PARSEO DEL EXPEDIENTE
 # -------------------------------------------------------------------------
-def descargar_y_extraer_expediente(
-    session: requests.Session,
-    url: str,
-):
-    r = session.get(url, timeout=30)
+def descargar_expediente(
+    session: requests.Session, url: str, stream: bool = False, headers: dict = None
+) -> requests.Response:
+    """Con `stream`, solo se leen los encabezados; el cuerpo lo consume extraer_expediente_en_streaming."""
+    r = session.get(url, timeout=30, stream=stream, headers=headers)
     if r.status_code in (401, 403):
+        r.close()
         raise PermissionError(f"Sesión expirada o sin permisos al pedir {url}")
-    r.raise_for_status()
+    try:
+        r.raise_for_status()
+    except requests.HTTPError:
+        r.close()
+        raise
+    return r
+
+
+# campo de salida -> etiqueta en la página del expediente
+ETIQUETAS_EXPEDIENTE = {
+    "numero_cuenta": "Número de cuenta:",
+    "nombre": "Nombre:",
+    "opcion_titulacion": "Opción de titulación:",
+    "correo": "Correo electrónico:",
+    "plantel": "Plantel:",
+    "carrera": "Carrera:",
+    "plan_estudios": "Plan de estudios:",
+}
+
 
-    soup = BeautifulSoup(r.text, "lxml")
+def extraer_expediente_desde_html(html: str):
+    """
+    Parsea el HTML de un expediente en un solo recorrido (parser_expediente);
+    None si no tiene cita programada.
+    """
+    return _datos_expediente(*extraer_campos(html, ETIQUETAS_EXPEDIENTE.values()))
+
+
+def _datos_expediente(valores, cita):
+    if not cita:
+        return None
+
+    datos = {campo: valores[etiqueta] for campo, etiqueta in ETIQUETAS_EXPEDIENTE.items()}
+    datos.update(cita)
+    return datos
+
+
+def extraer_expediente_desde_html_bs4(html: str):
+    """Versión con BeautifulSoup; referencia para verificar_extractor.py."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
 
     cita = bs4_obtener_cita_programada(soup)
     if not cita:
@@ -108,38 +314,564 @@ def descargar_y_extraer_expediente(
     return datos
 
 
+# -------------------------------------------------------------------------
+# DESCARGA EN STREAMING CON DESCARTE TEMPRANO
+# -------------------------------------------------------------------------
+# "Cita programada" en los bytes crudos, con cualquier cosa que al normalizar el texto
+# quede como espacio entre las dos palabras: blancos ASCII y Unicode (UTF-8), entidades
+# (&nbsp;, &#160;…), etiquetas y comentarios. Si no aparece, el expediente no puede
+# tener cita y se descarta sin decodificar ni construir el DOM.
+_SEP_CITA = (
+    rb"[\s\x1c-\x1f\x85\xa0]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]"
+    rb"|\xe2\x81\x9f|\xe3\x80\x80|&[#\w]{1,10};?|<[^>]*>"
+)
+PATRON_CITA = re.compile(rb"Cita(?:" + _SEP_CITA + rb")*programada")
+TAM_BLOQUE = 16 * 1024
+SOLAPE_PATRON = 4096  # bytes del bloque anterior que se vuelven a revisar
+
+
+class EstadisticasStreaming:
+    """Contadores (thread-safe) de la descarga con descarte temprano."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.descartados = 0
+        self.parseados = 0
+        self.bytes_descartados = 0
+        self.bytes_parseados = 0
+        self.segundos_parseo = 0.0
+
+    def registrar(self, descartado: bool, n_bytes: int, segundos_parseo: float = 0.0):
+        with self._lock:
+            if descartado:
+                self.descartados += 1
+                self.bytes_descartados += n_bytes
+            else:
+                self.parseados += 1
+                self.bytes_parseados += n_bytes
+                self.segundos_parseo += segundos_parseo
+
+    def segundos_ahorrados(self) -> float:
+        """Estimación: bytes descartados al ritmo de parseo medido en las páginas parseadas."""
+        if not self.bytes_parseados:
+            return 0.0
+        return self.bytes_descartados * self.segundos_parseo / self.bytes_parseados
+
+    def resumen(self) -> str:
+        return (
+            f"Descartados sin parsear: {self.descartados} ({self.bytes_descartados / 1e6:.2f} MB) | "
+            f"Parseados: {self.parseados} ({self.bytes_parseados / 1e6:.2f} MB, "
+            f"{self.segundos_parseo:.2f} s) | Parseo evitado ≈ {self.segundos_ahorrados():.2f} s"
+        )
+
+
+def _compatible_ascii(encoding: str) -> bool:
+    # en UTF-16/32 el marcador no aparece como bytes ASCII
+    e = (encoding or "").lower().replace("_", "-")
+    return not (e.startswith("utf-16") or e.startswith("utf-32") or e.startswith("utf16") or e.startswith("utf32"))
+
+
+def _texto_como_requests(contenido: bytes, encoding: str) -> str:
+    # misma decodificación que Response.text
+    try:
+        return str(contenido, encoding, errors="replace")
+    except (LookupError, TypeError):
+        return str(contenido, errors="replace")
+
+
+def extraer_expediente_en_streaming(r: requests.Response, estadisticas: EstadisticasStreaming = None):
+    """
+    Consume el cuerpo de `r` (pedido con stream=True) por bloques buscando PATRON_CITA.
+    En cuanto aparece, los bytes ya recibidos se pasan al parser de un solo recorrido y
+    el resto se le va dando conforme llega; si el cuerpo termina sin el marcador, se
+    devuelve None sin parsear. El resultado es el mismo que
+    extraer_expediente_desde_html(r.text).
+    """
+    t_parseo = 0.0
+    with r:
+        encoding = r.encoding
+        decodificador = None
+        if encoding is not None and _compatible_ascii(encoding):
+            try:
+                decodificador = codecs.getincrementaldecoder(encoding)(errors="replace")
+            except LookupError:
+                pass
+
+        buf, parser, desde = bytearray(), None, 0
+        for bloque in r.iter_content(TAM_BLOQUE):
+            buf += bloque
+            if parser is not None:
+                t0 = time.perf_counter()
+                texto = decodificador.decode(bloque)
+                if texto:
+                    parser.feed(texto)
+                t_parseo += time.perf_counter() - t0
+            elif decodificador is not None and PATRON_CITA.search(buf, desde):
+                t0 = time.perf_counter()
+                parser = nuevo_parser(ETIQUETAS_EXPEDIENTE.values())
+                parser.feed(decodificador.decode(bytes(buf)))
+                t_parseo += time.perf_counter() - t0
+            else:
+                desde = max(0, len(buf) - SOLAPE_PATRON)
+
+    if parser is None:
+        # el marcador no apareció por bloques (o no hay encoding declarado): decisión final
+        # sobre el cuerpo completo
+        return extraer_expediente_de_bytes(bytes(buf), encoding, estadisticas)
+
+    t0 = time.perf_counter()
+    resto = decodificador.decode(b"", final=True)
+    if resto:
+        parser.feed(resto)
+    datos = _datos_expediente(*parser.close())
+    t_parseo += time.perf_counter() - t0
+    if estadisticas is not None:
+        estadisticas.registrar(False, len(buf), t_parseo)
+    return datos
+
+
+def extraer_expediente_de_bytes(contenido: bytes, encoding: str = None, estadisticas: EstadisticasStreaming = None):
+    """
+    Cuerpo ya descargado -> datos|None, decodificando como Response.text (`encoding` es
+    Response.encoding). Sin el marcador de cita no se decodifica ni se parsea.
+    """
+    if encoding is None:
+        encoding = chardet.detect(contenido)["encoding"]  # Response.apparent_encoding
+    if _compatible_ascii(encoding) and not PATRON_CITA.search(contenido):
+        if estadisticas is not None:
+            estadisticas.registrar(True, len(contenido))
+        return None
+    t0 = time.perf_counter()
+    datos = extraer_expediente_desde_html(_texto_como_requests(contenido, encoding))
+    if estadisticas is not None:
+        estadisticas.registrar(False, len(contenido), time.perf_counter() - t0)
+    return datos
+
+
+def _cuerpo_para_parseo(r: requests.Response):
+    """
+    (contenido, encoding) para extraer_expediente_de_bytes en otro proceso, o None si el
+    cuerpo no trae el marcador de cita (mismo criterio que extraer_expediente_de_bytes;
+    sin encoding declarado, la detección se deja al proceso).
+    """
+    contenido, encoding = r.content, r.encoding
+    if encoding is not None and _compatible_ascii(encoding) and not PATRON_CITA.search(contenido):
+        return None
+    return contenido, encoding
+
+
 # -------------------------------------------------------------------------
 # FASE B: PROCESAR EN PARALELO
 # -------------------------------------------------------------------------
+def crear_gestor_sesion(
+    driver, session: requests.Session = None, adaptativo: bool = False, medir: bool = False
+) -> GestorSesion:
+    """
+    Con `adaptativo`, urllib3 no reintenta 429/503: los maneja el ControladorConcurrencia.
+    Con `medir`, la session usa el adapter de metricas.py (necesario para --metricas).
+    """
+    if adaptativo:
+        return GestorSesion(
+            driver,
+            session,
+            status_forcelist=[c for c in (429, 503, 502, 504) if c not in STATUS_CONGESTION],
+            respetar_retry_after=False,
+            medir=medir,
+        )
+    return GestorSesion(driver, session, medir=medir)
+
+
+def _crear_tarea(
+    gestor: GestorSesion,
+    controlador: ControladorConcurrencia = None,
+    streaming: EstadisticasStreaming = None,
+    cache=None,
+    metricas: Metricas = None,
+    solo_descarga: bool = False,
+):
+    """
+    Función (url, encolado=None) -> datos|None con reintento por congestión y
+    renovación de sesión. `encolado` es el perf_counter() de cuando la URL entró a
+    la cola; con `metricas` se mide cada fase de la URL (metricas.Metricas).
+    Con `solo_descarga` no se parsea: devuelve _cuerpo_para_parseo(r) y, si hay cuerpo,
+    la medición queda abierta en el hilo para quien lo parsee (procesar_urls_hibrido).
+    Con `streaming`, el cuerpo se lee por bloques y se descarta sin parsear si no
+    contiene el marcador de cita (extraer_expediente_en_streaming).
+    Con `cache` (CacheExpedientes), la petición es condicional y un 304 o un cuerpo
+    igual al guardado reutilizan el registro anterior; en ese modo el cuerpo se
+    descarga completo (hay que guardarlo), pero el marcador se sigue revisando.
+    """
+    stream = streaming is not None and cache is None
+
+    def extraer_bytes(contenido, encoding):
+        return extraer_expediente_de_bytes(contenido, encoding, streaming)
+
+    def pedir(s, u):
+        headers = cache.encabezados_condicionales(u) if cache is not None else None
+        r = descargar_expediente(s, u, stream=stream, headers=headers)
+        if metricas is not None:
+            metricas.marcar_descarga()
+        return r
+
+    def extraer(r, u):
+        if solo_descarga:
+            return _cuerpo_para_parseo(r)
+        if metricas is not None:
+            return metricas.medir_parseo(_extraer, r, u)
+        return _extraer(r, u)
+
+    def _extraer(r, u):
+        if cache is not None:
+            return cache.resolver(u, r, extraer_bytes)
+        if stream:
+            return extraer_expediente_en_streaming(r, streaming)
+        return extraer_expediente_desde_html(r.text)
+
+    def descargar(s, u):
+        if controlador is None:
+            return extraer(pedir(s, u), u)
+        for intento in range(REINTENTOS_CONGESTION + 1):
+            controlador.adquirir()
+            t0 = time.perf_counter()
+            try:
+                r = pedir(s, u)
+            except requests.HTTPError as e:
+                controlador.liberar()
+                resp = e.response
+                if resp is None or resp.status_code not in STATUS_CONGESTION \
+                        or intento == REINTENTOS_CONGESTION:
+                    raise
+                controlador.congestion(resp.status_code, segundos_retry_after(resp))
+                continue
+            except BaseException:
+                controlador.liberar()
+                raise
+            # el lugar se conserva hasta terminar de leer el cuerpo: en streaming pedir()
+            # regresa con los encabezados y el cuerpo se descarga dentro de extraer()
+            try:
+                fin_cuerpo = None if stream else time.perf_counter()
+                datos = extraer(r, u)
+            finally:
+                controlador.liberar()
+            controlador.exito((fin_cuerpo or time.perf_counter()) - t0)
+            return datos
+
+    def _tarea(u, m=None):
+        s, generacion = gestor.actual()
+        try:
+            return descargar(s, u)
+        except PermissionError:
+            # renovar cookies (una sola vez para todos los hilos) y reintentar una vez
+            if m is not None:
+                m.renovo_sesion = True
+            return descargar(gestor.renovar(generacion), u)
+
+    def tarea(u, encolado=None):
+        if metricas is None:
+            return _tarea(u)
+        m = metricas.iniciar(encolado)
+        try:
+            datos = _tarea(u, m)
+        except PermissionError:
+            metricas.terminar(m, "permiso")
+            raise
+        except Exception:
+            metricas.terminar(m, "error")
+            raise
+        if solo_descarga and datos is not None:
+            return datos
+        metricas.terminar(m, "ok" if datos else "sin_cita")
+        return datos
+
+    return tarea
+
+
 def procesar_urls_concurrente(
     driver,
     session: requests.Session,
     urls,
     max_workers: int = MAX_WORKERS,
+    controlador: ControladorConcurrencia = None,
+    gestor: GestorSesion = None,
+    streaming: EstadisticasStreaming = None,
+    cache=None,
+    al_completar=None,
+    acumular: bool = True,
+    metricas: Metricas = None,
 ):
+    """
+    Sin `controlador`, usa `max_workers` hilos fijos y el Retry de urllib3 absorbe
+    429/503. Con `controlador`, el pool crece hasta su máximo y el número de
+    peticiones en vuelo lo decide el AIMD (429/503 ya no los reintenta urllib3).
+    Si no se pasa `gestor`, se crea uno a partir de `session`. Con `streaming`
+    (EstadisticasStreaming), los expedientes sin cita se descartan sin parsear; con
+    `cache` (CacheExpedientes), las peticiones son condicionales.
+    `al_completar(url, datos, error)` se llama al terminar cada URL (p. ej. Bitacora.registrar).
+    Con `acumular=False` no se guardan los resultados en memoria (se devuelve una lista
+    vacía): los consume `al_completar`, p. ej. hacia las salidas incrementales.
+    Con `metricas` (Metricas) se mide cada URL y se imprime el avance cada
+    INTERVALO_PROGRESO segundos; el gestor debe crearse con medir=True para tener
+    conexión, primer byte y reintentos.
+    """
     resultados, omitidos = [], 0
-    session = preparar_session(session)
-
-    def tarea(u):
-        try:
-            return descargar_y_extraer_expediente(session, u)
-        except PermissionError:
-            # renovar cookies y reintentar una vez
-            s2 = preparar_session(construir_session_desde_driver(driver))
-            return descargar_y_extraer_expediente(s2, u)
+    if controlador is not None:
+        max_workers = controlador.maximo
+    if gestor is None:
+        gestor = crear_gestor_sesion(
+            driver, session, adaptativo=controlador is not None, medir=metricas is not None
+        )
+    tarea = _crear_tarea(gestor, controlador, streaming, cache, metricas)
 
     with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futs = {ex.submit(tarea, u): u for u in urls}
+        futs = {ex.submit(tarea, u, time.perf_counter()): u for u in urls}
+        if metricas is not None:
+            metricas.comenzar(len(futs), INTERVALO_PROGRESO)
         for fut in as_completed(futs):
             u = futs[fut]
+            datos, error = None, None
             try:
                 datos = fut.result()
                 if datos:
-                    resultados.append(datos)
+                    if acumular:
+                        resultados.append(datos)
                 else:
                     omitidos += 1
             except Exception as e:
                 print(f"   -> Error en {u}: {e}")
+                error = e
                 omitidos += 1
+            if al_completar is not None:
+                al_completar(u, datos, error)
+
+    if metricas is not None:
+        metricas.finalizar(gestor.renovaciones)
+    return resultados, omitidos
+
+
+# -------------------------------------------------------------------------
+# FASES A+B EN PIPELINE
+# -------------------------------------------------------------------------
+def procesar_urls_en_pipeline(
+    gestor: GestorSesion,
+    producir,
+    max_workers: int = MAX_WORKERS,
+    controlador: ControladorConcurrencia = None,
+    tam_cola: int = TAM_COLA_URLS,
+    streaming: EstadisticasStreaming = None,
+    cache=None,
+    al_completar=None,
+    acumular: bool = True,
+    metricas: Metricas = None,
+):
+    """
+    Productor/consumidor: `producir(encolar)` corre en el hilo actual (Selenium) y llama
+    encolar(url) conforme recolecta cada página; `max_workers` hilos descargan y parsean
+    mientras tanto. La cola es acotada: si se llena, el productor espera.
+    `streaming`, `cache`, `al_completar`, `acumular` y `metricas` igual que en
+    procesar_urls_concurrente (aquí `al_completar` se llama desde los hilos de descarga;
+    el avance se reporta contra las URLs recolectadas hasta el momento).
+    Si `al_completar` lanza (p. ej. disco lleno al escribir la bitácora o las salidas),
+    los hilos dejan de procesar y solo vacían la cola, el productor se detiene en el
+    siguiente encolar() y la excepción se relanza aquí.
+    Devuelve (resultados, omitidos, total_urls).
+    """
+    if controlador is not None:
+        max_workers = controlador.maximo
+    tarea = _crear_tarea(gestor, controlador, streaming, cache, metricas)
+    cola = queue.Queue(maxsize=tam_cola)
+    fin = object()
+    lock = threading.Lock()
+    resultados, contadores = [], {"omitidos": 0, "urls": 0}
+    fallo = []  # primera excepción de al_completar
+
+    def trabajador():
+        while True:
+            item = cola.get()
+            if item is fin:
+                return
+            if fallo:
+                continue  # la ejecución se está deteniendo: solo se vacía la cola
+            u, encolado = item
+            error = None
+            try:
+                datos = tarea(u, encolado)
+            except Exception as e:
+                print(f"   -> Error en {u}: {e}")
+                datos, error = None, e
+            try:
+                if al_completar is not None:
+                    al_completar(u, datos, error)
+            except Exception as e:
+                print(f"   -> Error al registrar {u}: {e}")
+                with lock:
+                    if not fallo:
+                        fallo.append(e)
+            finally:
+                with lock:
+                    if datos:
+                        if acumular:
+                            resultados.append(datos)
+                    else:
+                        contadores["omitidos"] += 1
+
+    def encolar(u):
+        if fallo:
+            raise fallo[0]
+        contadores["urls"] += 1
+        if metricas is not None:
+            metricas.encoladas += 1
+        cola.put((u, time.perf_counter()))
+
+    hilos = [threading.Thread(target=trabajador, daemon=True) for _ in range(max_workers)]
+    for h in hilos:
+        h.start()
+    if metricas is not None:
+        metricas.comenzar(progreso_cada=INTERVALO_PROGRESO)
+    try:
+        producir(encolar)
+    finally:
+        for _ in hilos:
+            cola.put(fin)
+        for h in hilos:
+            h.join()
+        if metricas is not None:
+            metricas.finalizar(gestor.renovaciones)
+    if fallo:
+        raise fallo[0]
+
+    return resultados, contadores["omitidos"], contadores["urls"]
+
+
+# -------------------------------------------------------------------------
+# FASES A+B EN PIPELINE CON PARSEO EN PROCESOS
+# -------------------------------------------------------------------------
+def procesar_urls_hibrido(
+    gestor: GestorSesion,
+    producir,
+    max_workers: int = MAX_WORKERS,
+    procesos: int = None,
+    controlador: ControladorConcurrencia = None,
+    tam_cola: int = TAM_COLA_URLS,
+    tam_cola_parseo: int = TAM_COLA_PARSEO,
+    al_completar=None,
+    acumular: bool = True,
+    metricas: Metricas = None,
+):
+    """
+    Como procesar_urls_en_pipeline, pero los hilos solo hacen I/O: descargan el cuerpo
+    y lo mandan (bytes + encoding) a un ProcessPoolExecutor de `procesos` procesos
+    (None = núcleos disponibles), que corre extraer_expediente_de_bytes y devuelve el
+    dict; así el parseo no compite por el GIL con las descargas. Los cuerpos sin el
+    marcador de cita se descartan en el hilo, sin enviarse.
+
+    Colas acotadas: `tam_cola` URLs esperan descarga y a lo más `tam_cola_parseo`
+    cuerpos esperan o se están parseando; si el pool se atrasa, los hilos de descarga
+    esperan cupo y, al llenarse la cola de URLs, también el productor.
+    `al_completar(url, datos, error)` se llama desde los hilos de descarga o desde el
+    hilo del pool que entrega los resultados. Con `metricas`, "parseo" incluye la espera
+    en el pool y el envío entre procesos. Si `al_completar` lanza, la ejecución se
+    detiene como en procesar_urls_en_pipeline.
+    Devuelve (resultados, omitidos, total_urls).
+    """
+    if controlador is not None:
+        max_workers = controlador.maximo
+    tarea = _crear_tarea(gestor, controlador, metricas=metricas, solo_descarga=True)
+    cola = queue.Queue(maxsize=tam_cola)
+    cupo_parseo = threading.BoundedSemaphore(tam_cola_parseo)
+    fin = object()
+    lock = threading.Lock()
+    resultados, contadores = [], {"omitidos": 0, "urls": 0}
+    fallo = []  # primera excepción de al_completar (igual que en procesar_urls_en_pipeline)
+
+    def completar(u, datos, error, m=None):
+        if m is not None:
+            metricas.terminar(m, "error" if error is not None else ("ok" if datos else "sin_cita"))
+        if error is not None:
+            print(f"   -> Error en {u}: {error}")
+        try:
+            if al_completar is not None:
+                al_completar(u, datos, error)
+        except Exception as e:
+            print(f"   -> Error al registrar {u}: {e}")
+            with lock:
+                if not fallo:
+                    fallo.append(e)
+        finally:
+            with lock:
+                if datos:
+                    if acumular:
+                        resultados.append(datos)
+                else:
+                    contadores["omitidos"] += 1
+
+    def parseado(fut, u, m, t0):
+        cupo_parseo.release()
+        if m is not None:
+            m.parseo += time.perf_counter() - t0
+        try:
+            datos, error = fut.result(), None
+        except Exception as e:
+            datos, error = None, e
+        try:
+            completar(u, datos, error, m)
+        except Exception as e:
+            # concurrent.futures solo registra en logging las excepciones de los callbacks
+            print(f"   -> Error al registrar {u}: {e}")
+
+    def trabajador(pool):
+        while True:
+            item = cola.get()
+            if item is fin:
+                return
+            if fallo:
+                continue  # la ejecución se está deteniendo: solo se vacía la cola
+            u, encolado = item
+            try:
+                cuerpo = tarea(u, encolado)
+            except Exception as e:
+                completar(u, None, e)   # la tarea ya cerró su medición
+                continue
+            m = metricas.desligar() if metricas is not None else None
+            if cuerpo is None:
+                completar(u, None, None, m)
+                continue
+
+            cupo_parseo.acquire()
+            t0 = time.perf_counter()
+            try:
+                fut = pool.submit(extraer_expediente_de_bytes, *cuerpo)
+            except Exception as e:
+                # pool roto (un proceso murió) o cerrándose
+                cupo_parseo.release()
+                completar(u, None, e, m)
+                continue
+            fut.add_done_callback(lambda f, u=u, m=m, t0=t0: parseado(f, u, m, t0))
+
+    def encolar(u):
+        if fallo:
+            raise fallo[0]
+        contadores["urls"] += 1
+        if metricas is not None:
+            metricas.encoladas += 1
+        cola.put((u, time.perf_counter()))
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        hilos = [threading.Thread(target=trabajador, args=(pool,), daemon=True) for _ in range(max_workers)]
+        for h in hilos:
+            h.start()
+        if metricas is not None:
+            metricas.comenzar(progreso_cada=INTERVALO_PROGRESO)
+        try:
+            producir(encolar)
+        finally:
+            for _ in hilos:
+                cola.put(fin)
+            for h in hilos:
+                h.join()
+        # al salir del with se esperan los parseos pendientes (y sus callbacks)
 
-    return resultados, omitidos
\ No newline at end of file
+    if metricas is not None:
+        metricas.finalizar(gestor.renovaciones)
+    if fallo:
+        raise fallo[0]
+    return resultados, contadores["omitidos"], contadores["urls"]
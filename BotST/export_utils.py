@@ -1,47 +1,165 @@
+import csv
+import json
+import threading
 from datetime import datetime
 
-import pandas as pd
+SCHEMA = [
+    ("numero_cuenta", "Número de cuenta"),
+    ("nombre", "Nombre completo"),
+    ("opcion_titulacion", "Opción de titulación"),
+    ("correo", "Correo"),
+    ("plantel", "Plantel"),
+    ("carrera", "Carrera"),
+    ("plan_estudios", "Plan de estudios"),
+    ("cita_fecha", "Cita programada"),
+    ("estado", "Estado"),
+]
 
+# --solo-cambios: mismas columnas + qué pasó con el expediente (nuevo / cambiado / eliminado)
+SCHEMA_CAMBIOS = SCHEMA + [("cambio", "Cambio")]
 
-def exportar_excel(resultados, base="expedientes", tz="America/Mexico_City"):
-    schema = [
-        ("numero_cuenta", "Número de cuenta"),
-        ("nombre", "Nombre completo"),
-        ("opcion_titulacion", "Opción de titulación"),
-        ("correo", "Correo"),
-        ("plantel", "Plantel"),
-        ("carrera", "Carrera"),
-        ("plan_estudios", "Plan de estudios"),
-        ("cita_fecha", "Cita programada"),
-    ]
-    raw_cols = [k for k, _ in schema]
-    headers = [h for _, h in schema]
+FORMATOS_SALIDA = ("xlsx", "json", "jsonl", "csv")
 
-    df = pd.DataFrame(resultados)
-
-    for k in raw_cols:
-        if k not in df.columns:
-            df[k] = ""
-    df = df[raw_cols]
-    for k in raw_cols:
-        df[k] = df[k].astype("string").fillna("")
-
-    df.columns = headers
 
+def _marca_tiempo(tz="America/Mexico_City") -> str:
     try:
         from zoneinfo import ZoneInfo
 
         now = datetime.now(ZoneInfo(tz))
     except Exception:
         now = datetime.now()
-    ts = now.strftime("%Y%m%d-%H%M%S")
+    return now.strftime("%Y%m%d-%H%M%S")
 
-    ruta_xlsx = f"{base}-{ts}.xlsx"
-    try:
-        df.to_excel(ruta_xlsx, index=False, sheet_name="Expedientes")
-        print(f"-> Excel generado: {ruta_xlsx}")
-    except ModuleNotFoundError:
-        print("-> Falta 'openpyxl', instálalo con: pip install openpyxl")
-        ruta_csv = f"{base}-{ts}.csv"
-        df.to_csv(ruta_csv, index=False, encoding="utf-8-sig")
-        print(f"-> CSV de respaldo generado: {ruta_csv}")
\ No newline at end of file
+
+# -------------------------------------------------------------------------
+# SALIDAS INCREMENTALES (un registro a la vez, memoria constante)
+# -------------------------------------------------------------------------
+def fila_schema(datos, schema=SCHEMA) -> list:
+    """Valores en el orden de `schema`; faltantes/None -> "" (como astype("string").fillna(""))."""
+    return ["" if datos.get(k) is None else str(datos.get(k)) for k, _ in schema]
+
+
+class SalidaJSONL:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._f = open(ruta, "w", encoding="utf-8")
+
+    def escribir(self, datos):
+        self._f.write(json.dumps(datos, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def cerrar(self):
+        self._f.close()
+
+
+class SalidaJSON:
+    """Arreglo JSON escrito por partes; el archivo final es igual al de json.dump(..., indent=4)."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._f = open(ruta, "w", encoding="utf-8")
+        self._primero = True
+
+    def escribir(self, datos):
+        bloque = json.dumps(datos, ensure_ascii=False, indent=4)
+        bloque = "\n".join("    " + linea for linea in bloque.split("\n"))
+        self._f.write(("[\n" if self._primero else ",\n") + bloque)
+        self._f.flush()
+        self._primero = False
+
+    def cerrar(self):
+        self._f.write("[]" if self._primero else "\n]")
+        self._f.close()
+
+
+class SalidaCSV:
+    def __init__(self, ruta, schema=SCHEMA):
+        self.ruta = ruta
+        self.schema = schema
+        self._f = open(ruta, "w", encoding="utf-8-sig", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow([h for _, h in schema])
+
+    def escribir(self, datos):
+        self._w.writerow(fila_schema(datos, self.schema))
+        self._f.flush()
+
+    def cerrar(self):
+        self._f.close()
+
+
+class SalidaExcel:
+    """xlsxwriter en modo constant_memory: cada fila se escribe a disco al avanzar."""
+
+    def __init__(self, ruta, schema=SCHEMA):
+        import xlsxwriter
+
+        self.ruta = ruta
+        self.schema = schema
+        self._wb = xlsxwriter.Workbook(ruta, {"constant_memory": True})
+        self._ws = self._wb.add_worksheet("Expedientes")
+        # mismo estilo de encabezado que DataFrame.to_excel
+        encabezado = self._wb.add_format(
+            {"bold": True, "border": 1, "align": "center", "valign": "top"}
+        )
+        for c, (_, h) in enumerate(schema):
+            self._ws.write_string(0, c, h, encabezado)
+        self._fila = 1
+
+    def escribir(self, datos):
+        for c, v in enumerate(fila_schema(datos, self.schema)):
+            self._ws.write_string(self._fila, c, v)
+        self._fila += 1
+
+    def cerrar(self):
+        self._wb.close()
+
+
+class Salidas:
+    """Reparte cada registro a todas las salidas; thread-safe (los hilos de descarga escriben)."""
+
+    def __init__(self, salidas):
+        self.salidas = salidas
+        self.registros = 0
+        self._lock = threading.Lock()
+
+    def escribir(self, datos):
+        with self._lock:
+            for s in self.salidas:
+                s.escribir(datos)
+            self.registros += 1
+
+    def cerrar(self):
+        with self._lock:
+            for s in self.salidas:
+                s.cerrar()
+                print(f"-> Generado: {s.ruta}")
+
+
+def crear_salidas(
+    formatos=("xlsx", "json"), base="expedientes", tz="America/Mexico_City", schema=SCHEMA
+) -> Salidas:
+    """
+    Formatos: xlsx ({base}-{ts}.xlsx), json ({base}.json, como el respaldo de siempre),
+    jsonl ({base}-{ts}.jsonl) y csv ({base}-{ts}.csv). `schema` fija las columnas de xlsx/csv.
+    """
+    ts = _marca_tiempo(tz)
+    salidas = []
+    for formato in dict.fromkeys(formatos):
+        if formato == "xlsx":
+            try:
+                salidas.append(SalidaExcel(f"{base}-{ts}.xlsx", schema))
+            except ModuleNotFoundError:
+                print("-> Falta 'xlsxwriter', instálalo con: pip install xlsxwriter")
+                if "csv" not in formatos:
+                    salidas.append(SalidaCSV(f"{base}-{ts}.csv", schema))
+                    print("-> Se generará un CSV de respaldo")
+        elif formato == "json":
+            salidas.append(SalidaJSON(f"{base}.json"))
+        elif formato == "jsonl":
+            salidas.append(SalidaJSONL(f"{base}-{ts}.jsonl"))
+        elif formato == "csv":
+            salidas.append(SalidaCSV(f"{base}-{ts}.csv", schema))
+        else:
+            raise ValueError(f"Formato de salida desconocido: {formato!r}")
+    return Salidas(salidas)
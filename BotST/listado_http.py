@@ -0,0 +1,138 @@
+from urllib.parse import urlencode
+
+import lxml.html
+
+from config import (
+    URL_LISTADO,
+    PARAM_ESTADO,
+    PARAM_CANTIDAD,
+    PARAM_PAGINA,
+    MAX_PAGINAS_LISTADO,
+    ESTADO_FILTRO,
+)
+from utils import norm, url_absoluta, url_desde_atributos
+
+CANTIDAD_POR_PAGINA = 100
+COL_ESTADO = 6  # misma columna que SEL_COL_ESTADO
+
+
+class ListadoNoDisponible(RuntimeError):
+    """El listado por HTTP no devolvió filas utilizables; hay que usar Selenium."""
+
+
+# -------------------------------------------------------------------------
+# DESCARGA DE UNA PÁGINA DEL LISTADO
+# -------------------------------------------------------------------------
+def url_pagina_listado(estado: str, pagina: int, cantidad: int = CANTIDAD_POR_PAGINA) -> str:
+    query = urlencode({PARAM_ESTADO: estado, PARAM_CANTIDAD: cantidad, PARAM_PAGINA: pagina})
+    return f"{URL_LISTADO}?{query}"
+
+
+def descargar_pagina_listado(session, estado: str, pagina: int, cantidad: int = CANTIDAD_POR_PAGINA):
+    url = url_pagina_listado(estado, pagina, cantidad)
+    r = session.get(url, timeout=30)
+    # sin sesión el portal responde 401/403 o redirige al login
+    if r.status_code in (401, 403) or "/login" in r.url:
+        raise PermissionError(f"Sesión expirada o sin permisos al pedir {url}")
+    r.raise_for_status()
+    return r
+
+
+# -------------------------------------------------------------------------
+# PARSEO DE LA TABLA
+# -------------------------------------------------------------------------
+def urls_desde_html_listado(html: str, base_url: str, estado: str = None):
+    """
+    Extrae de table.tab-docs las URLs de expediente (mismo botón y mismos atributos
+    que _obtener_url_expediente_desde_fila; las relativas se resuelven contra el
+    dominio, como asegurar_url_absoluta). Con `estado`, separa las filas cuya
+    columna de estado no coincide. Devuelve (filas, urls, urls_otro_estado).
+    """
+    doc = lxml.html.fromstring(html)
+    filas = doc.xpath("//table[contains(concat(' ', normalize-space(@class), ' '), ' tab-docs ')]/tbody/tr")
+    estado_norm = norm(estado) if estado else None
+    urls, otro_estado = [], []
+
+    for fila in filas:
+        celdas = fila.xpath("./td")
+        if not celdas:
+            continue
+        descartada = estado_norm is not None and len(celdas) >= COL_ESTADO \
+            and norm(celdas[COL_ESTADO - 1].text_content()) != estado_norm
+
+        btn = None
+        for b in celdas[-1].xpath(".//button[contains(concat(' ', normalize-space(@class), ' '), ' btn-accion ')]"):
+            if b.xpath(".//i[contains(concat(' ', normalize-space(@class), ' '), ' fa-file-alt ')]"):
+                btn = b
+                break
+        url = url_desde_atributos(dict(btn.attrib)) if btn is not None else None
+        if descartada:
+            # la URL se conserva para saber si la página trae filas nuevas
+            if url:
+                otro_estado.append(url_absoluta(base_url, url))
+            continue
+        if not url:
+            print("   -> No se pudo derivar URL de una fila del listado")
+            continue
+        urls.append(url_absoluta(base_url, url))
+
+    return len(filas), urls, otro_estado
+
+
+# -------------------------------------------------------------------------
+# RECOLECCIÓN SIN NAVEGADOR
+# -------------------------------------------------------------------------
+def recolectar_urls_http(
+    gestor,
+    estado: str = ESTADO_FILTRO,
+    al_recolectar=None,
+    cantidad: int = CANTIDAD_POR_PAGINA,
+    max_paginas: int = MAX_PAGINAS_LISTADO,
+):
+    """
+    Igual que recolectar_urls_expedientes, pero pide las páginas del listado con
+    requests (filtro, tamaño y página en la query string) en lugar de paginar en
+    Chrome. Usa la session del `gestor`, así que si las cookies expiran se renuevan
+    una sola vez. `al_recolectar(urls_nuevas)` se llama al terminar cada página.
+    Termina cuando una página no trae filas o ninguna de sus filas es nueva (el portal
+    repite la última página si se pide una posterior). Las filas de otro estado cuentan
+    para decidir si la página es nueva: si el portal ignora el filtro, se siguen pidiendo
+    páginas aunque alguna no traiga ninguna fila del estado pedido.
+    Lanza ListadoNoDisponible si la primera página no trae ninguna fila con URL.
+    """
+    urls, vistos = [], set()
+    aviso_filtro = False
+    for pagina in range(1, max_paginas + 1):
+        s, generacion = gestor.actual()
+        try:
+            r = descargar_pagina_listado(s, estado, pagina, cantidad)
+        except PermissionError:
+            r = descargar_pagina_listado(gestor.renovar(generacion), estado, pagina, cantidad)
+
+        total, urls_pagina, otro_estado = urls_desde_html_listado(r.text, r.url, estado)
+        print(f"\n== Página {pagina} (HTTP): {total} filas ==")
+        if otro_estado:
+            if not aviso_filtro:
+                print(f"   -> AVISO: el portal ignoró el filtro de estado '{estado}'; "
+                      "se filtra aquí y se siguen pidiendo páginas")
+                aviso_filtro = True
+            print(f"   -> {len(otro_estado)} filas con otro estado descartadas")
+
+        # el fin del listado se decide con todas las filas, antes del filtro de estado
+        filas_nuevas = {u for u in urls_pagina + otro_estado if u not in vistos}
+        if pagina == 1 and not filas_nuevas:
+            raise ListadoNoDisponible(
+                f"La primera página del listado por HTTP no trae expedientes ({total} filas)"
+            )
+        if total == 0 or not filas_nuevas:
+            break
+        vistos.update(filas_nuevas)
+
+        nuevas = [u for u in urls_pagina if u in filas_nuevas]
+        if not nuevas:
+            continue
+        urls.extend(nuevas)
+        if al_recolectar is not None:
+            al_recolectar(nuevas)
+
+    return urls
@@ -1,63 +1,383 @@
-import json
+import argparse
+import os
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-
-from config import SEL_FILAS_TABLA, MAX_WORKERS
-from selenium_flow import (
-    esperar_login_e_ir_a_seguimiento,
-    seleccionar_filtro_por_estado,
-    recolectar_urls_expedientes,
+from config import (
+    SEL_FILAS_TABLA, MAX_WORKERS, MAX_EN_VUELO, RUTA_CACHE, RUTA_BITACORA, RUTA_METRICAS,
+    RUTA_ALMACEN, ESTADOS_FILTRO,
 )
 from expedientes_service import (
-    construir_session_desde_driver,
     procesar_urls_concurrente,
+    procesar_urls_en_pipeline,
+    procesar_urls_hibrido,
+    crear_gestor_sesion,
+    ControladorConcurrencia,
+    EstadisticasStreaming,
+    extraer_expediente_de_bytes,
 )
-from export_utils import exportar_excel
+from cache_expedientes import CacheExpedientes
+from almacen_expedientes import AlmacenExpedientes, imprimir_cambios
+from metricas import Metricas
+from bitacora import Bitacora, cargar_bitacora, resumen_bitacora
+from listado_http import recolectar_urls_http, ListadoNoDisponible
+from export_utils import crear_salidas, FORMATOS_SALIDA, SCHEMA_CAMBIOS
 
 
-def main():
-    options = webdriver.ChromeOptions()
-    options.page_load_strategy = "eager"
-    options.add_argument("--start-maximized")
+def parse_args():
+    ap = argparse.ArgumentParser(description="Bot de extracción de expedientes")
+    ap.add_argument(
+        "--motor",
+        choices=["hilos", "async"],
+        default="hilos",
+        help="hilos: ThreadPoolExecutor + requests; async: asyncio + aiohttp (requiere aiohttp)",
+    )
+    ap.add_argument(
+        "--en-vuelo",
+        type=int,
+        default=MAX_EN_VUELO,
+        help="Peticiones simultáneas con --motor async",
+    )
+    ap.add_argument(
+        "--adaptativo",
+        action="store_true",
+        help="Con --motor hilos: ajusta las peticiones en vuelo (AIMD) según latencia y 429/503",
+    )
+    ap.add_argument(
+        "--secuencial",
+        action="store_true",
+        help="Con --motor hilos: recolectar todas las URLs antes de descargar (sin pipeline)",
+    )
+    ap.add_argument(
+        "--procesos",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Con --motor hilos: los hilos solo descargan y N procesos parsean los expedientes "
+             "(no se combina con --streaming ni --cache)",
+    )
+    ap.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Con --motor hilos: leer cada expediente por bloques y descartar sin parsear los que no tienen cita",
+    )
+    ap.add_argument(
+        "--cache",
+        nargs="?",
+        const=RUTA_CACHE,
+        default=None,
+        metavar="RUTA",
+        help="Con --motor hilos: caché SQLite de expedientes con peticiones condicionales "
+             f"(ETag/Last-Modified); por defecto {RUTA_CACHE}",
+    )
+    ap.add_argument(
+        "--offline",
+        action="store_true",
+        help="Sin navegador ni red: vuelve a extraer los expedientes guardados en la caché y exporta",
+    )
+    ap.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retomar una ejecución interrumpida: solo se descargan las URLs que no están en la bitácora",
+    )
+    ap.add_argument(
+        "--bitacora",
+        default=RUTA_BITACORA,
+        metavar="RUTA",
+        help=f"Bitácora JSONL de URLs procesadas (por defecto {RUTA_BITACORA})",
+    )
+    ap.add_argument(
+        "--salidas",
+        nargs="+",
+        choices=FORMATOS_SALIDA,
+        default=["xlsx", "json"],
+        help="Archivos de salida; cada expediente se escribe en cuanto termina su descarga "
+             "(por defecto: xlsx json)",
+    )
+    ap.add_argument(
+        "--metricas",
+        nargs="?",
+        const=RUTA_METRICAS,
+        default=None,
+        metavar="BASE",
+        help="Con --motor hilos: medir cada petición (fases, bytes, reintentos), mostrar el avance "
+             f"y escribir BASE.json y BASE.prom al final; por defecto {RUTA_METRICAS}",
+    )
+    ap.add_argument(
+        "--almacen",
+        nargs="?",
+        const=RUTA_ALMACEN,
+        default=None,
+        metavar="RUTA",
+        help="Guardar los expedientes en un almacén SQLite por número de cuenta y reportar los "
+             f"nuevos, cambiados y eliminados desde la ejecución anterior; por defecto {RUTA_ALMACEN}",
+    )
+    ap.add_argument(
+        "--solo-cambios",
+        action="store_true",
+        help="Con --almacen (si no se da, usa el de por defecto): las salidas (expedientes-cambios-*) "
+             "solo llevan los expedientes nuevos, cambiados y eliminados, con la columna Cambio",
+    )
+    ap.add_argument(
+        "--estados",
+        nargs="+",
+        default=ESTADOS_FILTRO,
+        metavar="ESTADO",
+        help="Estados (est_avance) a recolectar uno tras otro en la misma sesión; "
+             f"por defecto: {', '.join(ESTADOS_FILTRO)}",
+    )
+    ap.add_argument(
+        "--actualizar-driver",
+        action="store_true",
+        help="Resolver de nuevo chromedriver con webdriver_manager (normalmente se usa la ruta "
+             "guardada en la primera ejecución, o la de la variable de entorno CHROMEDRIVER)",
+    )
+    ap.add_argument(
+        "--listado-http",
+        action="store_true",
+        help="Recolectar las URLs pidiendo las páginas del listado con requests en lugar de "
+             "paginar en Chrome (si no funciona, se usa Selenium)",
+    )
+    return ap.parse_args()
+
 
-    driver = webdriver.Chrome(
-        service=ChromeService(ChromeDriverManager().install()),
-        options=options,
+def recolectar_urls_estado(driver, gestor, estado, listado_http=False, al_recolectar=None, recargar=False):
+    """
+    Fase A para un estado. Con `listado_http` intenta el listado por HTTP; si la primera
+    página no trae expedientes, aplica el filtro en el navegador y pagina con Selenium.
+    Con `recargar`, antes se vuelve al listado sin filtro (el navegador ya se usó con
+    otro estado y puede estar en otra página).
+    """
+    if listado_http:
+        try:
+            return recolectar_urls_http(gestor, estado=estado, al_recolectar=al_recolectar)
+        except ListadoNoDisponible as e:
+            print(f"-> {e}; se usa la paginación en el navegador")
+
+    from selenium_flow import seleccionar_filtro_por_estado, recolectar_urls_expedientes, volver_al_listado
+
+    with gestor.lock_driver:
+        if recargar:
+            volver_al_listado(driver)
+        seleccionar_filtro_por_estado(driver, estado)
+        print(f"-> Filas visibles: {len(driver.find_elements(*SEL_FILAS_TABLA))}")
+    return recolectar_urls_expedientes(
+        driver, al_recolectar=al_recolectar, lock_driver=gestor.lock_driver, estado=estado
     )
 
+
+def recolectar_urls(
+    driver, gestor, listado_http=False, al_recolectar=None, estados=ESTADOS_FILTRO, estado_de=None
+):
+    """
+    Fase A para cada estado de `estados`, uno tras otro en la misma sesión. Las URLs
+    se deduplican entre estados (se queda el primero en el que aparecen) y
+    `al_recolectar(urls_nuevas)` recibe las de todos los estados, así alimentan un
+    mismo pool de descarga. Devuelve {url: estado} en orden de recolección (`estado_de`
+    si se pasa; cada URL se anota antes de pasarla a `al_recolectar`, así los hilos de
+    descarga ya pueden consultarla).
+    """
+    estado_de = {} if estado_de is None else estado_de
+    for i, estado in enumerate(estados, start=1):
+        print(f"\n-> Estado {i}/{len(estados)}: {estado}")
+        repetidas = 0
+
+        def registrar(urls):
+            nonlocal repetidas
+            nuevas = [u for u in urls if u not in estado_de]
+            repetidas += len(urls) - len(nuevas)
+            for u in nuevas:
+                estado_de[u] = estado
+            if al_recolectar is not None:
+                al_recolectar(nuevas)
+
+        recolectar_urls_estado(
+            driver, gestor, estado, listado_http, al_recolectar=registrar, recargar=i > 1
+        )
+        total = sum(1 for e in estado_de.values() if e == estado)
+        print(f"-> {estado}: {total} URLs" + (f" ({repetidas} ya vistas en otro estado)" if repetidas else ""))
+    return estado_de
+
+
+def main_offline(args):
+    ruta = args.cache or RUTA_CACHE
+    if not os.path.exists(ruta):
+        print(f"-> No existe la caché {ruta}; ejecuta antes el bot con --cache")
+        return
+    cache = CacheExpedientes(ruta)
+    try:
+        resultados, omitidos = cache.reparsear(extraer_expediente_de_bytes)
+    finally:
+        cache.cerrar()
+    print(f"\n-> Expedientes guardados: {len(resultados)} | Omitidos (sin cita): {omitidos}")
+
+    salidas = crear_salidas(args.salidas)
+    for datos in resultados:
+        salidas.escribir(datos)
+    salidas.cerrar()
+
+
+def main():
+    args = parse_args()
+    if args.offline:
+        return main_offline(args)
+
+    # selenium y webdriver_manager se cargan aquí: --offline y --help no los necesitan
+    from navegador import abrir_chrome
+    from selenium_flow import esperar_login_e_ir_a_seguimiento
+
+    driver = abrir_chrome(args.actualizar_driver)
+
+    salidas, almacen, cache, bitacora = None, None, None, None
     try:
         # LOGIN + IR A SEGUIMIENTO
         esperar_login_e_ir_a_seguimiento(driver)
 
-        # APLICAR FILTRO
-        seleccionar_filtro_por_estado(driver)
-        print(f"-> Filas visibles: {len(driver.find_elements(*SEL_FILAS_TABLA))}")
+        # session compartida por la recolección (--listado-http) y la descarga
+        metricas = Metricas() if args.metricas and args.motor == "hilos" else None
+        gestor = crear_gestor_sesion(driver, adaptativo=args.adaptativo, medir=metricas is not None)
+        streaming = EstadisticasStreaming() if args.streaming else None
+        cache = CacheExpedientes(args.cache) if args.cache and args.motor == "hilos" else None
+        if args.procesos and (streaming is not None or cache is not None):
+            # el descarte sin parsear ya lo hace el hilo de descarga; la caché parsea en el hilo
+            print("-> Con --procesos no se usan --streaming ni --cache")
+            streaming = None
+            if cache is not None:
+                cache.cerrar()
+                cache = None
 
-        # FASE A: recolectar todas las URLs
-        urls = recolectar_urls_expedientes(driver)
-        print(f"-> Total URLs recolectadas: {len(urls)}")
+        # BITÁCORA: con --resume se omiten las URLs ya procesadas (las que fallaron se reintentan)
+        hechas, previos, omitidos_previos = set(), [], 0
+        if args.resume:
+            hechas, previos, omitidos_previos = resumen_bitacora(cargar_bitacora(args.bitacora))
+            print(f"-> Retomando: {len(hechas)} URLs ya procesadas en {args.bitacora}")
+        bitacora = Bitacora(args.bitacora, continuar=args.resume)
 
-        # Construir session HTTP a partir del driver
-        session = construir_session_desde_driver(driver)
+        # ALMACÉN: compara cada expediente con la ejecución anterior (con --resume
+        # continúa la ejecución interrumpida)
+        if args.solo_cambios and not args.almacen:
+            args.almacen = RUTA_ALMACEN
+        if args.almacen:
+            almacen = AlmacenExpedientes(args.almacen)
+            ejecucion = almacen.iniciar_ejecucion(args.estados, continuar=args.resume)
+            print(f"-> Almacén {args.almacen}: ejecución #{ejecucion}")
 
-        # FASE B: procesar en paralelo
-        resultados, omitidos = procesar_urls_concurrente(
-            driver, session, urls, max_workers=MAX_WORKERS
-        )
-        print(
-            f"\n-> Expedientes guardados: {len(resultados)} | Omitidos (sin cita): {omitidos}"
-        )
+        # SALIDAS: cada expediente se escribe en cuanto termina (memoria constante)
+        if args.solo_cambios:
+            salidas = crear_salidas(args.salidas, base="expedientes-cambios", schema=SCHEMA_CAMBIOS)
+        else:
+            salidas = crear_salidas(args.salidas)
+
+        def guardar(u, datos, error=None):
+            cambio = almacen.registrar(u, datos, error) if almacen is not None else None
+            if not datos:
+                return
+            if args.solo_cambios:
+                if cambio == "igual":
+                    return
+                datos = {**datos, "cambio": cambio}
+            salidas.escribir(datos)
+
+        for datos in previos:
+            guardar(None, datos)
+
+        # url -> estado (--estados) en el que se recolectó; se llena durante la fase A
+        estado_de = {}
+
+        def al_completar(u, datos, error):
+            if datos:
+                datos["estado"] = estado_de.get(u, "")
+            bitacora.registrar(u, datos, error)
+            guardar(u, datos, error)
 
-        # EXPORTAR
-        exportar_excel(resultados, base="expedientes")
+        if args.motor == "async":
+            from expedientes_async import procesar_urls_async
 
-        # RESPALDO JSON
-        with open("expedientes.json", "w", encoding="utf-8") as f:
-            json.dump(resultados, f, ensure_ascii=False, indent=4)
-        print("\n-> Datos guardados en expedientes.json")
+            # FASE A: recolectar todas las URLs
+            recolectar_urls(driver, gestor, args.listado_http, estados=args.estados, estado_de=estado_de)
+            urls = list(estado_de)
+            print(f"-> Total URLs recolectadas: {len(urls)}")
+            urls = [u for u in urls if u not in hechas]
+
+            # FASE B: procesar con asyncio
+            _, omitidos = procesar_urls_async(
+                driver, urls, max_en_vuelo=args.en_vuelo,
+                al_completar=al_completar, acumular=False,
+            )
+        elif args.secuencial:
+            # FASE A: recolectar todas las URLs
+            recolectar_urls(driver, gestor, args.listado_http, estados=args.estados, estado_de=estado_de)
+            urls = list(estado_de)
+            print(f"-> Total URLs recolectadas: {len(urls)}")
+            urls = [u for u in urls if u not in hechas]
+
+            # FASE B: procesar en paralelo
+            controlador = ControladorConcurrencia() if args.adaptativo else None
+            if args.procesos:
+                _, omitidos, _ = procesar_urls_hibrido(
+                    gestor, lambda encolar: [encolar(u) for u in urls], max_workers=MAX_WORKERS,
+                    procesos=args.procesos, controlador=controlador,
+                    al_completar=al_completar, acumular=False, metricas=metricas,
+                )
+            else:
+                _, omitidos = procesar_urls_concurrente(
+                    driver, gestor.actual()[0], urls, max_workers=MAX_WORKERS,
+                    controlador=controlador, gestor=gestor, streaming=streaming,
+                    cache=cache, al_completar=al_completar, acumular=False, metricas=metricas,
+                )
+        else:
+            # FASES A+B EN PIPELINE: cada página recolectada se descarga mientras
+            # el navegador avanza a la siguiente
+            controlador = ControladorConcurrencia() if args.adaptativo else None
+
+            def producir(encolar):
+                recolectar_urls(
+                    driver,
+                    gestor,
+                    args.listado_http,
+                    al_recolectar=lambda nuevas: [encolar(u) for u in nuevas if u not in hechas],
+                    estados=args.estados,
+                    estado_de=estado_de,
+                )
+
+            if args.procesos:
+                _, omitidos, total_urls = procesar_urls_hibrido(
+                    gestor, producir, max_workers=MAX_WORKERS, procesos=args.procesos,
+                    controlador=controlador, al_completar=al_completar, acumular=False,
+                    metricas=metricas,
+                )
+            else:
+                _, omitidos, total_urls = procesar_urls_en_pipeline(
+                    gestor, producir, max_workers=MAX_WORKERS, controlador=controlador,
+                    streaming=streaming, cache=cache, al_completar=al_completar, acumular=False,
+                    metricas=metricas,
+                )
+            print(f"-> URLs procesadas en esta ejecución: {total_urls}")
+        omitidos += omitidos_previos
+        if almacen is not None:
+            cambios = almacen.cerrar_ejecucion()
+            imprimir_cambios(cambios, ejecucion)
+            if args.solo_cambios:
+                for datos in cambios["eliminados"]:
+                    salidas.escribir({**datos, "cambio": "eliminado"})
+        print(
+            f"\n-> {'Cambios exportados' if args.solo_cambios else 'Expedientes guardados'}: "
+            f"{salidas.registros} | Omitidos (sin cita): {omitidos}"
+        )
+        if streaming is not None and args.motor == "hilos":
+            print(f"-> {streaming.resumen()}")
+        if cache is not None:
+            print(f"-> {cache.resumen()}")
+        if metricas is not None:
+            metricas.guardar(f"{args.metricas}.json", f"{args.metricas}.prom")
     finally:
+        # también si la ejecución se interrumpe: lo escrito hasta ahí queda utilizable
+        if salidas is not None:
+            salidas.cerrar()
+        if almacen is not None:
+            almacen.cerrar()
+        if cache is not None:
+            cache.cerrar()
+        if bitacora is not None:
+            bitacora.cerrar()
         try:
             driver.quit()
         except Exception:
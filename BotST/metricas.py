@@ -0,0 +1,393 @@
+"""
+Métricas por petición de la fase B (motor con hilos).
+
+Cada expediente se mide por fases: espera en la cola, conexión (TCP/TLS, 0 si se
+reutilizó una conexión del pool), primer byte, descarga del cuerpo y parseo; además
+bytes recibidos, reintentos del Retry de urllib3, renovaciones de sesión y el
+resultado (ok, sin_cita, error, permiso). Todo se agrega en histogramas de cubetas
+fijas (memoria constante) y al final se escribe un resumen JSON y un archivo de texto
+para el textfile collector de Prometheus (node_exporter).
+
+La medición en curso vive en un threading.local: cada hilo de descarga atiende una
+URL a la vez, y el HTTPAdapter y las conexiones de urllib3 corren en ese mismo hilo.
+"""
+import json
+import os
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# la cubeta 0 separa las fases que no ocurrieron (p. ej. conexión reutilizada)
+LIMITES_SEGUNDOS = (0, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LIMITES_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+FASES = ("espera_cola", "conexion", "primer_byte", "descarga", "parseo", "total")
+RESULTADOS = ("ok", "sin_cita", "error", "permiso")
+
+_hilo = threading.local()
+
+
+def medicion_actual():
+    return getattr(_hilo, "medicion", None)
+
+
+# -------------------------------------------------------------------------
+# HISTOGRAMA
+# -------------------------------------------------------------------------
+class Histograma:
+    """Cubetas fijas (no acumuladas); el percentil se interpola dentro de la cubeta."""
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.cubetas = [0] * (len(self.limites) + 1)   # la última es +Inf
+        self.cuenta = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        i = 0
+        while i < len(self.limites) and valor > self.limites[i]:
+            i += 1
+        self.cubetas[i] += 1
+        self.cuenta += 1
+        self.suma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def percentil(self, p: float) -> float:
+        if not self.cuenta:
+            return 0.0
+        objetivo = p / 100 * self.cuenta
+        acumulado = 0
+        for i, n in enumerate(self.cubetas):
+            if n and acumulado + n >= objetivo:
+                inferior = self.limites[i - 1] if i > 0 else 0.0
+                superior = self.limites[i] if i < len(self.limites) else self.maximo
+                return min(inferior + (superior - inferior) * (objetivo - acumulado) / n, self.maximo)
+            acumulado += n
+        return self.maximo
+
+    def acumuladas(self):
+        """[(le, cuenta acumulada)] al estilo Prometheus, terminando en +Inf."""
+        salida, acumulado = [], 0
+        for i, n in enumerate(self.cubetas):
+            acumulado += n
+            salida.append((self.limites[i] if i < len(self.limites) else "+Inf", acumulado))
+        return salida
+
+    def resumen(self) -> dict:
+        return {
+            "cuenta": self.cuenta,
+            "suma": round(self.suma, 6),
+            "media": round(self.suma / self.cuenta, 6) if self.cuenta else 0.0,
+            "p50": round(self.percentil(50), 6),
+            "p95": round(self.percentil(95), 6),
+            "p99": round(self.percentil(99), 6),
+            "max": round(self.maximo, 6),
+        }
+
+
+# -------------------------------------------------------------------------
+# MEDICIÓN DE UNA URL
+# -------------------------------------------------------------------------
+class Medicion:
+    __slots__ = (
+        "inicio", "espera_cola", "conexion", "primer_byte", "descarga", "parseo",
+        "t_encabezados", "respuestas", "status", "reintentos", "renovo_sesion",
+    )
+
+    def __init__(self, encolado=None):
+        self.inicio = time.perf_counter()
+        self.espera_cola = self.inicio - encolado if encolado is not None else 0.0
+        self.conexion = self.primer_byte = self.descarga = self.parseo = 0.0
+        self.t_encabezados = None
+        self.respuestas = []      # urllib3 HTTPResponse de cada intento (para contar bytes)
+        self.status = []          # códigos recibidos, incluidos los que reintentó urllib3
+        self.reintentos = 0
+        self.renovo_sesion = False
+
+    def bytes_recibidos(self) -> int:
+        total = 0
+        for raw in self.respuestas:
+            try:
+                total += raw.tell()
+            except Exception:
+                pass
+        return total
+
+
+# -------------------------------------------------------------------------
+# ADAPTER Y CONEXIONES MEDIDAS
+# -------------------------------------------------------------------------
+class _ConexionHTTPMedida(HTTPConnection):
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            m = medicion_actual()
+            if m is not None:
+                m.conexion += time.perf_counter() - t0
+
+
+class _ConexionHTTPSMedida(HTTPSConnection):
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            m = medicion_actual()
+            if m is not None:
+                m.conexion += time.perf_counter() - t0
+
+
+class _PoolHTTPMedido(HTTPConnectionPool):
+    ConnectionCls = _ConexionHTTPMedida
+
+
+class _PoolHTTPSMedido(HTTPSConnectionPool):
+    ConnectionCls = _ConexionHTTPSMedida
+
+
+class AdapterMedido(HTTPAdapter):
+    """
+    HTTPAdapter que anota en la medición del hilo el tiempo de conexión, el de primer
+    byte (hasta tener los encabezados, reintentos de urllib3 incluidos), los códigos
+    recibidos y los reintentos (r.raw.retries.history).
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _PoolHTTPMedido, "https": _PoolHTTPSMedido}
+
+    def send(self, request, **kwargs):
+        m = medicion_actual()
+        if m is None:
+            return super().send(request, **kwargs)
+        t0 = time.perf_counter()
+        conexion_previa = m.conexion
+        r = super().send(request, **kwargs)
+        m.t_encabezados = time.perf_counter()
+        m.primer_byte += (m.t_encabezados - t0) - (m.conexion - conexion_previa)
+
+        historial = getattr(getattr(r.raw, "retries", None), "history", None) or ()
+        m.reintentos += len(historial)
+        m.status.extend(h.status for h in historial if h.status is not None)
+        m.status.append(r.status_code)
+        m.respuestas.append(r.raw)
+        return r
+
+
+# -------------------------------------------------------------------------
+# AGREGADO
+# -------------------------------------------------------------------------
+class Metricas:
+    """
+    Agregado thread-safe de las mediciones. Uso:
+        metricas.comenzar(total, cada)   # al empezar la fase B (reloj y avance)
+        m = metricas.iniciar(encolado)   # en el hilo que atiende cada URL
+        ... petición / parseo ...
+        metricas.terminar(m, "ok")
+        metricas.finalizar(gestor.renovaciones)
+    """
+
+    def __init__(self, total: int = None):
+        self._lock = threading.Lock()
+        self.fases = {f: Histograma(LIMITES_SEGUNDOS) for f in FASES}
+        self.bytes = Histograma(LIMITES_BYTES)
+        self.resultados = dict.fromkeys(RESULTADOS, 0)
+        self.status = {}
+        self.reintentos = 0
+        self.reintentos_por_sesion = 0   # URLs que se repitieron tras 401/403
+        self.renovaciones_sesion = 0     # renovaciones de cookies (GestorSesion)
+        self.total = total               # None: se desconoce (pipeline)
+        self.encoladas = 0
+        self._t0 = time.perf_counter()
+        self._progreso = None
+
+    # ---------- por URL ----------
+    def iniciar(self, encolado=None) -> Medicion:
+        m = Medicion(encolado)
+        _hilo.medicion = m
+        return m
+
+    def desligar(self) -> Medicion:
+        """Suelta la medición del hilo actual para terminarla en otro (parseo en procesos)."""
+        m = medicion_actual()
+        _hilo.medicion = None
+        return m
+
+    def marcar_descarga(self):
+        """Llamar cuando el cuerpo ya se leyó (sin streaming, al volver session.get)."""
+        m = medicion_actual()
+        if m is not None and m.t_encabezados is not None:
+            m.descarga += time.perf_counter() - m.t_encabezados
+
+    def medir_parseo(self, fn, *args):
+        m = medicion_actual()
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            if m is not None:
+                m.parseo += time.perf_counter() - t0
+
+    def terminar(self, m: Medicion, resultado: str):
+        if medicion_actual() is m:
+            _hilo.medicion = None
+        total = time.perf_counter() - m.inicio
+        n_bytes = m.bytes_recibidos()
+        with self._lock:
+            for fase in FASES:
+                self.fases[fase].observar(total if fase == "total" else getattr(m, fase))
+            self.bytes.observar(n_bytes)
+            self.resultados[resultado] += 1
+            for s in m.status:
+                self.status[s] = self.status.get(s, 0) + 1
+            self.reintentos += m.reintentos
+            self.reintentos_por_sesion += m.renovo_sesion
+
+    # ---------- ciclo de la fase B ----------
+    def comenzar(self, total: int = None, progreso_cada: float = 0):
+        """Reinicia el reloj (la fase A no cuenta) y arranca las líneas de avance."""
+        self._t0 = time.perf_counter()
+        self.total = total
+        self.iniciar_progreso(progreso_cada)
+
+    def finalizar(self, renovaciones_sesion: int = 0):
+        self.detener_progreso()
+        self.renovaciones_sesion = renovaciones_sesion
+
+    # ---------- progreso ----------
+    def completadas(self) -> int:
+        return sum(self.resultados.values())
+
+    def linea_progreso(self) -> str:
+        with self._lock:
+            hechas = self.completadas()
+            errores = self.resultados["error"] + self.resultados["permiso"]
+            sin_cita = self.resultados["sin_cita"]
+        segundos = time.perf_counter() - self._t0
+        tasa = hechas / segundos if segundos > 0 else 0.0
+        if self.total is not None:
+            total, etiqueta = self.total, ""
+        else:
+            total, etiqueta = self.encoladas, " recolectadas"
+        pct = f" ({hechas / total * 100:.1f}%)" if total else ""
+        pendientes = max(total - hechas, 0)
+        eta = _duracion(pendientes / tasa) if tasa > 0 else "--:--"
+        return (
+            f"-> [{segundos:7.1f}s] {hechas}/{total}{etiqueta}{pct} | {tasa:.1f} URLs/s | "
+            f"ETA {eta} | sin cita {sin_cita} | errores {errores}"
+        )
+
+    def iniciar_progreso(self, cada: float):
+        """Imprime linea_progreso() cada `cada` segundos en un hilo aparte."""
+        if cada <= 0 or self._progreso is not None:
+            return
+        parar = threading.Event()
+
+        def bucle():
+            while not parar.wait(cada):
+                print(self.linea_progreso())
+
+        hilo = threading.Thread(target=bucle, daemon=True)
+        self._progreso = (parar, hilo)
+        hilo.start()
+
+    def detener_progreso(self):
+        if self._progreso is not None:
+            parar, hilo = self._progreso
+            parar.set()
+            hilo.join()
+            self._progreso = None
+
+    # ---------- salida ----------
+    def resumen(self) -> dict:
+        with self._lock:
+            segundos = time.perf_counter() - self._t0
+            hechas = self.completadas()
+            return {
+                "duracion_segundos": round(segundos, 3),
+                "urls": hechas,
+                "urls_por_segundo": round(hechas / segundos, 3) if segundos > 0 else 0.0,
+                "resultados": dict(self.resultados),
+                "status_http": {str(k): v for k, v in sorted(self.status.items())},
+                "reintentos_urllib3": self.reintentos,
+                "renovaciones_sesion": self.renovaciones_sesion,
+                "urls_repetidas_por_sesion": self.reintentos_por_sesion,
+                "bytes": {"total": int(self.bytes.suma), **self.bytes.resumen()},
+                "fases_segundos": {f: h.resumen() for f, h in self.fases.items()},
+            }
+
+    def prometheus(self) -> str:
+        with self._lock:
+            lineas = [
+                "# HELP botst_fase_segundos Duración por fase de cada expediente (fase B).",
+                "# TYPE botst_fase_segundos histogram",
+            ]
+            for fase, h in self.fases.items():
+                lineas += _lineas_histograma("botst_fase_segundos", h, f'fase="{fase}"')
+            lineas += [
+                "# HELP botst_respuesta_bytes Bytes recibidos por expediente.",
+                "# TYPE botst_respuesta_bytes histogram",
+            ]
+            lineas += _lineas_histograma("botst_respuesta_bytes", self.bytes, "")
+            lineas += [
+                "# HELP botst_expedientes_total Expedientes procesados por resultado.",
+                "# TYPE botst_expedientes_total counter",
+            ]
+            lineas += [f'botst_expedientes_total{{resultado="{r}"}} {n}' for r, n in self.resultados.items()]
+            lineas += [
+                "# HELP botst_respuestas_http_total Respuestas HTTP recibidas por código.",
+                "# TYPE botst_respuestas_http_total counter",
+            ]
+            lineas += [f'botst_respuestas_http_total{{codigo="{s}"}} {n}' for s, n in sorted(self.status.items())]
+            lineas += [
+                "# HELP botst_reintentos_total Reintentos hechos por el Retry de urllib3.",
+                "# TYPE botst_reintentos_total counter",
+                f"botst_reintentos_total {self.reintentos}",
+                "# HELP botst_renovaciones_sesion_total Renovaciones de cookies desde el navegador.",
+                "# TYPE botst_renovaciones_sesion_total counter",
+                f"botst_renovaciones_sesion_total {self.renovaciones_sesion}",
+                "# HELP botst_duracion_segundos Duración de la fase B.",
+                "# TYPE botst_duracion_segundos gauge",
+                f"botst_duracion_segundos {time.perf_counter() - self._t0:.3f}",
+                "# HELP botst_ultima_ejecucion_timestamp_seconds Fin de la última ejecución.",
+                "# TYPE botst_ultima_ejecucion_timestamp_seconds gauge",
+                f"botst_ultima_ejecucion_timestamp_seconds {time.time():.0f}",
+            ]
+        return "\n".join(lineas) + "\n"
+
+    def guardar(self, ruta_json: str = None, ruta_prom: str = None):
+        if ruta_json:
+            _escribir_atomico(ruta_json, json.dumps(self.resumen(), ensure_ascii=False, indent=4))
+            print(f"-> Métricas: {ruta_json}")
+        if ruta_prom:
+            _escribir_atomico(ruta_prom, self.prometheus())
+            print(f"-> Métricas Prometheus: {ruta_prom}")
+
+
+def _lineas_histograma(nombre, h: Histograma, etiquetas: str):
+    sep = "," if etiquetas else ""
+    lineas = [f'{nombre}_bucket{{{etiquetas}{sep}le="{le}"}} {n}' for le, n in h.acumuladas()]
+    llaves = f"{{{etiquetas}}}" if etiquetas else ""
+    lineas.append(f"{nombre}_sum{llaves} {h.suma:.6f}")
+    lineas.append(f"{nombre}_count{llaves} {h.cuenta}")
+    return lineas
+
+
+def _escribir_atomico(ruta, texto):
+    # el textfile collector no debe leer un archivo a medio escribir
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(tmp, ruta)
+
+
+def _duracion(segundos: float) -> str:
+    segundos = int(segundos)
+    h, resto = divmod(segundos, 3600)
+    m, s = divmod(resto, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
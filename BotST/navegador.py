@@ -0,0 +1,55 @@
+"""
+Apertura de Chrome sin resolver chromedriver en cada arranque.
+
+ChromeDriverManager().install() revisa la versión de Chrome y consulta los drivers
+publicados cada vez que se llama. Aquí la ruta se resuelve una sola vez:
+1. con la variable de entorno CHROMEDRIVER se usa esa ruta fija (nunca se resuelve);
+2. si no, la ruta guardada en RUTA_CHROMEDRIVER_GUARDADO, mientras el archivo exista;
+3. si no hay ruta guardada (o con --actualizar-driver) se resuelve con webdriver_manager
+   y se guarda para las siguientes ejecuciones.
+Si Chrome se actualizó y el driver guardado ya no le sirve, se resuelve de nuevo una vez.
+
+selenium y webdriver_manager se importan aquí dentro, no al cargar main.py
+(--offline y --help no los necesitan).
+"""
+import os
+from pathlib import Path
+
+from config import CHROMEDRIVER_FIJO, RUTA_CHROMEDRIVER_GUARDADO
+
+
+def ruta_chromedriver(actualizar: bool = False) -> str:
+    if CHROMEDRIVER_FIJO:
+        return CHROMEDRIVER_FIJO
+
+    guardado = Path(RUTA_CHROMEDRIVER_GUARDADO)
+    if not actualizar and guardado.is_file():
+        ruta = guardado.read_text(encoding="utf-8").strip()
+        if ruta and os.path.isfile(ruta):
+            return ruta
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    ruta = ChromeDriverManager().install()
+    guardado.write_text(ruta, encoding="utf-8")
+    print(f"-> chromedriver: {ruta} (ruta guardada en {guardado})")
+    return ruta
+
+
+def abrir_chrome(actualizar_driver: bool = False):
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.service import Service as ChromeService
+
+    options = webdriver.ChromeOptions()
+    options.page_load_strategy = "eager"
+    options.add_argument("--start-maximized")
+
+    try:
+        return webdriver.Chrome(service=ChromeService(ruta_chromedriver(actualizar_driver)), options=options)
+    except SessionNotCreatedException:
+        # p. ej. Chrome se actualizó y el driver guardado es de la versión anterior
+        if CHROMEDRIVER_FIJO or actualizar_driver:
+            raise
+        print("-> El chromedriver guardado no funciona con este Chrome; se resuelve de nuevo")
+        return webdriver.Chrome(service=ChromeService(ruta_chromedriver(actualizar=True)), options=options)
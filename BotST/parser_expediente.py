@@ -0,0 +1,156 @@
+from lxml import etree
+
+# Texto dentro de estas etiquetas no cuenta para get_text() en BeautifulSoup
+# (Script, Stylesheet, TemplateString, RubyText…); aquí se replica ese criterio.
+CONTENEDORES = {"script", "style", "template", "rt", "rp"}
+
+CLASE_CITA = "bg-emerald-50"
+TEXTO_CITA = "Cita programada"
+CITA_SIN_DETALLE = "Cita programada (detalle no localizado)"
+
+
+def _norm(s):
+    return " ".join((s or "").split())
+
+
+class RecolectorExpediente:
+    """
+    Target para lxml.etree.HTMLParser: recorre el documento una sola vez y resuelve
+    a la vez todas las etiquetas (div cuyo texto es la etiqueta -> texto de su siguiente
+    hermano) y la cita programada, con el mismo resultado que bs4_obtener_valor y
+    bs4_obtener_cita_programada sobre BeautifulSoup(html, "lxml"), que usa este mismo
+    parser de eventos.
+
+    El texto se guarda una sola vez como lista de piezas; cada elemento recuerda el
+    rango de piezas que contiene, así el texto de un div se arma solo si puede ser
+    una etiqueta (cuenta de caracteres no blancos) o un contenedor de cita.
+    """
+
+    def __init__(self, etiquetas):
+        self.etiquetas = set(etiquetas)
+        self._max_no_blancos = max((len("".join(e.split())) for e in self.etiquetas), default=0)
+
+        self.piezas = []            # [(texto, contenedor | None)]
+        self._no_blancos = [0]      # acumulado de caracteres no blancos de piezas normales
+        self._buffer = []           # lxml puede entregar un nodo de texto en varios data()
+
+        self.nombre, self.inicio, self.fin = [], [], []
+        self.siguiente = {}         # idx -> idx del siguiente hermano (elemento)
+        self._pila = []             # [idx, ultimo_hijo, es_div_cita]
+        self._ultimo_raiz = None
+        self._contenedores = []
+
+        self._primer_div = {}       # etiqueta -> idx del primer div (orden del documento)
+        self._cita_idx = None
+        self._cita_texto = None
+
+    # ---------- eventos de lxml ----------
+    def start(self, tag, attrib):
+        self._vaciar_buffer()
+        idx = len(self.nombre)
+        self.nombre.append(tag)
+        self.inicio.append(len(self.piezas))
+        self.fin.append(None)
+
+        if self._pila:
+            padre = self._pila[-1]
+            if padre[1] is not None:
+                self.siguiente[padre[1]] = idx
+            padre[1] = idx
+        else:
+            if self._ultimo_raiz is not None:
+                self.siguiente[self._ultimo_raiz] = idx
+            self._ultimo_raiz = idx
+
+        es_div_cita = tag == "div" and CLASE_CITA in (attrib.get("class") or "")
+        self._pila.append([idx, None, es_div_cita])
+        if tag in CONTENEDORES:
+            self._contenedores.append(tag)
+
+    def end(self, tag):
+        self._vaciar_buffer()
+        idx, _, es_div_cita = self._pila.pop()
+        self.fin[idx] = len(self.piezas)
+        if self.nombre[idx] in CONTENEDORES:
+            self._contenedores.pop()
+        if self.nombre[idx] == "div":
+            self._cerrar_div(idx, es_div_cita)
+
+    def data(self, data):
+        self._buffer.append(data)
+
+    def comment(self, text):
+        self._vaciar_buffer()
+
+    def pi(self, target, data=None):
+        self._vaciar_buffer()
+
+    def doctype(self, *args):
+        self._vaciar_buffer()
+
+    def close(self):
+        self._vaciar_buffer()
+        return self.resultado()
+
+    # ---------- internos ----------
+    def _vaciar_buffer(self):
+        if not self._buffer:
+            return
+        texto = "".join(self._buffer)
+        self._buffer = []
+        contenedor = self._contenedores[-1] if self._contenedores else None
+        self.piezas.append((texto, contenedor))
+        no_blancos = len("".join(texto.split())) if contenedor is None else 0
+        self._no_blancos.append(self._no_blancos[-1] + no_blancos)
+
+    def texto(self, idx, sep=""):
+        """Equivalente a Tag.get_text(sep) del elemento idx (ya cerrado)."""
+        tipo = self.nombre[idx] if self.nombre[idx] in CONTENEDORES else None
+        ini, fin = self.inicio[idx], self.fin[idx]
+        return sep.join(t for t, c in self.piezas[ini:fin] if c == tipo)
+
+    def _cerrar_div(self, idx, es_div_cita):
+        ini, fin = self.inicio[idx], self.fin[idx]
+        if self._no_blancos[fin] - self._no_blancos[ini] <= self._max_no_blancos:
+            t = _norm(self.texto(idx))
+            if t in self.etiquetas and idx < self._primer_div.get(t, len(self.nombre)):
+                self._primer_div[t] = idx
+
+        # un div externo se cierra después que los internos, pero va antes en el documento
+        if es_div_cita and (self._cita_idx is None or idx < self._cita_idx):
+            t = _norm(self.texto(idx, " "))
+            if TEXTO_CITA in t:
+                self._cita_idx, self._cita_texto = idx, t
+
+    def resultado(self):
+        """({etiqueta: valor}, {"cita_fecha": ...} | None)"""
+        valores = {}
+        for etiqueta in self.etiquetas:
+            idx = self._primer_div.get(etiqueta)
+            sib = self.siguiente.get(idx) if idx is not None else None
+            # sin hermano, bs4_obtener_valor deja de buscar (break)
+            valores[etiqueta] = _norm(self.texto(sib)) if sib is not None and self.fin[sib] is not None else ""
+
+        if self._cita_texto is not None:
+            return valores, {"cita_fecha": self._cita_texto}
+        documento = _norm(" ".join(t for t, c in self.piezas if c is None))
+        if TEXTO_CITA in documento:
+            return valores, {"cita_fecha": CITA_SIN_DETALLE}
+        return valores, None
+
+
+def nuevo_parser(etiquetas):
+    """Parser alimentable (feed/close); close() devuelve lo mismo que extraer_campos."""
+    return etree.HTMLParser(target=RecolectorExpediente(etiquetas), strip_cdata=False, recover=True)
+
+
+def extraer_campos(html: str, etiquetas):
+    """Un solo recorrido del HTML. Devuelve ({etiqueta: valor}, cita | None)."""
+    parser = nuevo_parser(etiquetas)
+    if html:
+        parser.feed(html)
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        # documento vacío: igual que BeautifulSoup, sin valores ni cita
+        return {e: "" for e in etiquetas}, None
@@ -0,0 +1,298 @@
+"""
+Portal simulado para medir y probar la fase B sin el portal real de la UNAM.
+
+Sirve páginas de expediente en /control/expediente/<n> a partir de las plantillas
+de fixtures/portal (con y sin "Cita programada") y puede simular:
+- latencia por petición (base + variación aleatoria);
+- respuestas 429/503 aleatorias con Retry-After;
+- expiración de la sesión a media ejecución (401 hasta que se tomen las cookies nuevas);
+- cuerpos lentos (la página se envía por partes, con pausas);
+- ETag / If-None-Match (304), para probar --cache.
+
+    python portal_simulado.py --puerto 8000 --latencia 0.05 --p-503 0.05 --expira-cada 200
+
+Desde Python (p. ej. benchmark_descarga.py):
+
+    portal = PortalSimulado(latencia=0.05).iniciar()
+    gestor = crear_gestor_sesion(NavegadorSimulado(portal))
+    urls = portal.urls(300)
+    ...
+    portal.detener()
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from string import Template
+
+PLANTILLAS = Path(__file__).resolve().parent / "fixtures" / "portal"
+RUTA_EXPEDIENTE = "/control/expediente/"
+COOKIE_SESION = "seguimiento_session"
+
+NOMBRES = ["MARÍA FERNANDA", "JUAN CARLOS", "ANA SOFÍA", "LUIS ÁNGEL", "DIANA", "JOSÉ EMILIO"]
+APELLIDOS = ["LÓPEZ", "PÉREZ", "RAMÍREZ", "GARCÍA", "MARTÍNEZ", "NÚÑEZ", "HERNÁNDEZ"]
+
+
+def _cargar_plantilla(nombre) -> Template:
+    return Template((PLANTILLAS / nombre).read_text(encoding="utf-8"))
+
+
+# -------------------------------------------------------------------------
+# PÁGINAS
+# -------------------------------------------------------------------------
+def tiene_cita(n: int) -> bool:
+    """3 de cada 10 expedientes no tienen cita (determinista por número)."""
+    return n % 10 >= 3
+
+
+def pagina_expediente(n: int, con_cita: Template, sin_cita: Template) -> bytes:
+    nombre = f"{NOMBRES[n % len(NOMBRES)]} {APELLIDOS[n % 7]}  {APELLIDOS[(n // 7) % 7]}"
+    valores = {
+        "numero_cuenta": f"3{n:08d}",
+        "nombre": nombre,
+        "correo": f"alumno{n}@ejemplo.unam.mx",
+        "fecha": f"{n % 28 + 1:02d}/03/2025",
+        "hora": f"{9 + n % 8}:{(n * 15) % 60:02d}",
+    }
+    plantilla = con_cita if tiene_cita(n) else sin_cita
+    return plantilla.substitute(valores).encode("utf-8")
+
+
+# -------------------------------------------------------------------------
+# SERVIDOR
+# -------------------------------------------------------------------------
+class PortalSimulado:
+    """
+    Servidor HTTP local (un hilo por conexión, keep-alive). Parámetros:
+    - latencia / variacion: segundos antes de responder (latencia ± variacion, uniforme);
+    - p_429 / p_503: probabilidad de responder 429 / 503 con `retry_after` segundos;
+    - expira_cada: cada N peticiones la sesión cambia y la cookie anterior recibe 401
+      (0 = nunca expira);
+    - p_lento / cuerpo_lento: probabilidad de que el cuerpo se envíe en BLOQUES_LENTOS
+      partes repartidas en `cuerpo_lento` segundos;
+    - semilla: para repetir la misma secuencia de fallas.
+    Las respuestas enviadas se cuentan por código en `estadisticas()`.
+    """
+
+    BLOQUES_LENTOS = 8
+
+    def __init__(
+        self,
+        puerto: int = 0,
+        latencia: float = 0.0,
+        variacion: float = 0.0,
+        p_429: float = 0.0,
+        p_503: float = 0.0,
+        retry_after: float = 0,
+        expira_cada: int = 0,
+        p_lento: float = 0.0,
+        cuerpo_lento: float = 0.5,
+        semilla=None,
+    ):
+        self.puerto = puerto
+        self.latencia = latencia
+        self.variacion = variacion
+        self.p_429 = p_429
+        self.p_503 = p_503
+        self.retry_after = retry_after
+        self.expira_cada = expira_cada
+        self.p_lento = p_lento
+        self.cuerpo_lento = cuerpo_lento
+
+        self._random = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._con_cita = _cargar_plantilla("expediente_con_cita.html")
+        self._sin_cita = _cargar_plantilla("expediente_sin_cita.html")
+        self._servidor = None
+        self.reiniciar_estadisticas()
+
+    # ---------- ciclo de vida ----------
+    def iniciar(self):
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", self.puerto), _crear_manejador(self))
+        self._servidor.daemon_threads = True
+        self.puerto = self._servidor.server_port
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.puerto}"
+
+    def urls(self, cantidad: int, inicio: int = 1):
+        return [f"{self.base_url}{RUTA_EXPEDIENTE}{n}" for n in range(inicio, inicio + cantidad)]
+
+    # ---------- sesión ----------
+    def token_sesion(self) -> str:
+        with self._lock:
+            return f"sesion-{self._generacion}"
+
+    def _validar_sesion(self, cookie_header: str) -> bool:
+        with self._lock:
+            self._peticiones += 1
+            if self.expira_cada and self._peticiones % self.expira_cada == 0:
+                self._generacion += 1
+            return f"{COOKIE_SESION}=sesion-{self._generacion}" in (cookie_header or "")
+
+    # ---------- estadísticas ----------
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            self._peticiones = 0
+            self._generacion = 0
+            self._por_status = {}
+            self._lentos = 0
+
+    def _contar(self, status: int, lento: bool = False):
+        with self._lock:
+            self._por_status[status] = self._por_status.get(status, 0) + 1
+            self._lentos += lento
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "peticiones": self._peticiones,
+                "por_status": dict(sorted(self._por_status.items())),
+                "cuerpos_lentos": self._lentos,
+                "sesiones_expiradas": self._generacion,
+            }
+
+    # ---------- decisión por petición ----------
+    def _sortear(self):
+        """(status de congestión | None, cuerpo lento?, segundos de espera)"""
+        with self._lock:
+            r = self._random.random()
+            if r < self.p_429:
+                falla = 429
+            elif r < self.p_429 + self.p_503:
+                falla = 503
+            else:
+                falla = None
+            lento = self._random.random() < self.p_lento
+            espera = max(0.0, self.latencia + self._random.uniform(-self.variacion, self.variacion))
+        return falla, lento, espera
+
+
+def _crear_manejador(portal: PortalSimulado):
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # encabezados y cuerpo van en escrituras separadas: sin esto, Nagle + ACK
+        # retrasado le suman ~40 ms a cada respuesta
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, status, cuerpo=b"", encabezados=None, lento=False):
+            self.send_response(status)
+            for k, v in (encabezados or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            if lento and cuerpo:
+                tam = -(-len(cuerpo) // portal.BLOQUES_LENTOS)
+                for i in range(0, len(cuerpo), tam):
+                    self.wfile.write(cuerpo[i:i + tam])
+                    self.wfile.flush()
+                    time.sleep(portal.cuerpo_lento / portal.BLOQUES_LENTOS)
+            else:
+                self.wfile.write(cuerpo)
+            portal._contar(status, lento)
+
+        def do_GET(self):
+            sesion_ok = portal._validar_sesion(self.headers.get("Cookie"))
+            falla, lento, espera = portal._sortear()
+            if espera:
+                time.sleep(espera)
+
+            if not self.path.startswith(RUTA_EXPEDIENTE):
+                return self._responder(404, b"no encontrado")
+            try:
+                n = int(self.path[len(RUTA_EXPEDIENTE):].split("?", 1)[0])
+            except ValueError:
+                return self._responder(404, b"no encontrado")
+
+            if not sesion_ok:
+                return self._responder(401, b"sesion expirada")
+            if falla is not None:
+                encabezados = {"Retry-After": str(int(portal.retry_after))}
+                return self._responder(falla, b"ocupado", encabezados)
+
+            cuerpo = pagina_expediente(n, portal._con_cita, portal._sin_cita)
+            etag = '"' + hashlib.sha1(cuerpo).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._responder(304, encabezados={"ETag": etag})
+            return self._responder(
+                200,
+                cuerpo,
+                {"Content-Type": "text/html; charset=UTF-8", "ETag": etag},
+                lento=lento,
+            )
+
+    return Manejador
+
+
+# -------------------------------------------------------------------------
+# NAVEGADOR SIMULADO (lo que GestorSesion usa del driver de Selenium)
+# -------------------------------------------------------------------------
+class NavegadorSimulado:
+    """Expone las cookies vigentes del portal simulado como si fuera el driver."""
+
+    def __init__(self, portal: PortalSimulado):
+        self.portal = portal
+        self.current_url = portal.base_url + "/control/listado/seguimiento"
+
+    def execute_script(self, script, *args):
+        return "Mozilla/5.0 (X11; Linux x86_64) PortalSimulado"
+
+    def get_cookies(self):
+        return [{"name": COOKIE_SESION, "value": self.portal.token_sesion(), "domain": "127.0.0.1", "path": "/"}]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Portal de expedientes simulado (pruebas y benchmark)")
+    ap.add_argument("--puerto", type=int, default=8000)
+    ap.add_argument("--latencia", type=float, default=0.05, help="Segundos por respuesta")
+    ap.add_argument("--variacion", type=float, default=0.02, help="± segundos de variación aleatoria")
+    ap.add_argument("--p-429", type=float, default=0.0)
+    ap.add_argument("--p-503", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=0)
+    ap.add_argument("--expira-cada", type=int, default=0, help="Peticiones entre expiraciones de sesión")
+    ap.add_argument("--p-lento", type=float, default=0.0, help="Probabilidad de cuerpo lento")
+    ap.add_argument("--cuerpo-lento", type=float, default=0.5, help="Segundos que tarda un cuerpo lento")
+    ap.add_argument("--semilla", type=int, default=None)
+    args = ap.parse_args()
+
+    portal = PortalSimulado(
+        puerto=args.puerto,
+        latencia=args.latencia,
+        variacion=args.variacion,
+        p_429=args.p_429,
+        p_503=args.p_503,
+        retry_after=args.retry_after,
+        expira_cada=args.expira_cada,
+        p_lento=args.p_lento,
+        cuerpo_lento=args.cuerpo_lento,
+        semilla=args.semilla,
+    ).iniciar()
+    print(f"-> Portal simulado en {portal.base_url}{RUTA_EXPEDIENTE}<n>")
+    print(f"-> Cookie de sesión: {COOKIE_SESION}={portal.token_sesion()}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n-> {portal.estadisticas()}")
+        portal.detener()
+
+
+if __name__ == "__main__":
+    main()
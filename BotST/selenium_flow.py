@@ -1,21 +1,21 @@
-import re
+from contextlib import nullcontext
 
-from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 
 from config import (
     URL,
+    URL_LISTADO,
     SEL_SEGUIMIENTO,
     SEL_FILAS,
     SEL_DETALLE,
     SEL_FILAS_TABLA,
     SEL_COL_ESTADO,
-    SEL_TBODY,
     DEFAULT_TIMEOUT,
+    ESTADO_FILTRO,
 )
-from utils import norm, asegurar_url_absoluta
+from utils import norm, asegurar_url_absoluta, url_desde_atributos
 
 
 # -------------------------------------------------------------------------
@@ -33,6 +33,12 @@ def esperar_login_e_ir_a_seguimiento(driver):
     print("-> Estamos en la sección de Seguimiento")
 
 
+def volver_al_listado(driver, timeout=DEFAULT_TIMEOUT):
+    """Recarga el listado sin filtro y en la página 1 (antes de pasar a otro estado)."""
+    driver.get(URL_LISTADO)
+    WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.ID, "est_avance")))
+
+
 # -------------------------------------------------------------------------
 # FILTROS
 # -------------------------------------------------------------------------
@@ -52,7 +58,7 @@ def cambiar_mostrar_100(driver, timeout=DEFAULT_TIMEOUT):
             or sel.first_selected_option.text
         )
         if "100" in norm(actual):
-            wait.until(lambda d: len(d.find_elements(*SEL_FILAS_TABLA)) > 10)
+            wait.until(tabla_completa)
             print("-> El tamaño de la tabla ya estaba en 100")
             return
     except Exception:
@@ -69,13 +75,13 @@ def cambiar_mostrar_100(driver, timeout=DEFAULT_TIMEOUT):
         select_el,
     )
 
-    wait.until(lambda d: len(d.find_elements(*SEL_FILAS_TABLA)) > 10)
+    wait.until(tabla_completa)
     print("-> El tamaño de la página fue ajustado a 100 registros")
 
 
 def seleccionar_filtro_por_estado(
     driver,
-    valor="Entrega electrónica y física de documentos",
+    valor=ESTADO_FILTRO,
     timeout=DEFAULT_TIMEOUT,
 ):
     wait = WebDriverWait(driver, timeout)
@@ -87,129 +93,195 @@ def seleccionar_filtro_por_estado(
     except Exception:
         combo.select_by_visible_text(valor)
 
-    def ok(d):
-        filas = d.find_elements(*SEL_FILAS_TABLA)
-        if not filas:
-            return True
-        for c in d.find_elements(*SEL_COL_ESTADO):
-            if norm(c.text) != valor_norm:
-                return False
-        return True
-
-    wait.until(ok)
+    wait.until(
+        lambda d: d.execute_script(
+            JS_FILTRO_APLICADO, SEL_FILAS_TABLA[1], SEL_COL_ESTADO[1], valor_norm
+        )
+    )
     print("-> Filtro aplicado")
 
     cambiar_mostrar_100(driver, timeout=DEFAULT_TIMEOUT)
 
 
 # -------------------------------------------------------------------------
-# OBTENER URL DIRECTA DESDE LA FILA
+# ACCESO AL DOM POR LOTES (un execute_script por página)
 # -------------------------------------------------------------------------
-def _obtener_url_expediente_desde_fila(driver, fila):
-    candidatos = fila.find_elements(By.CSS_SELECTOR, "td:last-child button.btn-accion")
-    btn = None
-    for b in candidatos:
-        if b.find_elements(By.CSS_SELECTOR, "i.fa-file-alt"):
-            btn = b
-            break
-    if btn is None:
-        raise RuntimeError("No se encontro el botón de expediente en la fila seleccionada")
-
-    attrs = driver.execute_script(
-        """
-        var el = arguments[0], out = {};
-        for (const a of el.attributes) out[a.name]=a.value;
-        return out;
-    """,
-        btn,
-    )
-    onclick = attrs.get("onclick", "") or ""
-    data_href = attrs.get("data-href", "") or ""
-    at_click = (
-        attrs.get("@click", "")
-        or attrs.get("x-on:click", "")
-        or attrs.get("hx-get", "")
-        or ""
-    )
-
-    url = None
-    for texto in (onclick, data_href, at_click):
-        m = (
-            re.search(r"(https?://[^\s'\"<>]+/expediente[^\s'\"<>]*)", texto)
-            or re.search(r"location\\.href\\s*=\\s*'([^']+)'", texto)
-            or re.search(r'location\\.href\\s*=\\s*"([^"]+)"', texto)
-        )
-        if m:
-            url = m.group(1) if m.groups() else m.group(0)
-            break
-
-    if not url:
-        raise RuntimeError(
-            "No se puede derivar la URL del expediente desde los atributos del boton"
-        )
-    return asegurar_url_absoluta(driver, url)
+# Los selectores se pasan como argumentos para que config.py siga siendo la única fuente.
+_JS_NORM = "const n = s => (s || '').split(/\\s+/).filter(Boolean).join(' ');"
+
+# [{attrs: {...} | null, estado: "..."}] por cada fila; attrs es el botón de expediente
+# (button.btn-accion con i.fa-file-alt en la última columna)
+JS_LEER_FILAS = _JS_NORM + """
+const filas = document.querySelectorAll(arguments[0]);
+const out = [];
+for (const tr of filas) {
+    const celdas = tr.querySelectorAll(':scope > td');
+    const ultima = celdas[celdas.length - 1];
+    let attrs = null;
+    if (ultima) {
+        for (const b of ultima.querySelectorAll('button.btn-accion')) {
+            if (b.querySelector('i.fa-file-alt')) {
+                attrs = {};
+                for (const a of b.attributes) attrs[a.name] = a.value;
+                break;
+            }
+        }
+    }
+    const celda_estado = tr.querySelector(arguments[1]);
+    out.push({attrs: attrs, estado: celda_estado ? n(celda_estado.innerText) : null});
+}
+return out;
+"""
+
+# true si no hay filas o todas las celdas de estado valen arguments[2]
+JS_FILTRO_APLICADO = _JS_NORM + """
+if (!document.querySelector(arguments[0])) return true;
+for (const c of document.querySelectorAll(arguments[1])) {
+    if (n(c.innerText) !== arguments[2]) return false;
+}
+return true;
+"""
+
+JS_CONTAR_FILAS = "return document.querySelectorAll(arguments[0]).length;"
+
+# true si hay más de arguments[2] filas o no hay botón "siguiente" activo (todas las
+# filas del estado caben en la página: p. ej. un estado con 10 expedientes o menos)
+JS_TABLA_COMPLETA = """
+if (document.querySelectorAll(arguments[0]).length > arguments[2]) return true;
+return !Array.from(document.querySelectorAll(arguments[1])).some(
+    b => b.getClientRects().length > 0 && !b.disabled
+);
+"""
+
+# Busca el botón "siguiente" visible y habilitado y marca la primera fila actual.
+# Devuelve [boton | null, texto de la primera fila]
+JS_PREPARAR_SIGUIENTE = """
+const btn = Array.from(document.querySelectorAll(arguments[0])).find(
+    b => b.getClientRects().length > 0 && !b.disabled
+) || null;
+const f = document.querySelector(arguments[1]);
+if (f) f.setAttribute('data-bot-pagina-previa', '1');
+return [btn, f ? f.innerText : ''];
+"""
+
+# La página cambió: hay una primera fila y no es la marcada (se reemplazó) o su texto es otro
+JS_PAGINA_CAMBIO = """
+const f = document.querySelector(arguments[0]);
+if (!f) return false;
+return !f.hasAttribute('data-bot-pagina-previa') || f.innerText !== arguments[1];
+"""
+
+SEL_BOTON_SIGUIENTE = "button[rel='next'], button[wire\\:click^='nextPage']"
+
+
+def contar_filas(driver) -> int:
+    return driver.execute_script(JS_CONTAR_FILAS, SEL_FILAS_TABLA[1])
+
+
+def tabla_completa(driver) -> bool:
+    """Condición para WebDriverWait: ya se muestran más de 10 filas o no hay más páginas."""
+    return driver.execute_script(JS_TABLA_COMPLETA, SEL_FILAS_TABLA[1], SEL_BOTON_SIGUIENTE, 10)
+
+
+def _selector_celda_estado() -> str:
+    # "table.tab-docs tbody tr td:nth-child(6)" -> ":scope > td:nth-child(6)"
+    return ":scope > " + SEL_COL_ESTADO[1].rsplit(" ", 1)[-1]
+
+
+def leer_filas_pagina(driver):
+    """[(attrs_del_boton | None, estado)] de todas las filas visibles, en un solo round trip."""
+    filas = driver.execute_script(JS_LEER_FILAS, SEL_FILAS[1], _selector_celda_estado())
+    return [(f.get("attrs"), f.get("estado")) for f in filas or []]
+
+
+def _obtener_urls_de_pagina(driver, filas, estado=None):
+    """
+    URLs de expediente de `filas` (leer_filas_pagina); las filas sin botón/URL se reportan y se omiten.
+    Con `estado`, también se omiten (con aviso) las filas cuyo estado no es el del filtro activo.
+    """
+    urls = []
+    estado_norm = norm(estado) if estado else None
+    otro_estado = 0
+    for attrs, estado_fila in filas:
+        if estado_norm is not None and estado_fila is not None and estado_fila != estado_norm:
+            otro_estado += 1
+            continue
+        if attrs is None:
+            print("   -> No se pudo derivar URL de una fila: No se encontro el botón de expediente en la fila")
+            continue
+        url = url_desde_atributos(attrs)
+        if not url:
+            print(
+                "   -> No se pudo derivar URL de una fila: "
+                "No se puede derivar la URL del expediente desde los atributos del boton"
+            )
+            continue
+        urls.append(asegurar_url_absoluta(driver, url))
+    if otro_estado:
+        print(f"   -> AVISO: {otro_estado} filas con otro estado (¿se perdió el filtro?); se omiten")
+    return urls
 
 
 # -------------------------------------------------------------------------
 # NAVEGACIÓN ENTRE PÁGINAS Y RECOLECCIÓN DE URLs
 # -------------------------------------------------------------------------
-def _ir_a_siguiente_pagina(driver, timeout=DEFAULT_TIMEOUT):
+def _ir_a_siguiente_pagina(driver, timeout=DEFAULT_TIMEOUT, lock_driver=None):
+    """
+    El clic se hace con `lock_driver`; durante la espera del cambio de página el lock
+    solo se toma en cada consulta, así los hilos de descarga pueden renovar cookies.
+    """
+    lock_driver = lock_driver or nullcontext()
     wait = WebDriverWait(driver, timeout)
 
-    candidatos = driver.find_elements(
-        By.CSS_SELECTOR, "button[rel='next'], button[wire\\:click^='nextPage']"
-    )
-    btn = next((b for b in candidatos if b.is_displayed() and b.is_enabled()), None)
-    if not btn:
-        return False
-
-    try:
-        tbody = wait.until(EC.presence_of_element_located(SEL_TBODY))
-        filas = tbody.find_elements(*SEL_FILAS_TABLA)
-        fila_ref = filas[0] if filas else None
-        first_text = filas[0].text if filas else ""
-    except Exception:
-        fila_ref, first_text = None, ""
-
-    try:
-        btn.click()
-    except Exception:
-        driver.execute_script("arguments[0].click()", btn)
+    with lock_driver:
+        btn, first_text = driver.execute_script(
+            JS_PREPARAR_SIGUIENTE, SEL_BOTON_SIGUIENTE, SEL_FILAS_TABLA[1]
+        )
+        if not btn:
+            return False
 
-    if fila_ref:
         try:
-            wait.until(EC.staleness_of(fila_ref))
-        except TimeoutException:
-            wait.until(
-                lambda d: d.find_elements(*SEL_FILAS_TABLA)
-                and d.find_elements(*SEL_FILAS_TABLA)[0].text != first_text
-            )
-    else:
-        wait.until(lambda d: len(d.find_elements(*SEL_FILAS_TABLA)) > 0)
+            btn.click()
+        except Exception:
+            driver.execute_script("arguments[0].click()", btn)
+
+    def cambio(d):
+        with lock_driver:
+            return d.execute_script(JS_PAGINA_CAMBIO, SEL_FILAS_TABLA[1], first_text)
 
+    wait.until(cambio)
     return True
 
 
-def recolectar_urls_expedientes(driver):
+def recolectar_urls_expedientes(driver, al_recolectar=None, lock_driver=None, estado=None):
+    """
+    Recorre todas las páginas y devuelve las URLs únicas. Con `estado` (el del filtro
+    aplicado) se omiten las filas de otro estado.
+    `al_recolectar(urls_nuevas)` se llama al terminar cada página (fuera de `lock_driver`),
+    para que la descarga empiece mientras el navegador pasa a la siguiente.
+    """
+    lock_driver = lock_driver or nullcontext()
     urls, vistos = [], set()
     pagina = 1
     while True:
-        filas = driver.find_elements(*SEL_FILAS)
-        total = len(filas)
-        print(f"\n== Página {pagina}: {total} filas ==")
-
-        for fila in filas:
-            try:
-                url = _obtener_url_expediente_desde_fila(driver, fila)
-                if url not in vistos:
-                    urls.append(url)
-                    vistos.add(url)
-            except Exception as e:
-                print(f"   -> No se pudo derivar URL de una fila: {e}")
-
-        avanzo = _ir_a_siguiente_pagina(driver)
+        nuevas = []
+        with lock_driver:
+            filas = leer_filas_pagina(driver)
+            print(f"\n== Página {pagina}: {len(filas)} filas ==")
+            urls_pagina = _obtener_urls_de_pagina(driver, filas, estado)
+
+        for url in urls_pagina:
+            if url not in vistos:
+                nuevas.append(url)
+                vistos.add(url)
+
+        urls.extend(nuevas)
+        if al_recolectar is not None:
+            al_recolectar(nuevas)
+
+        avanzo = _ir_a_siguiente_pagina(driver, lock_driver=lock_driver)
         if not avanzo:
             break
         pagina += 1
 
-    return urls
\ No newline at end of file
+    return urls
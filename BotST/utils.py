@@ -1,3 +1,4 @@
+import re
 from urllib.parse import urljoin, urlparse
 from config import URL
 
@@ -13,15 +14,47 @@ def dominio_base(url_actual: str) -> str:
     return f"{p.scheme}://{p.netloc}/"
 
 
-def asegurar_url_absoluta(driver, posible_url: str) -> str:
+def url_absoluta(url_pagina: str, posible_url: str) -> str:
     """
-    Asegura que la URL del expediente sea absoluta, basada en la URL actual
-    del driver o en la URL base del sistema.
+    URL del expediente absoluta, resuelta contra el dominio de `url_pagina`
+    (no contra la ruta de la página). La usan la recolección con Selenium y
+    la de HTTP, para que ambas den la misma URL.
     """
     if not posible_url:
         return posible_url
     if posible_url.startswith("http://") or posible_url.startswith("https://"):
         return posible_url
+    return urljoin(dominio_base(url_pagina or URL), posible_url)
+
+
+def asegurar_url_absoluta(driver, posible_url: str) -> str:
+    """
+    Asegura que la URL del expediente sea absoluta, basada en la URL actual
+    del driver o en la URL base del sistema.
+    """
+    return url_absoluta(driver.current_url, posible_url)
+
+
+def url_desde_atributos(attrs: dict):
+    """
+    Deriva la URL del expediente a partir de los atributos del botón
+    (onclick, data-href, @click / x-on:click / hx-get). None si no se encuentra.
+    """
+    onclick = attrs.get("onclick", "") or ""
+    data_href = attrs.get("data-href", "") or ""
+    at_click = (
+        attrs.get("@click", "")
+        or attrs.get("x-on:click", "")
+        or attrs.get("hx-get", "")
+        or ""
+    )
 
-    base = dominio_base(driver.current_url or URL)
-    return urljoin(base, posible_url)
\ No newline at end of file
+    for texto in (onclick, data_href, at_click):
+        m = (
+            re.search(r"(https?://[^\s'\"<>]+/expediente[^\s'\"<>]*)", texto)
+            or re.search(r"location\\.href\\s*=\\s*'([^']+)'", texto)
+            or re.search(r'location\\.href\\s*=\\s*"([^"]+)"', texto)
+        )
+        if m:
+            return m.group(1) if m.groups() else m.group(0)
+    return None
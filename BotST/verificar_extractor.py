@@ -0,0 +1,88 @@
+"""
+Verifica que el extractor de un solo recorrido (parser_expediente) da exactamente lo
+mismo que los helpers de BeautifulSoup sobre páginas de expediente guardadas.
+
+    python verificar_extractor.py                    # fixtures/expedientes/*.html
+    python verificar_extractor.py carpeta/ pag.html  # páginas propias (p. ej. guardadas del portal)
+
+Sale con código 1 si alguna página no coincide.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from expedientes_service import (
+    ETIQUETAS_EXPEDIENTE,
+    bs4_obtener_valor,
+    bs4_obtener_cita_programada,
+)
+from parser_expediente import extraer_campos
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "expedientes"
+
+
+def referencia_bs4(html: str):
+    soup = BeautifulSoup(html, "lxml")
+    valores = {e: bs4_obtener_valor(soup, e) for e in ETIQUETAS_EXPEDIENTE.values()}
+    return valores, bs4_obtener_cita_programada(soup)
+
+
+def paginas(rutas):
+    for ruta in rutas:
+        ruta = Path(ruta)
+        if ruta.is_dir():
+            yield from sorted(ruta.glob("*.html"))
+        else:
+            yield ruta
+
+
+def medir(fn, html, repeticiones):
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        fn(html)
+    return (time.perf_counter() - t0) / repeticiones
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compara parser_expediente contra BeautifulSoup")
+    ap.add_argument("rutas", nargs="*", default=[FIXTURES], help="Archivos .html o carpetas")
+    ap.add_argument("--repeticiones", type=int, default=20, help="Repeticiones para medir tiempos")
+    args = ap.parse_args()
+
+    etiquetas = list(ETIQUETAS_EXPEDIENTE.values())
+    fallos, total, t_bs4, t_lxml = 0, 0, 0.0, 0.0
+    for ruta in paginas(args.rutas):
+        html = ruta.read_text(encoding="utf-8", errors="replace")
+        esperado = referencia_bs4(html)
+        obtenido = extraer_campos(html, etiquetas)
+        total += 1
+
+        if obtenido == esperado:
+            print(f"OK         {ruta.name}")
+        else:
+            fallos += 1
+            print(f"DIFERENTE  {ruta.name}")
+            for e in etiquetas:
+                if obtenido[0][e] != esperado[0][e]:
+                    print(f"   {e!r}: bs4={esperado[0][e]!r} lxml={obtenido[0][e]!r}")
+            if obtenido[1] != esperado[1]:
+                print(f"   cita: bs4={esperado[1]!r} lxml={obtenido[1]!r}")
+
+        if args.repeticiones > 0:
+            t_bs4 += medir(referencia_bs4, html, args.repeticiones)
+            t_lxml += medir(lambda h: extraer_campos(h, etiquetas), html, args.repeticiones)
+
+    print(f"\n-> {total - fallos}/{total} páginas idénticas")
+    if total and args.repeticiones > 0:
+        print(
+            f"-> Tiempo medio por página: bs4 {t_bs4 / total * 1000:.2f} ms | "
+            f"un recorrido {t_lxml / total * 1000:.2f} ms ({t_bs4 / max(t_lxml, 1e-9):.1f}x)"
+        )
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Union
+import json
+import time
+
+from config import OUT_TXT, OUT_XLSX
+from parsers import load_doc, load_diag
+from comparator import ComparisonResult, comparar_sets
+from conflictos import Conflicto, detectar_conflictos
+from report import write_report_txt, write_coincidencias_excel
+
+PathLike = Union[str, Path]
+
+# ---------- Modelos ----------
+
+@dataclass
+class Trabajo:
+    """Un par (doc, diag) a comparar y la carpeta donde se escriben sus reportes."""
+    nombre: str
+    doc: List[Path]
+    diag: List[Path]
+    out_dir: Path
+
+@dataclass
+class ResumenTrabajo:
+    nombre: str
+    doc: List[str]
+    diag: List[str]
+    out_dir: str
+    ok: bool = False
+    error: str = ""
+    registros_doc: int = 0
+    registros_diag: int = 0
+    coincidencias: int = 0
+    discrepancias: int = 0
+    dedup_doc: int = 0
+    dedup_diag: int = 0
+    conflictos: int = 0
+    # segundos; la extracción de un PDF compartido se reporta en cada trabajo que lo usa
+    tiempos: Dict[str, float] = field(default_factory=dict)
+
+# ---------- API de un solo par ----------
+
+def extraer(path: PathLike, tipo: str) -> List[Dict[str, str]]:
+    """tipo: 'doc' (formato doc.pdf) o 'diag' (formato INGENIERIA EN COMPUTACION.pdf)."""
+    if tipo == "doc":
+        return load_doc(str(path))
+    if tipo == "diag":
+        return load_diag(str(path))
+    raise ValueError(f"Tipo de PDF desconocido: {tipo!r} (se esperaba 'doc' o 'diag')")
+
+def escribir_reportes(result: ComparisonResult, out_dir: PathLike,
+                      conflictos: Optional[List[Conflicto]] = None) -> Tuple[Path, Path]:
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_txt, out_xlsx = out_dir / OUT_TXT.name, out_dir / OUT_XLSX.name
+    write_report_txt(out_txt, result, conflictos)
+    write_coincidencias_excel(out_xlsx, result)
+    return out_txt, out_xlsx
+
+def comparar_pdfs(
+    doc: Union[PathLike, List[PathLike]],
+    diag: Union[PathLike, List[PathLike]],
+    out_dir: Optional[PathLike] = None,
+) -> ComparisonResult:
+    """Extrae, compara y (si se indica out_dir) escribe los reportes de un par de PDFs."""
+    docs = doc if isinstance(doc, list) else [doc]
+    diags = diag if isinstance(diag, list) else [diag]
+    rows_doc = [r for p in docs for r in extraer(p, "doc")]
+    rows_diag = [r for p in diags for r in extraer(p, "diag")]
+    result = comparar_sets(rows_doc, rows_diag, Path(docs[0]).name, Path(diags[0]).name)
+    if out_dir is not None:
+        conflictos = detectar_conflictos(rows_doc, rows_diag, Path(docs[0]).name, Path(diags[0]).name)
+        escribir_reportes(result, out_dir, conflictos)
+    return result
+
+# ---------- Manifiesto ----------
+
+def cargar_manifiesto(path: PathLike) -> List[Trabajo]:
+    """
+    JSON con una lista de trabajos:
+        [{"nombre": "2025-1 ICO", "doc": "doc.pdf", "diag": ["a.pdf", "b.pdf"], "out": "out/ico"}]
+    Las rutas relativas se resuelven contra la carpeta del manifiesto; "nombre" es opcional.
+    """
+    path = Path(path)
+    base = path.resolve().parent
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("trabajos", [])
+
+    def rutas(v) -> List[Path]:
+        vals = v if isinstance(v, list) else [v]
+        return [(base / p).resolve() for p in vals]
+
+    trabajos: List[Trabajo] = []
+    for k, item in enumerate(data, start=1):
+        faltan = {"doc", "diag", "out"} - set(item)
+        if faltan:
+            raise ValueError(f"Trabajo #{k} del manifiesto sin campos: {', '.join(sorted(faltan))}")
+        trabajos.append(Trabajo(
+            nombre=str(item.get("nombre") or f"trabajo_{k}"),
+            doc=rutas(item["doc"]),
+            diag=rutas(item["diag"]),
+            out_dir=(base / item["out"]).resolve(),
+        ))
+    return trabajos
+
+# ---------- Ejecución en lote ----------
+
+def _extraer_timed(path: str, tipo: str) -> Tuple[List[Dict[str, str]], float]:
+    t0 = time.perf_counter()
+    rows = extraer(path, tipo)
+    return rows, time.perf_counter() - t0
+
+def _comparar_y_reportar(
+    resumen: ResumenTrabajo,
+    rows_doc: List[Dict[str, str]],
+    rows_diag: List[Dict[str, str]],
+) -> ResumenTrabajo:
+    t0 = time.perf_counter()
+    source_a, source_b = Path(resumen.doc[0]).name, Path(resumen.diag[0]).name
+    result = comparar_sets(rows_doc, rows_diag, source_a, source_b)
+    conflictos = detectar_conflictos(rows_doc, rows_diag, source_a, source_b)
+    t1 = time.perf_counter()
+    escribir_reportes(result, resumen.out_dir, conflictos)
+    t2 = time.perf_counter()
+
+    resumen.ok = True
+    resumen.registros_doc, resumen.registros_diag = len(rows_doc), len(rows_diag)
+    resumen.coincidencias, resumen.discrepancias = result.coincidencias, result.discrepancias
+    resumen.dedup_doc, resumen.dedup_diag = result.totA, result.totB
+    resumen.conflictos = len(conflictos)
+    resumen.tiempos["comparacion"] = round(t1 - t0, 4)
+    resumen.tiempos["reportes"] = round(t2 - t1, 4)
+    return resumen
+
+def ejecutar_lote(trabajos: List[Trabajo], max_workers: Optional[int] = None) -> List[ResumenTrabajo]:
+    """
+    Ejecuta los trabajos en un pool de procesos. Cada PDF distinto (ruta + tipo) se extrae
+    una sola vez aunque lo usen varios trabajos; la comparación de un trabajo arranca en
+    cuanto sus PDFs están extraídos. Devuelve los resúmenes en el orden del manifiesto.
+    """
+    resumenes = [
+        ResumenTrabajo(
+            nombre=t.nombre,
+            doc=[str(p) for p in t.doc],
+            diag=[str(p) for p in t.diag],
+            out_dir=str(t.out_dir),
+        )
+        for t in trabajos
+    ]
+    necesarios = {(str(p), "doc") for t in trabajos for p in t.doc} \
+        | {(str(p), "diag") for t in trabajos for p in t.diag}
+    extraidos: Dict[Tuple[str, str], Tuple[List[Dict[str, str]], float]] = {}
+    errores: Dict[Tuple[str, str], str] = {}
+    pendientes = list(range(len(trabajos)))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        en_curso: Dict[Future, Tuple[str, object]] = {
+            ex.submit(_extraer_timed, path, tipo): ("extraer", (path, tipo))
+            for path, tipo in sorted(necesarios)
+        }
+        while en_curso:
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for fut in hechos:
+                tipo_tarea, dato = en_curso.pop(fut)
+                if tipo_tarea == "extraer":
+                    try:
+                        extraidos[dato] = fut.result()
+                    except Exception as e:
+                        errores[dato] = f"{Path(dato[0]).name}: {e}"
+                else:
+                    try:
+                        resumenes[dato] = fut.result()
+                    except Exception as e:
+                        resumenes[dato].error = str(e)
+
+            # lanzar las comparaciones cuyos PDFs ya están listos
+            for k in list(pendientes):
+                t = trabajos[k]
+                claves = [(str(p), "doc") for p in t.doc] + [(str(p), "diag") for p in t.diag]
+                fallos = [errores[c] for c in claves if c in errores]
+                if fallos:
+                    resumenes[k].error = "; ".join(fallos)
+                    pendientes.remove(k)
+                elif all(c in extraidos for c in claves):
+                    rows_doc = [r for p in t.doc for r in extraidos[(str(p), "doc")][0]]
+                    rows_diag = [r for p in t.diag for r in extraidos[(str(p), "diag")][0]]
+                    resumenes[k].tiempos["extraccion"] = round(sum(extraidos[c][1] for c in claves), 4)
+                    en_curso[ex.submit(_comparar_y_reportar, resumenes[k], rows_doc, rows_diag)] = ("comparar", k)
+                    pendientes.remove(k)
+
+            # liberar las extracciones que ya no necesita ningún trabajo pendiente
+            aun_usados = {(str(p), "doc") for k in pendientes for p in trabajos[k].doc} \
+                | {(str(p), "diag") for k in pendientes for p in trabajos[k].diag}
+            for c in [c for c in extraidos if c not in aun_usados]:
+                del extraidos[c]
+
+    return resumenes
+
+def resumen_json(resumenes: List[ResumenTrabajo], segundos_total: Optional[float] = None) -> str:
+    data = {
+        "trabajos": [asdict(r) for r in resumenes],
+        "ok": sum(1 for r in resumenes if r.ok),
+        "fallidos": sum(1 for r in resumenes if not r.ok),
+    }
+    if segundos_total is not None:
+        data["segundos_total"] = round(segundos_total, 4)
+    return json.dumps(data, ensure_ascii=False, indent=2)
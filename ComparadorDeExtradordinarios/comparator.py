@@ -1,6 +1,6 @@
 from __future__ import annotations
-from typing import List, Dict, Tuple, FrozenSet
-from dataclasses import dataclass
+from typing import List, Dict, Tuple, FrozenSet, Optional, Union
+from dataclasses import dataclass, field
 
 from normalizers import norm_prof
 
@@ -20,22 +20,113 @@ def firma_sort_key(f: Firma):
     grupo, fecha, hora, salon, profes = f
     return (grupo, fecha, hora, salon, tuple(sorted(profes)))
 
-def dedup_por_clave_with_log(rows: List[Dict[str, str]], fuente: str) \
-        -> Tuple[Dict[str, Dict[Firma, Dict[str, str]]], List[str], int]:
+# ---------- Firmas compactas (internado de cadenas) ----------
+
+# (GRUPO, FECHA, HORA, SALON, profes) como ids enteros; profes ordenados por id
+FirmaCompacta = Tuple[int, int, int, int, Tuple[int, ...]]
+
+class TablaFirmas:
+    """
+    Diccionario de cadenas → ids enteros pequeños para construir firmas compactas.
+    Una sola tabla debe compartirse entre ambas fuentes para que los ids coincidan.
+    El orden de las firmas (equivalente a firma_sort_key) se calcula una sola vez
+    por firma a partir del rango alfabético de cada id.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._valores: List[str] = []
+        self._profs: Dict[str, int] = {}    # nombre crudo → id del nombre normalizado (0 = vacío)
+        self._rango: Optional[List[int]] = None
+        self._orden: Dict[FirmaCompacta, tuple] = {}
+
+    def id(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._valores)
+            self._valores.append(s)
+            self._rango = None
+            self._orden.clear()
+        return i
+
+    def _id_prof(self, raw: str) -> int:
+        i = self._profs.get(raw)
+        if i is None:
+            nombre = norm_prof(raw)
+            i = self._profs[raw] = self.id(nombre) if nombre else -1
+        return i
+
+    def firma(self, rec: Dict[str, str]) -> FirmaCompacta:
+        p1 = self._id_prof(rec.get("P1", ""))
+        p2 = self._id_prof(rec.get("P2", ""))
+        if p1 < 0:
+            profes = () if p2 < 0 else (p2,)
+        elif p2 < 0 or p1 == p2:
+            profes = (p1,)
+        else:
+            profes = (p1, p2) if p1 < p2 else (p2, p1)
+        return (
+            self.id(rec.get("GRUPO", "")),
+            self.id(rec.get("FECHA", "")),
+            self.id(rec.get("HORA", "")),
+            self.id(rec.get("SALON", "")),
+            profes,
+        )
+
+    def sort_key(self, f: FirmaCompacta) -> tuple:
+        k = self._orden.get(f)
+        if k is None:
+            if self._rango is None:
+                self._rango = [0] * len(self._valores)
+                for pos, i in enumerate(sorted(range(len(self._valores)), key=self._valores.__getitem__)):
+                    self._rango[i] = pos
+            rg = self._rango
+            g, fe, h, s, profes = f
+            k = self._orden[f] = (rg[g], rg[fe], rg[h], rg[s], tuple(sorted(rg[p] for p in profes)))
+        return k
+
+    def expandir(self, f: FirmaCompacta) -> Firma:
+        v = self._valores
+        g, fe, h, s, profes = f
+        return (v[g], v[fe], v[h], v[s], frozenset(v[p] for p in profes))
+
+def describir_registro(r: Dict[str, str]) -> str:
+    """Texto 'GRUPO=…, FECHA=…, HORA=…, SALON=…, PROFES={…}' usado en logs y reportes."""
+    pset = {r.get("P1", ""), r.get("P2", "")} - {""}
+    return (
+        f"GRUPO={r.get('GRUPO', '')}, FECHA={r.get('FECHA', '')}, "
+        f"HORA={r.get('HORA', '')}, SALON={r.get('SALON', '')}, "
+        f"PROFES={{{'; '.join(sorted(pset))}}}"
+    )
+
+def cuerpo_discrepancia(r: Dict[str, str], clave: str, fuente: str) -> str:
+    return (
+        f"Discrepancia en materia {r.get('MATERIA', '')} con clave {clave}: "
+        f"Registro presente solo en {fuente} → {describir_registro(r)}"
+    )
+
+def mensaje_discrepancia(i: int, r: Dict[str, str], clave: str, fuente: str) -> str:
+    return f"{i}. {cuerpo_discrepancia(r, clave, fuente)}"
+
+def dedup_por_clave_with_log(rows: List[Dict[str, str]], fuente: str,
+                             tabla: Optional[TablaFirmas] = None) \
+        -> Tuple[Dict[str, Dict[Union[Firma, FirmaCompacta], Dict[str, str]]], List[str], int]:
     """
     Devuelve:
       por_clave[CLAVE][firma] = ejemplo_de_registro
       log_lines: listado de deduplicados colapsados
       total_dedup: cuantos registros se colapsaron
+    Con `tabla`, las firmas son FirmaCompacta (ids de esa tabla) en lugar de cadenas.
     """
-    por_clave: Dict[str, Dict[Firma, Dict[str, str]]] = {}
-    counts: Dict[str, Dict[Firma, int]] = {}
+    por_clave: Dict[str, Dict[Union[Firma, FirmaCompacta], Dict[str, str]]] = {}
+    counts: Dict[str, Dict[Union[Firma, FirmaCompacta], int]] = {}
+    hacer_firma = tabla.firma if tabla is not None else firma_sin_materia
 
     for r in rows:
         clave = str(r.get("CLAVE", "")).strip()
         if not clave:
             continue
-        f = firma_sin_materia(r)
+        f = hacer_firma(r)
         por_clave.setdefault(clave, {})
         counts.setdefault(clave, {})
         counts[clave][f] = counts[clave].get(f, 0) + 1
@@ -49,12 +140,9 @@ def dedup_por_clave_with_log(rows: List[Dict[str, str]], fuente: str) \
             if c > 1:
                 total_dedup += (c - 1)
                 r = por_clave[clave][f]
-                pset = {r.get("P1", ""), r.get("P2", "")} - {""}
                 log_lines.append(
                     f"- [{fuente}] CLAVE {clave}: colapsados {c-1} duplicados → "
-                    f"GRUPO={r.get('GRUPO', '')}, FECHA={r.get('FECHA', '')}, "
-                    f"HORA={r.get('HORA', '')}, SALON={r.get('SALON', '')}, "
-                    f"PROFES={{{'; '.join(sorted(pset))}}}"
+                    f"{describir_registro(r)}"
                 )
     return por_clave, log_lines, total_dedup
 
@@ -68,6 +156,67 @@ class ComparisonResult:
     logB: List[str]
     totA: int
     totB: int
+    # discrepancias estructuradas (mismo orden que `mensajes`), usadas por el modo delta
+    discrep_rows: List[Dict[str, str]] = field(default_factory=list)
+    # nombres de las fuentes, usados en los encabezados del reporte
+    source_a: str = "doc.pdf"
+    source_b: str = "INGENIERIA EN COMPUTACION.pdf"
+
+def fila_discrepancia(r: Dict[str, str], clave: str, fuente: str) -> Dict[str, str]:
+    return {
+        "FUENTE": fuente,
+        "CLAVE":  clave,
+        "GRUPO":  r.get("GRUPO", ""),
+        "MATERIA": r.get("MATERIA", ""),
+        "P1":     r.get("P1", ""),
+        "P2":     r.get("P2", ""),
+        "FECHA":  r.get("FECHA", ""),
+        "HORA":   r.get("HORA", ""),
+        "SALON":  r.get("SALON", ""),
+    }
+
+def ordenar_claves(claves) -> List[str]:
+    return sorted(claves, key=lambda x: int(x) if x.isdigit() else x)
+
+def comparar_clave(
+    clave: str,
+    A_c: Dict[FirmaCompacta, Dict[str, str]],
+    B_c: Dict[FirmaCompacta, Dict[str, str]],
+    orden,
+    source_a: str,
+    source_b: str,
+) -> Tuple[List[Dict[str, str]], List[Tuple[Dict[str, str], str]]]:
+    """
+    Compara las firmas de una sola CLAVE.
+    Devuelve (coincid_rows, discrepancias) donde discrepancias = [(registro, fuente)],
+    primero las solo-A y luego las solo-B, cada grupo en orden de firma; sin numerar.
+    """
+    A_firmas = set(A_c.keys())
+    B_firmas = set(B_c.keys())
+
+    inter = A_firmas & B_firmas
+    a_only = A_firmas - B_firmas
+    b_only = B_firmas - A_firmas
+
+    # coincidencias
+    coincid_rows: List[Dict[str, str]] = []
+    for f in sorted(inter, key=orden):
+        rec = A_c.get(f) or B_c.get(f)
+        coincid_rows.append({
+            "CLAVE":  clave,
+            "GRUPO":  rec.get("GRUPO", ""),
+            "MATERIA": rec.get("MATERIA", ""),
+            "P1":     rec.get("P1", ""),
+            "P2":     rec.get("P2", ""),
+            "FECHA":  rec.get("FECHA", ""),
+            "HORA":   rec.get("HORA", ""),
+            "SALON":  rec.get("SALON", ""),
+        })
+
+    # discrepancias solo en A, luego solo en B
+    discrep = [(A_c[f], source_a) for f in sorted(a_only, key=orden)]
+    discrep += [(B_c[f], source_b) for f in sorted(b_only, key=orden)]
+    return coincid_rows, discrep
 
 def comparar_sets(
     A_rows: List[Dict[str, str]],
@@ -76,69 +225,30 @@ def comparar_sets(
     source_b: str = "INGENIERIA EN COMPUTACION.pdf"
 ) -> ComparisonResult:
 
-    A, logA, totA = dedup_por_clave_with_log(A_rows, source_a)
-    B, logB, totB = dedup_por_clave_with_log(B_rows, source_b)
+    tabla = TablaFirmas()
+    A, logA, totA = dedup_por_clave_with_log(A_rows, source_a, tabla)
+    B, logB, totB = dedup_por_clave_with_log(B_rows, source_b, tabla)
 
-    claves = sorted(
-        set(A.keys()) | set(B.keys()),
-        key=lambda x: int(x) if x.isdigit() else x
-    )
+    claves = ordenar_claves(set(A.keys()) | set(B.keys()))
 
     coincidencias = 0
     discrepancias = 0
     msgs: List[str] = []
     coincid_rows: List[Dict[str, str]] = []
+    discrep_rows: List[Dict[str, str]] = []
     i = 1
 
     for clave in claves:
-        A_firmas = set(A.get(clave, {}).keys())
-        B_firmas = set(B.get(clave, {}).keys())
-
-        inter = A_firmas & B_firmas
-        a_only = A_firmas - B_firmas
-        b_only = B_firmas - A_firmas
-
-        coincidencias += len(inter)
-        discrepancias += len(a_only) + len(b_only)
-
-        # coincidencias
-        for f in sorted(inter, key=firma_sort_key):
-            rec = A.get(clave, {}).get(f) or B.get(clave, {}).get(f)
-            coincid_rows.append({
-                "CLAVE":  clave,
-                "GRUPO":  rec.get("GRUPO", ""),
-                "MATERIA": rec.get("MATERIA", ""),
-                "P1":     rec.get("P1", ""),
-                "P2":     rec.get("P2", ""),
-                "FECHA":  rec.get("FECHA", ""),
-                "HORA":   rec.get("HORA", ""),
-                "SALON":  rec.get("SALON", ""),
-            })
-
-        # discrepancias solo en A
-        for f in sorted(a_only, key=firma_sort_key):
-            r = A[clave][f]
-            pset = {r.get("P1", ""), r.get("P2", "")} - {""}
-            msgs.append(
-                f"{i}. Discrepancia en materia {r.get('MATERIA', '')} con clave {clave}: "
-                f"Registro presente solo en {source_a} → "
-                f"GRUPO={r.get('GRUPO', '')}, FECHA={r.get('FECHA', '')}, "
-                f"HORA={r.get('HORA', '')}, SALON={r.get('SALON', '')}, "
-                f"PROFES={{{'; '.join(sorted(pset))}}}"
-            )
-            i += 1
+        coinc, discrep = comparar_clave(
+            clave, A.get(clave, {}), B.get(clave, {}), tabla.sort_key, source_a, source_b
+        )
+        coincidencias += len(coinc)
+        discrepancias += len(discrep)
+        coincid_rows.extend(coinc)
 
-        # discrepancias solo en B
-        for f in sorted(b_only, key=firma_sort_key):
-            r = B[clave][f]
-            pset = {r.get("P1", ""), r.get("P2", "")} - {""}
-            msgs.append(
-                f"{i}. Discrepancia en materia {r.get('MATERIA', '')} con clave {clave}: "
-                f"Registro presente solo en {source_b} → "
-                f"GRUPO={r.get('GRUPO', '')}, FECHA={r.get('FECHA', '')}, "
-                f"HORA={r.get('HORA', '')}, SALON={r.get('SALON', '')}, "
-                f"PROFES={{{'; '.join(sorted(pset))}}}"
-            )
+        for r, fuente in discrep:
+            msgs.append(mensaje_discrepancia(i, r, clave, fuente))
+            discrep_rows.append(fila_discrepancia(r, clave, fuente))
             i += 1
 
     return ComparisonResult(
@@ -150,4 +260,7 @@ def comparar_sets(
         logB=logB,
         totA=totA,
         totB=totB,
-    )
\ No newline at end of file
+        discrep_rows=discrep_rows,
+        source_a=source_a,
+        source_b=source_b,
+    )
@@ -0,0 +1,214 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+import csv
+import heapq
+import itertools
+import pickle
+import shutil
+import tempfile
+
+from comparator import firma_sin_materia, firma_sort_key, describir_registro, mensaje_discrepancia
+
+# Registros normalizados que se mantienen en memoria antes de volcar un run ordenado a disco
+MAX_REGISTROS_EN_MEMORIA = 200_000
+# Cuántos runs se abren a la vez durante la fusión (si hay más, se fusiona en varias pasadas)
+MAX_RUNS_ABIERTOS = 64
+
+COLS_COINCIDENCIAS = ["CLAVE", "GRUPO", "MATERIA", "P1", "P2", "FECHA", "HORA", "SALON"]
+
+FUENTE_A, FUENTE_B = 0, 1
+
+# Entrada de un run: (clave_orden, firma_orden, fuente, secuencia, registro).
+# `secuencia` conserva el orden de lectura, así el primer registro de cada firma es el ejemplo
+# (igual que dedup_por_clave_with_log).
+Entrada = Tuple[tuple, tuple, int, int, Dict[str, str]]
+
+def clave_orden(clave: str) -> tuple:
+    # la cadena desempata: "07" y "7" quedan contiguas pero son claves distintas (como en comparar_sets)
+    return (0, int(clave), clave) if clave.isdigit() else (1, 0, clave)
+
+# ---------- Fase 1: runs ordenados en disco ----------
+
+def _volcar_run(buffer: List[Entrada], dir_tmp: Path, n: int) -> Path:
+    buffer.sort(key=lambda e: e[:4])
+    path = dir_tmp / f"run_{n:05d}.pkl"
+    with open(path, "wb") as f:
+        for e in buffer:
+            pickle.dump(e, f, protocol=pickle.HIGHEST_PROTOCOL)
+    buffer.clear()
+    return path
+
+def _leer_run(path: Path) -> Iterator[Entrada]:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def generar_runs(
+    fuentes: Iterable[Tuple[int, Iterable[Dict[str, str]]]],
+    dir_tmp: Path,
+    max_en_memoria: int = MAX_REGISTROS_EN_MEMORIA,
+) -> Tuple[List[Path], Dict[int, int]]:
+    """Lee las fuentes en streaming y vuelca runs ordenados por (CLAVE, firma, fuente, orden)."""
+    runs: List[Path] = []
+    leidos = {FUENTE_A: 0, FUENTE_B: 0}
+    buffer: List[Entrada] = []
+    seq = 0
+    for fuente, rows in fuentes:
+        for r in rows:
+            clave = str(r.get("CLAVE", "")).strip()
+            if not clave:
+                continue
+            buffer.append((clave_orden(clave), firma_sort_key(firma_sin_materia(r)), fuente, seq, r))
+            seq += 1
+            leidos[fuente] += 1
+            if len(buffer) >= max_en_memoria:
+                runs.append(_volcar_run(buffer, dir_tmp, len(runs)))
+    if buffer:
+        runs.append(_volcar_run(buffer, dir_tmp, len(runs)))
+    return runs, leidos
+
+def _fusionar(runs: List[Path]) -> Iterator[Entrada]:
+    return heapq.merge(*(_leer_run(p) for p in runs), key=lambda e: e[:4])
+
+def reducir_runs(runs: List[Path], dir_tmp: Path, max_abiertos: int = MAX_RUNS_ABIERTOS) -> List[Path]:
+    """Fusiona runs por grupos hasta que queden a lo más `max_abiertos`."""
+    pasada = 0
+    while len(runs) > max_abiertos:
+        nuevos: List[Path] = []
+        for i in range(0, len(runs), max_abiertos):
+            grupo = runs[i:i + max_abiertos]
+            path = dir_tmp / f"merge_{pasada:02d}_{len(nuevos):05d}.pkl"
+            with open(path, "wb") as f:
+                for e in _fusionar(grupo):
+                    pickle.dump(e, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for p in grupo:
+                p.unlink()
+            nuevos.append(path)
+        runs = nuevos
+        pasada += 1
+    return runs
+
+# ---------- Fase 2: merge-join en streaming ----------
+
+@dataclass
+class ResumenExterno:
+    coincidencias: int
+    discrepancias: int
+    totA: int
+    totB: int
+    registrosA: int
+    registrosB: int
+    runs: int
+
+def comparar_externo(
+    A_rows: Iterable[Dict[str, str]],
+    B_rows: Iterable[Dict[str, str]],
+    out_txt: Path,
+    out_csv: Path,
+    source_a: str = "doc.pdf",
+    source_b: str = "INGENIERIA EN COMPUTACION.pdf",
+    max_en_memoria: int = MAX_REGISTROS_EN_MEMORIA,
+    dir_tmp: Optional[Path] = None,
+) -> ResumenExterno:
+    """
+    Variante de comparar_sets con memoria acotada para entradas muy grandes.
+    Misma deduplicación, numeración y orden de discrepancias; las coincidencias se
+    escriben en CSV y los deduplicados quedan ordenados por CLAVE/firma (no por aparición).
+    """
+    tmp = Path(tempfile.mkdtemp(prefix="comparador_", dir=dir_tmp))
+    try:
+        runs, leidos = generar_runs(
+            [(FUENTE_A, A_rows), (FUENTE_B, B_rows)], tmp, max_en_memoria
+        )
+        n_runs = len(runs)
+        runs = reducir_runs(runs, tmp)
+
+        fuentes = {FUENTE_A: source_a, FUENTE_B: source_b}
+        coincidencias = discrepancias = 0
+        tot = {FUENTE_A: 0, FUENTE_B: 0}
+        i = 1
+
+        with open(out_csv, "w", newline="", encoding="utf-8-sig") as f_csv, \
+                open(tmp / "log_a.txt", "w", encoding="utf-8") as f_log_a, \
+                open(tmp / "log_b.txt", "w", encoding="utf-8") as f_log_b, \
+                open(tmp / "discrepancias.txt", "w", encoding="utf-8") as f_disc:
+            w = csv.DictWriter(f_csv, fieldnames=COLS_COINCIDENCIAS)
+            w.writeheader()
+            logs = {FUENTE_A: f_log_a, FUENTE_B: f_log_b}
+
+            for (ck, clave_entries) in itertools.groupby(_fusionar(runs), key=lambda e: e[0]):
+                solo = {FUENTE_A: [], FUENTE_B: []}
+                clave = ""
+                for _, firma_entries in itertools.groupby(clave_entries, key=lambda e: e[1]):
+                    ejemplo: Dict[int, Dict[str, str]] = {}
+                    cuenta = {FUENTE_A: 0, FUENTE_B: 0}
+                    for _, _, fuente, _, r in firma_entries:
+                        clave = str(r.get("CLAVE", "")).strip()
+                        cuenta[fuente] += 1
+                        ejemplo.setdefault(fuente, r)
+
+                    for fuente, c in cuenta.items():
+                        if c > 1:
+                            tot[fuente] += c - 1
+                            logs[fuente].write(
+                                f"- [{fuentes[fuente]}] CLAVE {clave}: colapsados {c-1} duplicados → "
+                                f"{describir_registro(ejemplo[fuente])}\n"
+                            )
+
+                    if len(ejemplo) == 2:
+                        coincidencias += 1
+                        rec = ejemplo[FUENTE_A]
+                        w.writerow({
+                            "CLAVE": clave,
+                            **{k: rec.get(k, "") for k in COLS_COINCIDENCIAS[1:]},
+                        })
+                    else:
+                        fuente, rec = next(iter(ejemplo.items()))
+                        solo[fuente].append(rec)
+
+                # mismo orden que comparar_sets: primero solo en A, luego solo en B
+                for fuente in (FUENTE_A, FUENTE_B):
+                    for r in solo[fuente]:
+                        f_disc.write(mensaje_discrepancia(i, r, clave, fuentes[fuente]) + "\n")
+                        discrepancias += 1
+                        i += 1
+
+        _ensamblar_reporte(out_txt, tmp, coincidencias, discrepancias, tot, source_a, source_b)
+        return ResumenExterno(
+            coincidencias=coincidencias,
+            discrepancias=discrepancias,
+            totA=tot[FUENTE_A],
+            totB=tot[FUENTE_B],
+            registrosA=leidos[FUENTE_A],
+            registrosB=leidos[FUENTE_B],
+            runs=n_runs,
+        )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _ensamblar_reporte(out_txt: Path, tmp: Path, coincidencias: int, discrepancias: int,
+                       tot: Dict[int, int], source_a: str, source_b: str):
+    """Mismo formato que report.write_report_txt, copiando las secciones desde disco."""
+    with open(out_txt, "w", encoding="utf-8") as f:
+        f.write(f"Total de coincidencias: {coincidencias}\n")
+        f.write(f"Total de Discrepancias: {discrepancias}\n")
+
+        if tot[FUENTE_A] or tot[FUENTE_B]:
+            f.write("\n=== Deduplicados internos (colapsados antes de comparar) ===\n")
+            for fuente, nombre, log in ((FUENTE_A, source_a, "log_a.txt"), (FUENTE_B, source_b, "log_b.txt")):
+                if tot[fuente]:
+                    f.write(f"[{nombre}] Total deduplicados: {tot[fuente]}\n")
+                    with open(tmp / log, "r", encoding="utf-8") as src:
+                        shutil.copyfileobj(src, f)
+
+        f.write("\n=== Discrepancias ===\n")
+        if discrepancias:
+            with open(tmp / "discrepancias.txt", "r", encoding="utf-8") as src:
+                shutil.copyfileobj(src, f)
+        else:
+            f.write("Sin discrepancias.\n")
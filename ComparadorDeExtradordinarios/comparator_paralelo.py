@@ -0,0 +1,148 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional
+import os
+import zlib
+
+from comparator import (
+    ComparisonResult, TablaFirmas, dedup_por_clave_with_log, comparar_clave,
+    ordenar_claves, cuerpo_discrepancia, fila_discrepancia, comparar_sets,
+)
+
+# Por debajo de este número de registros no vale la pena pagar el costo de los procesos
+MIN_REGISTROS_PARALELO = 20_000
+
+# Resultado de un shard: por CLAVE → (coincid_rows, [(cuerpo_msg, fila_discrepancia)]),
+# logs por CLAVE de cada fuente y totales de deduplicados.
+ResultadoShard = Tuple[
+    Dict[str, Tuple[List[Dict[str, str]], List[Tuple[str, Dict[str, str]]]]],
+    Dict[str, List[str]],
+    Dict[str, List[str]],
+    int,
+    int,
+]
+
+def shard_de(clave: str, n_shards: int) -> int:
+    # crc32 en lugar de hash(): debe ser estable entre procesos (PYTHONHASHSEED)
+    return zlib.crc32(clave.encode("utf-8")) % n_shards
+
+def particionar(rows: List[Dict[str, str]], n_shards: int) \
+        -> Tuple[List[List[Dict[str, str]]], Dict[str, int]]:
+    """
+    Reparte los registros por CLAVE conservando su orden relativo.
+    También devuelve la posición de primera aparición de cada CLAVE, que es el orden
+    en que dedup_por_clave_with_log emite sus líneas de log.
+    """
+    shards: List[List[Dict[str, str]]] = [[] for _ in range(n_shards)]
+    primera: Dict[str, int] = {}
+    for r in rows:
+        clave = str(r.get("CLAVE", "")).strip()
+        if not clave:
+            continue
+        if clave not in primera:
+            primera[clave] = len(primera)
+        shards[shard_de(clave, n_shards)].append(r)
+    return shards, primera
+
+def _logs_por_clave(log_lines: List[str], fuente: str) -> Dict[str, List[str]]:
+    # las líneas tienen la forma "- [fuente] CLAVE <clave>: colapsados …"
+    prefijo = f"- [{fuente}] CLAVE "
+    por_clave: Dict[str, List[str]] = {}
+    for line in log_lines:
+        clave = line[len(prefijo):].split(":", 1)[0]
+        por_clave.setdefault(clave, []).append(line)
+    return por_clave
+
+def procesar_shard(
+    A_rows: List[Dict[str, str]],
+    B_rows: List[Dict[str, str]],
+    source_a: str,
+    source_b: str,
+) -> ResultadoShard:
+    """Deduplica y compara un shard completo (se ejecuta en un proceso del pool)."""
+    tabla = TablaFirmas()
+    A, logA, totA = dedup_por_clave_with_log(A_rows, source_a, tabla)
+    B, logB, totB = dedup_por_clave_with_log(B_rows, source_b, tabla)
+
+    por_clave = {}
+    for clave in set(A.keys()) | set(B.keys()):
+        coinc, discrep = comparar_clave(
+            clave, A.get(clave, {}), B.get(clave, {}), tabla.sort_key, source_a, source_b
+        )
+        por_clave[clave] = (
+            coinc,
+            [(cuerpo_discrepancia(r, clave, f), fila_discrepancia(r, clave, f)) for r, f in discrep],
+        )
+    return por_clave, _logs_por_clave(logA, source_a), _logs_por_clave(logB, source_b), totA, totB
+
+def _unir_logs(logs: Dict[str, List[str]], primera: Dict[str, int]) -> List[str]:
+    out: List[str] = []
+    for clave in sorted(logs, key=primera.__getitem__):
+        out.extend(logs[clave])
+    return out
+
+def comparar_sets_paralelo(
+    A_rows: List[Dict[str, str]],
+    B_rows: List[Dict[str, str]],
+    source_a: str = "doc.pdf",
+    source_b: str = "INGENIERIA EN COMPUTACION.pdf",
+    n_workers: Optional[int] = None,
+    n_shards: Optional[int] = None,
+) -> ComparisonResult:
+    """
+    Igual que comparar_sets, pero particiona por hash de CLAVE y procesa cada shard
+    en un ProcessPoolExecutor. El resultado (numeración y orden de mensajes,
+    coincid_rows y logs) es idéntico al secuencial.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    n_shards = n_shards or n_workers
+    if n_workers <= 1 or len(A_rows) + len(B_rows) < MIN_REGISTROS_PARALELO:
+        return comparar_sets(A_rows, B_rows, source_a, source_b)
+
+    shards_a, primera_a = particionar(A_rows, n_shards)
+    shards_b, primera_b = particionar(B_rows, n_shards)
+
+    por_clave = {}
+    logs_a: Dict[str, List[str]] = {}
+    logs_b: Dict[str, List[str]] = {}
+    totA = totB = 0
+    with ProcessPoolExecutor(max_workers=n_workers) as ex:
+        futs = [
+            ex.submit(procesar_shard, shards_a[k], shards_b[k], source_a, source_b)
+            for k in range(n_shards)
+        ]
+        for fut in futs:
+            pc, la, lb, ta, tb = fut.result()
+            por_clave.update(pc)
+            logs_a.update(la)
+            logs_b.update(lb)
+            totA += ta
+            totB += tb
+
+    coincidencias = 0
+    msgs: List[str] = []
+    coincid_rows: List[Dict[str, str]] = []
+    discrep_rows: List[Dict[str, str]] = []
+    i = 1
+    for clave in ordenar_claves(por_clave.keys()):
+        coinc, discrep = por_clave[clave]
+        coincidencias += len(coinc)
+        coincid_rows.extend(coinc)
+        for cuerpo, fila in discrep:
+            msgs.append(f"{i}. {cuerpo}")
+            discrep_rows.append(fila)
+            i += 1
+
+    return ComparisonResult(
+        coincidencias=coincidencias,
+        discrepancias=len(msgs),
+        mensajes=msgs,
+        coincid_rows=coincid_rows,
+        logA=_unir_logs(logs_a, primera_a),
+        logB=_unir_logs(logs_b, primera_b),
+        totA=totA,
+        totB=totB,
+        discrep_rows=discrep_rows,
+        source_a=source_a,
+        source_b=source_b,
+    )
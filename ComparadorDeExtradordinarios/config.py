@@ -6,8 +6,13 @@ BASE_DIR = Path(__file__).resolve().parent
 DOC_PATH  = BASE_DIR / "doc.pdf"
 DIAG_PATH = BASE_DIR / "INGENIERIA EN COMPUTACION.pdf"
 
+# La carpeta se crea al escribir los reportes (no al importar este módulo)
 OUT_DIR = BASE_DIR / ("out")
-OUT_DIR.mkdir(exist_ok=True, parents=True)
 
 OUT_TXT = OUT_DIR / "reporte_comparacion.txt"
-OUT_XLSX = OUT_DIR / "coincidencias.xlsx"
\ No newline at end of file
+OUT_XLSX = OUT_DIR / "coincidencias.xlsx"
+OUT_CSV  = OUT_DIR / "coincidencias.csv"    # modo --externo
+
+# Historial de ejecuciones (modo delta)
+OUT_HIST  = OUT_DIR / "historial.json"
+OUT_DELTA = OUT_DIR / "reporte_delta.txt"
\ No newline at end of file
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from comparator import describir_registro, firma_sin_materia
+from normalizers import norm_prof
+
+# Salones que no se pueden ocupar dos veces (VIRTUAL y N/D no son un lugar físico)
+SALONES_SIN_CONFLICTO = {"", "VIRTUAL", "N/D"}
+
+_RANGO = re.compile(r"^(\d{2}):(\d{2})-(\d{2}):(\d{2})$")
+
+@dataclass
+class Conflicto:
+    tipo: str       # "SALON" o "PROFESOR"
+    fecha: str
+    recurso: str    # salón o nombre normalizado del profesor
+    traslape: str   # "HH:MM-HH:MM" común a ambos registros
+    a: Dict[str, str]
+    fuente_a: str
+    b: Dict[str, str]
+    fuente_b: str
+
+def rango_minutos(hora: str) -> Optional[Tuple[int, int]]:
+    """'10:00-12:00' (salida de norm_hora) → (600, 720); None si no es un rango válido."""
+    m = _RANGO.match(hora or "")
+    if not m:
+        return None
+    h1, m1, h2, m2 = map(int, m.groups())
+    ini, fin = h1 * 60 + m1, h2 * 60 + m2
+    return (ini, fin) if fin > ini else None
+
+def _hhmm(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+def _mismo_examen(a: Dict[str, str], b: Dict[str, str]) -> bool:
+    """
+    Misma CLAVE y mismo GRUPO: es el mismo examen (si las fuentes difieren ya es discrepancia).
+    Misma CLAVE y misma HORA: examen conjunto de varios grupos en el mismo salón.
+    """
+    return a.get("CLAVE") == b.get("CLAVE") and (
+        a.get("GRUPO") == b.get("GRUPO") or a.get("HORA") == b.get("HORA")
+    )
+
+def _eventos(rows_a, rows_b, source_a, source_b):
+    """Une ambas fuentes en eventos únicos (CLAVE + firma); un evento presente en las dos se cuenta una vez."""
+    eventos: Dict[tuple, Tuple[Dict[str, str], List[str]]] = {}
+    for rows, fuente in ((rows_a, source_a), (rows_b, source_b)):
+        for r in rows:
+            _, fuentes = eventos.setdefault((r.get("CLAVE", ""), firma_sin_materia(r)), (r, []))
+            if fuente not in fuentes:
+                fuentes.append(fuente)
+    return [(r, " y ".join(fuentes)) for r, fuentes in eventos.values()]
+
+def _barrido(intervalos: List[Tuple[int, int, int]], eventos, tipo: str, fecha: str, recurso: str,
+             salida: List[Conflicto]) -> None:
+    """
+    Sort-and-sweep: intervalos (ini, fin, i) ordenados por inicio; `activos` es un heap por fin.
+    Al llegar un intervalo se descartan los que ya terminaron (fin <= ini: 10-12 y 12-14 no chocan)
+    y todos los que quedan se traslapan con él. O(n log n + conflictos) por grupo.
+    """
+    activos: List[Tuple[int, int, int]] = []
+    for ini, fin, i in sorted(intervalos):
+        while activos and activos[0][0] <= ini:
+            heapq.heappop(activos)
+        for fin_j, ini_j, j in sorted(activos, key=lambda x: (x[1], x[0], x[2])):
+            a, fuente_a = eventos[j]
+            b, fuente_b = eventos[i]
+            if _mismo_examen(a, b):
+                continue
+            salida.append(Conflicto(
+                tipo=tipo, fecha=fecha, recurso=recurso,
+                traslape=f"{_hhmm(max(ini, ini_j))}-{_hhmm(min(fin, fin_j))}",
+                a=a, fuente_a=fuente_a, b=b, fuente_b=fuente_b,
+            ))
+        heapq.heappush(activos, (fin, ini, i))
+
+def detectar_conflictos(
+    rows_a: List[Dict[str, str]],
+    rows_b: List[Dict[str, str]],
+    source_a: str = "doc.pdf",
+    source_b: str = "INGENIERIA EN COMPUTACION.pdf",
+) -> List[Conflicto]:
+    """
+    Salones y profesores ocupados dos veces el mismo día con horas traslapadas,
+    dentro de un PDF o entre ambos. Agrupa por (FECHA, SALON) y por (FECHA, profesor)
+    y recorre cada grupo con un barrido de intervalos en lugar de comparar todos los pares.
+    Los registros sin FECHA o sin rango de HORA no se revisan.
+    """
+    eventos = _eventos(rows_a, rows_b, source_a, source_b)
+
+    grupos: Dict[Tuple[str, str, str], List[Tuple[int, int, int]]] = {}
+    for i, (r, _) in enumerate(eventos):
+        fecha = r.get("FECHA", "")
+        rango = rango_minutos(r.get("HORA", ""))
+        if not fecha or rango is None:
+            continue
+        intervalo = (rango[0], rango[1], i)
+        salon = r.get("SALON", "")
+        if salon not in SALONES_SIN_CONFLICTO:
+            grupos.setdefault(("SALON", fecha, salon), []).append(intervalo)
+        for prof in sorted({norm_prof(r.get("P1", "")), norm_prof(r.get("P2", ""))} - {""}):
+            grupos.setdefault(("PROFESOR", fecha, prof), []).append(intervalo)
+
+    conflictos: List[Conflicto] = []
+    for (tipo, fecha, recurso) in sorted(grupos):
+        intervalos = grupos[(tipo, fecha, recurso)]
+        if len(intervalos) > 1:
+            _barrido(intervalos, eventos, tipo, fecha, recurso, conflictos)
+    return conflictos
+
+def mensaje_conflicto(i: int, c: Conflicto) -> str:
+    que = "Salón" if c.tipo == "SALON" else "Profesor"
+    return (
+        f"{i}. {que} {c.recurso} ocupado dos veces el {c.fecha} ({c.traslape}):\n"
+        f"   - [{c.fuente_a}] CLAVE {c.a.get('CLAVE', '')} {c.a.get('MATERIA', '')} → {describir_registro(c.a)}\n"
+        f"   - [{c.fuente_b}] CLAVE {c.b.get('CLAVE', '')} {c.b.get('MATERIA', '')} → {describir_registro(c.b)}"
+    )
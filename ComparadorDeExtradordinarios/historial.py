@@ -0,0 +1,110 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+
+from comparator import ComparisonResult, firma_sin_materia
+
+# Cuántas ejecuciones se conservan en el historial (las más antiguas se descartan)
+HISTORIAL_MAX = 20
+
+ClaveDiscrepancia = Tuple[str, ...]
+
+# ---------- Hash de contenido ----------
+
+def hash_archivo(path: Path, chunk: int = 1 << 20) -> str:
+    """SHA-256 del contenido del archivo (no depende de nombre ni fecha de modificación)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(chunk), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def hash_archivos(paths: List[Path]) -> str:
+    """Hash combinado de varios PDFs (con uno solo, coincide con hash_archivo)."""
+    if len(paths) == 1:
+        return hash_archivo(paths[0])
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(hash_archivo(p).encode("ascii"))
+    return h.hexdigest()
+
+# ---------- Serialización ----------
+
+def clave_discrepancia(d: Dict[str, str]) -> ClaveDiscrepancia:
+    """Identidad estable de una discrepancia entre ejecuciones (independiente de la numeración)."""
+    firma = firma_sin_materia(d)
+    return (d.get("FUENTE", ""), d.get("CLAVE", "")) + firma[:4] + tuple(sorted(firma[4]))
+
+# ---------- Store en disco ----------
+
+def cargar_historial(path: Path) -> List[Dict]:
+    if not path.exists():
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[historial] No se pudo leer {path}: {e}. Se inicia un historial nuevo.")
+        return []
+    return data.get("ejecuciones", [])
+
+def ultima_ejecucion(path: Path) -> Optional[Dict]:
+    ejecuciones = cargar_historial(path)
+    return ejecuciones[-1] if ejecuciones else None
+
+def misma_entrada(ejecucion: Optional[Dict], hash_doc: str, hash_diag: str) -> bool:
+    return bool(ejecucion) and ejecucion.get("hash_doc") == hash_doc \
+        and ejecucion.get("hash_diag") == hash_diag
+
+def registrar_ejecucion(
+    path: Path,
+    hash_doc: str,
+    hash_diag: str,
+    result: ComparisonResult,
+) -> Dict:
+    """
+    Agrega la ejecución al historial (escritura atómica) y la devuelve.
+    Solo guarda lo que usa el modo delta: hashes de entrada, totales y discrepancias.
+    """
+    ejecucion = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "hash_doc": hash_doc,
+        "hash_diag": hash_diag,
+        "coincidencias": result.coincidencias,
+        "discrepancias": result.discrepancias,
+        "discrep_rows": result.discrep_rows,
+    }
+    ejecuciones = cargar_historial(path) + [ejecucion]
+    ejecuciones = ejecuciones[-HISTORIAL_MAX:]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"ejecuciones": ejecuciones}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return ejecucion
+
+# ---------- Delta ----------
+
+@dataclass
+class DeltaResult:
+    fecha_anterior: str
+    nuevas: List[Dict[str, str]]
+    resueltas: List[Dict[str, str]]
+
+def calcular_delta(anterior: Dict, actual: Dict) -> DeltaResult:
+    """Discrepancias que aparecieron o se resolvieron entre dos ejecuciones del historial."""
+    prev = anterior.get("discrep_rows", [])
+    curr = actual.get("discrep_rows", [])
+    claves_prev = {clave_discrepancia(d) for d in prev}
+    claves_curr = {clave_discrepancia(d) for d in curr}
+    return DeltaResult(
+        fecha_anterior=anterior.get("fecha", ""),
+        nuevas=[d for d in curr if clave_discrepancia(d) not in claves_prev],
+        resueltas=[d for d in prev if clave_discrepancia(d) not in claves_curr],
+    )
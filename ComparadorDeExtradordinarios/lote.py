@@ -0,0 +1,40 @@
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from api import cargar_manifiesto, ejecutar_lote, resumen_json
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Compara varios pares (doc, diag) descritos en un manifiesto JSON"
+    )
+    ap.add_argument("manifiesto", type=Path, help="JSON con la lista de trabajos {doc, diag, out}")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Procesos del pool (por defecto, uno por núcleo)")
+    ap.add_argument("--resumen", type=Path, default=None,
+                    help="Archivo donde escribir el resumen JSON (por defecto, stdout)")
+    args = ap.parse_args()
+
+    trabajos = cargar_manifiesto(args.manifiesto)
+    print(f"→ {len(trabajos)} trabajo(s) en {args.manifiesto}", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    resumenes = ejecutar_lote(trabajos, max_workers=args.workers)
+    salida = resumen_json(resumenes, time.perf_counter() - t0)
+
+    if args.resumen:
+        args.resumen.parent.mkdir(parents=True, exist_ok=True)
+        args.resumen.write_text(salida + "\n", encoding="utf-8")
+        print(f"→ Resumen JSON → {args.resumen}", file=sys.stderr)
+    else:
+        print(salida)
+
+    for r in resumenes:
+        if not r.ok:
+            print(f"   - {r.nombre}: ERROR {r.error}", file=sys.stderr)
+    sys.exit(0 if all(r.ok for r in resumenes) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,109 @@
 from __future__ import annotations
+import argparse
+from itertools import chain
+from pathlib import Path
 
-from config import DOC_PATH, DIAG_PATH, OUT_TXT, OUT_XLSX
-from parsers import load_doc, load_diag
+from config import DOC_PATH, DIAG_PATH, OUT_DIR, OUT_TXT, OUT_XLSX, OUT_HIST, OUT_DELTA, OUT_CSV
+from parsers import load_doc, load_diag, iter_doc, iter_diag
 from comparator import comparar_sets
-from report import write_report_txt, write_coincidencias_excel
+from comparator_externo import comparar_externo, MAX_REGISTROS_EN_MEMORIA
+from comparator_paralelo import comparar_sets_paralelo
+from conflictos import detectar_conflictos
+from report import write_report_txt, write_coincidencias_excel, write_report_delta_txt
+from historial import (
+    hash_archivos, ultima_ejecucion, misma_entrada, registrar_ejecucion, calcular_delta, DeltaResult
+)
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Comparador de horarios de extraordinarios")
+    ap.add_argument("--doc", nargs="+", type=Path, default=[DOC_PATH],
+                    help="PDF(s) con el formato de doc.pdf (se concatenan)")
+    ap.add_argument("--diag", nargs="+", type=Path, default=[DIAG_PATH],
+                    help="PDF(s) con el formato de INGENIERIA EN COMPUTACION.pdf (se concatenan)")
+    ap.add_argument(
+        "--delta", action="store_true",
+        help="Reporta solo las discrepancias nuevas/resueltas respecto a la ejecución anterior",
+    )
+    ap.add_argument(
+        "--externo", action="store_true",
+        help="Comparación con memoria acotada (runs ordenados en disco + merge-join); "
+             "coincidencias en CSV",
+    )
+    ap.add_argument("--max-registros", type=int, default=MAX_REGISTROS_EN_MEMORIA,
+                    help="Registros en memoria por run en modo --externo")
+    ap.add_argument("--paralelo", type=int, default=0, metavar="N",
+                    help="Compara en N procesos particionando por CLAVE (0 = secuencial)")
+    args = ap.parse_args()
+    if args.delta and args.externo:
+        ap.error("--delta no está disponible con --externo (el modo externo no guarda historial)")
+    return args
+
+def main_externo(args):
+    print("→ Comparando en modo externo (streaming por página)…")
+    res = comparar_externo(
+        chain.from_iterable(iter_doc(p) for p in args.doc),
+        chain.from_iterable(iter_diag(p) for p in args.diag),
+        OUT_TXT, OUT_CSV,
+        max_en_memoria=args.max_registros,
+    )
+    print("=== RESULTADO ===")
+    print(f"Registros leídos: {res.registrosA} + {res.registrosB} ({res.runs} runs en disco)")
+    print(f"Total de coincidencias: {res.coincidencias}")
+    print(f"Total de Discrepancias: {res.discrepancias}")
+    print(f"Informe TXT → {OUT_TXT}")
+    print(f"Coincidencias CSV → {OUT_CSV}")
 
 def main():
+    args = parse_args()
+    OUT_DIR.mkdir(exist_ok=True, parents=True)
+    if args.externo:
+        return main_externo(args)
+
+    hash_doc, hash_diag = hash_archivos(args.doc), hash_archivos(args.diag)
+    anterior = ultima_ejecucion(OUT_HIST)
+    if args.delta and misma_entrada(anterior, hash_doc, hash_diag):
+        print(f"→ Los PDFs no cambiaron desde la ejecución del {anterior['fecha']}; se omite la comparación.")
+        print(f"Total de coincidencias: {anterior['coincidencias']}")
+        print(f"Total de Discrepancias: {anterior['discrepancias']}")
+        # el reporte delta de una corrida anterior no debe quedar como si fuera el actual
+        write_report_delta_txt(OUT_DELTA, DeltaResult(anterior["fecha"], [], []), sin_cambios=True)
+        print(f"Informe delta (sin cambios) → {OUT_DELTA}")
+        return
+
     print("→ Extrayendo doc.pdf…")
-    rows_doc = load_doc(DOC_PATH)
+    rows_doc = [r for p in args.doc for r in load_doc(p)]
 
     print("→ Extrayendo INGENIERIA EN COMPUTACION.pdf…")
-    rows_diag = load_diag(DIAG_PATH)
+    rows_diag = [r for p in args.diag for r in load_diag(p)]
 
     print("→ Colapsando duplicados internos y comparando…")
-    result = comparar_sets(rows_doc, rows_diag)
+    if args.paralelo:
+        result = comparar_sets_paralelo(rows_doc, rows_diag, n_workers=args.paralelo)
+    else:
+        result = comparar_sets(rows_doc, rows_diag)
 
-    write_report_txt(OUT_TXT, result)
+    print("→ Buscando conflictos de salón y profesor…")
+    conflictos = detectar_conflictos(rows_doc, rows_diag)
+
+    write_report_txt(OUT_TXT, result, conflictos)
     write_coincidencias_excel(OUT_XLSX, result)
+    actual = registrar_ejecucion(OUT_HIST, hash_doc, hash_diag, result)
 
     print("=== RESULTADO ===")
     print(f"Total de coincidencias: {result.coincidencias}")
     print(f"Total de Discrepancias: {result.discrepancias}")
+    print(f"Conflictos de horario: {len(conflictos)}")
     print(f"Informe TXT → {OUT_TXT}")
     print(f"Coincidencias Excel → {OUT_XLSX}")
 
+    if args.delta:
+        if anterior is None:
+            print("→ No hay ejecución previa en el historial; el informe completo es la referencia.")
+            return
+        delta = calcular_delta(anterior, actual)
+        write_report_delta_txt(OUT_DELTA, delta)
+        print(f"Discrepancias nuevas: {len(delta.nuevas)} | resueltas: {len(delta.resueltas)}")
+        print(f"Informe delta → {OUT_DELTA}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
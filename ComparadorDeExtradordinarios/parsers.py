@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 import re
 
 import pymupdf
@@ -64,22 +64,28 @@ def rows_from_doc_matrix(matrix: List[List[str]]) -> List[Dict[str, str]]:
             out.append(rec)
     return out
 
-def load_doc(path: str) -> List[Dict[str, str]]:
+def _iter_pdf_rows(path: str, rows_from_matrix) -> Iterator[Dict[str, str]]:
+    """Recorre el PDF página por página y emite registros limpios (sin cargar todo en memoria)."""
     doc = pymupdf.open(path)
     try:
-        rows: List[Dict[str, str]] = []
         for p in doc:
             for m in extract_tables(p):
-                rows.extend(rows_from_doc_matrix(m))
-        for r in rows:
-            for k in r:
-                r[k] = str(r[k]).strip()
-        rows = [r for r in rows if r["CLAVE"]]
-        print(f"[{path}] filas extraídas: {len(rows)}")
-        return rows
+                for r in rows_from_matrix(m):
+                    for k in r:
+                        r[k] = str(r[k]).strip()
+                    if r["CLAVE"]:
+                        yield r
     finally:
         doc.close()
 
+def iter_doc(path: str) -> Iterator[Dict[str, str]]:
+    return _iter_pdf_rows(path, rows_from_doc_matrix)
+
+def load_doc(path: str) -> List[Dict[str, str]]:
+    rows = list(iter_doc(path))
+    print(f"[{path}] filas extraídas: {len(rows)}")
+    return rows
+
 # ---------- INGENIERIA EN COMPUTACION.pdf ----------
 
 def indices_diag(header_norm: List[str]) -> Dict[str, Optional[int]]:
@@ -199,18 +205,10 @@ def rows_from_diag_matrix(matrix: List[List[str]]) -> List[Dict[str, str]]:
             out.append(rec)
     return out
 
+def iter_diag(path: str) -> Iterator[Dict[str, str]]:
+    return _iter_pdf_rows(path, rows_from_diag_matrix)
+
 def load_diag(path: str) -> List[Dict[str, str]]:
-    doc = pymupdf.open(path)
-    try:
-        rows: List[Dict[str, str]] = []
-        for p in doc:
-            for m in extract_tables(p):
-                rows.extend(rows_from_diag_matrix(m))
-        for r in rows:
-            for k in r:
-                r[k] = str(r[k]).strip()
-        rows = [r for r in rows if r["CLAVE"]]
-        print(f"[{path}] filas extraídas: {len(rows)}")
-        return rows
-    finally:
-        doc.close()
\ No newline at end of file
+    rows = list(iter_diag(path))
+    print(f"[{path}] filas extraídas: {len(rows)}")
+    return rows
\ No newline at end of file
@@ -1,10 +1,13 @@
 from __future__ import annotations
 from pathlib import Path
-import pandas as pd
+from typing import List, Optional
 
-from comparator import ComparisonResult
+from comparator import ComparisonResult, mensaje_discrepancia
+from conflictos import Conflicto, mensaje_conflicto
+from historial import DeltaResult
 
-def write_report_txt(out_txt: Path, result: ComparisonResult):
+def write_report_txt(out_txt: Path, result: ComparisonResult,
+                     conflictos: Optional[List[Conflicto]] = None):
     with open(out_txt, "w", encoding="utf-8") as f:
         f.write(f"Total de coincidencias: {result.coincidencias}\n")
         f.write(f"Total de Discrepancias: {result.discrepancias}\n")
@@ -13,11 +16,11 @@ def write_report_txt(out_txt: Path, result: ComparisonResult):
         if result.logA or result.logB:
             f.write("\n=== Deduplicados internos (colapsados antes de comparar) ===\n")
             if result.logA:
-                f.write(f"[doc.pdf] Total deduplicados: {result.totA}\n")
+                f.write(f"[{result.source_a}] Total deduplicados: {result.totA}\n")
                 for line in result.logA:
                     f.write(line + "\n")
             if result.logB:
-                f.write(f"[INGENIERIA EN COMPUTACION.pdf] Total deduplicados: {result.totB}\n")
+                f.write(f"[{result.source_b}] Total deduplicados: {result.totB}\n")
                 for line in result.logB:
                     f.write(line + "\n")
 
@@ -28,7 +31,35 @@ def write_report_txt(out_txt: Path, result: ComparisonResult):
         else:
             f.write("Sin discrepancias.\n")
 
+        # Sección de conflictos (salón o profesor con horas traslapadas el mismo día)
+        if conflictos is not None:
+            f.write(f"\n=== Conflictos de horario ({len(conflictos)}) ===\n")
+            if conflictos:
+                f.write("\n".join(mensaje_conflicto(i, c) for i, c in enumerate(conflictos, start=1)) + "\n")
+            else:
+                f.write("Sin conflictos.\n")
+
+def write_report_delta_txt(out_txt: Path, delta: DeltaResult, sin_cambios: bool = False):
+    """Con `sin_cambios`, los PDFs son los de la ejecución anterior y no se volvió a comparar."""
+    with open(out_txt, "w", encoding="utf-8") as f:
+        f.write(f"Comparado contra la ejecución del {delta.fecha_anterior}\n")
+        if sin_cambios:
+            f.write(f"Sin cambios desde la ejecución del {delta.fecha_anterior}: "
+                    "los PDFs son los mismos y no se volvió a comparar.\n")
+        f.write(f"Discrepancias nuevas: {len(delta.nuevas)}\n")
+        f.write(f"Discrepancias resueltas: {len(delta.resueltas)}\n")
+
+        for titulo, filas in (("Nuevas", delta.nuevas), ("Resueltas", delta.resueltas)):
+            f.write(f"\n=== {titulo} ===\n")
+            if not filas:
+                f.write("Ninguna.\n")
+                continue
+            for i, d in enumerate(filas, start=1):
+                f.write(mensaje_discrepancia(i, d, d.get("CLAVE", ""), d.get("FUENTE", "")) + "\n")
+
 def write_coincidencias_excel(out_xlsx: Path, result: ComparisonResult):
+    import pandas as pd  # se carga solo al exportar (junto con openpyxl)
+
     cols = ["CLAVE", "GRUPO", "MATERIA", "P1", "P2", "FECHA", "HORA", "SALON"]
     if result.coincid_rows:
         df = pd.DataFrame(result.coincid_rows, columns=cols)
@@ -0,0 +1,146 @@
+# columnar.py
+"""
+Salida columnar (Parquet) del DataFrame normalizado y lector de muchos archivos.
+
+- Columnas de texto como diccionario (Arrow dictionary<int32, string>): profesor,
+  categoría, asignatura, etc. se repiten mucho y se guardan una sola vez por grupo.
+- Métricas como float64 (igual que en el DataFrame).
+- Columna `archivo` (nombre del PDF de origen) para poder juntar varios departamentos.
+- El archivo se escribe en grupos de filas (row groups) de `filas_por_grupo`; el lector
+  los usa para saltarse grupos con las estadísticas (min/max) de cada columna.
+
+pyarrow se importa al usar estas funciones, no al importar el módulo.
+
+    from columnar import leer_normalizados
+    df = leer_normalizados("out", columnas=["profesor", "clave_asig", "sem_act_total"],
+                           profesores=["JUAN PEREZ", "ANA RUIZ"])
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columnas que produce Normalizador.finish(), en orden
+COLUMNAS_TEXTO = [
+    "no_prof", "profesor", "categoria", "clave_asig", "asignatura",
+    "grupo_anterior", "grupo_actual",
+]
+COLUMNAS_METRICAS = [
+    "sem_ant_teo", "sem_ant_pra", "sem_ant_total",
+    "sem_act_teo", "sem_act_pra", "sem_act_total",
+]
+COLUMNAS_TOTALES = [
+    "TOT_sem_ant_teo", "TOT_sem_ant_pra", "TOT_sem_ant_total",
+    "TOT_sem_act_teo", "TOT_sem_act_pra", "TOT_sem_act_total",
+]
+COLUMNAS = COLUMNAS_TEXTO + COLUMNAS_METRICAS + ["tot_tipo"] + COLUMNAS_TOTALES
+COLUMNA_ARCHIVO = "archivo"
+
+FILAS_POR_GRUPO = 10_000
+SUFIJO = "_normalizado.parquet"
+
+
+def _tipo(col: str):
+    import pyarrow as pa
+
+    if col in COLUMNAS_METRICAS or col in COLUMNAS_TOTALES:
+        return pa.float64()
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def tabla_arrow(df: pd.DataFrame, archivo: str = ""):
+    """DataFrame normalizado -> pyarrow.Table con el esquema fijo (texto como diccionario)."""
+    import pandas as pd
+    import pyarrow as pa
+
+    # columnas conocidas en orden + las que hubiera de más (como texto)
+    columnas = COLUMNAS + [c for c in df.columns if c not in COLUMNAS]
+    arrays, campos = [], []
+    for col in columnas:
+        tipo = _tipo(col)
+        serie = df[col] if col in df.columns else pd.Series([None] * len(df), dtype=object)
+        if pa.types.is_dictionary(tipo):
+            valores = [None if pd.isna(v) else str(v) for v in serie]
+            arrays.append(pa.array(valores, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(pd.to_numeric(serie, errors="coerce"), type=tipo, from_pandas=True))
+        campos.append(pa.field(col, tipo))
+
+    arrays.append(pa.array([archivo] * len(df), type=pa.string()).dictionary_encode())
+    campos.append(pa.field(COLUMNA_ARCHIVO, pa.dictionary(pa.int32(), pa.string())))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(campos))
+
+
+def escribir_parquet(
+    df: pd.DataFrame,
+    out_parquet: Path,
+    archivo: str = "",
+    filas_por_grupo: int = FILAS_POR_GRUPO,
+) -> None:
+    """Escribe el DataFrame en Parquet (zstd, diccionario en las columnas de texto) por grupos de filas."""
+    import pyarrow.parquet as pq
+
+    out_parquet.parent.mkdir(parents=True, exist_ok=True)
+    tabla = tabla_arrow(df, archivo)
+    texto = [f.name for f in tabla.schema if str(f.type).startswith("dictionary")]
+    with pq.ParquetWriter(out_parquet, tabla.schema, compression="zstd", use_dictionary=texto) as writer:
+        writer.write_table(tabla, row_group_size=max(1, filas_por_grupo))
+
+
+def _rutas(origen: Union[str, Path, Iterable[Union[str, Path]]]) -> List[str]:
+    if isinstance(origen, (str, Path)):
+        origen = Path(origen)
+        if origen.is_dir():
+            return [str(p) for p in sorted(origen.glob(f"*{SUFIJO}"))]
+        return [str(origen)]
+    return [str(p) for p in origen]
+
+
+def leer_normalizados(
+    origen: Union[str, Path, Iterable[Union[str, Path]]] = "out",
+    columnas: Optional[List[str]] = None,
+    profesores: Optional[Iterable[str]] = None,
+    filtro=None,
+) -> pd.DataFrame:
+    """
+    Junta varios *_normalizado.parquet (una carpeta, un archivo o una lista de rutas).
+    - columnas: solo estas columnas se leen del disco (proyección);
+    - profesores: solo las filas de estos profesores (se aplica al leer, con las
+      estadísticas de cada grupo de filas);
+    - filtro: expresión de pyarrow.dataset adicional, p. ej. ds.field("sem_act_total") > 10.
+    Las columnas de texto llegan como category.
+    """
+    import pyarrow.dataset as ds
+
+    rutas = _rutas(origen)
+    if not rutas:
+        raise FileNotFoundError(f"No hay archivos *{SUFIJO} en {origen}")
+    dataset = ds.dataset(rutas, format="parquet")
+
+    condicion = filtro
+    if profesores is not None:
+        por_profesor = ds.field("profesor").isin(list(profesores))
+        condicion = por_profesor if condicion is None else condicion & por_profesor
+    return dataset.to_table(columns=columnas, filter=condicion).to_pandas()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Lee y junta salidas *_normalizado.parquet")
+    ap.add_argument("origen", nargs="*", default=["out"], help="Carpetas o archivos (por defecto out/)")
+    ap.add_argument("--columnas", nargs="+", default=None)
+    ap.add_argument("--profesor", nargs="+", default=None, dest="profesores")
+    ap.add_argument("--csv", default=None, help="Guardar el resultado en este CSV")
+    args = ap.parse_args()
+
+    rutas = [r for o in args.origen for r in _rutas(o)]
+    df = leer_normalizados(rutas, columnas=args.columnas, profesores=args.profesores)
+    print(f"{len(df)} filas de {len(rutas)} archivo(s)")
+    if args.csv:
+        df.to_csv(args.csv, index=False, encoding="utf-8-sig")
+        print(f"→ {args.csv}")
+    else:
+        print(df.head(20).to_string())
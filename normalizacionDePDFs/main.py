@@ -1,14 +1,20 @@
 # main.py
 from __future__ import annotations
+import argparse
+import importlib.util
 from pathlib import Path
-from typing import List
-
-import pandas as pd
+from typing import TYPE_CHECKING, List
 
+from columnar import FILAS_POR_GRUPO, escribir_parquet
 from normalizador import normalizar_pdf
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def _exportar_excel(df: pd.DataFrame, out_xlsx: Path) -> None:
+    import pandas as pd  # pandas/xlsxwriter se cargan al exportar, no al arrancar
+
     out_xlsx.parent.mkdir(parents=True, exist_ok=True)
     try:
         with pd.ExcelWriter(out_xlsx, engine="xlsxwriter") as writer:
@@ -32,6 +38,17 @@ def _listar_pdfs_en_cwd() -> List[Path]:
 
 
 def main() -> None:
+    ap = argparse.ArgumentParser(description="Normaliza los PDFs de la carpeta de ejecución")
+    ap.add_argument("--formato", nargs="+", choices=["xlsx", "parquet"], default=["xlsx"],
+                    help="Formatos de salida en out/ (por defecto xlsx)")
+    ap.add_argument("--filas-por-grupo", type=int, default=FILAS_POR_GRUPO,
+                    help="Filas por row group en Parquet")
+    args = ap.parse_args()
+
+    if "parquet" in args.formato and importlib.util.find_spec("pyarrow") is None:
+        print("Falta 'pyarrow', instálalo con: pip install pyarrow")
+        return
+
     pdfs = _listar_pdfs_en_cwd()
     if not pdfs:
         print("No se encontraron PDFs en la ruta de ejecución.")
@@ -47,9 +64,16 @@ def main() -> None:
         try:
             print(f"→ Procesando: {pdf.name} ...", end="", flush=True)
             df = normalizar_pdf(pdf)
-            out_xlsx = out_dir / f"{pdf.stem}_normalizado.xlsx"
-            _exportar_excel(df, out_xlsx)
-            print(f" OK  ({len(df)} filas)  →  {out_xlsx}")
+            salidas = []
+            if "xlsx" in args.formato:
+                out_xlsx = out_dir / f"{pdf.stem}_normalizado.xlsx"
+                _exportar_excel(df, out_xlsx)
+                salidas.append(out_xlsx)
+            if "parquet" in args.formato:
+                out_parquet = out_dir / f"{pdf.stem}_normalizado.parquet"
+                escribir_parquet(df, out_parquet, archivo=pdf.stem, filas_por_grupo=args.filas_por_grupo)
+                salidas.append(out_parquet)
+            print(f" OK  ({len(df)} filas)  →  {', '.join(map(str, salidas))}")
             procesados += 1
         except Exception as e:
             print(" ERROR")
@@ -2,13 +2,15 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, Iterable, Literal, Protocol
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union, Iterable, Literal, Protocol
 import re
 import unicodedata
 
-import pandas as pd
 from extractor import ExtractorCrudo
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 # -----------------------------
 # Utilidades de texto / parsing 
 # -----------------------------
@@ -16,7 +18,11 @@ def nz(s: Any) -> str:
     # Convierte a str; devuelve '' para None/NaN.
     if s is None:
         return ""
+    if isinstance(s, str):
+        return s
     try:
+        import pandas as pd
+
         if pd.isna(s):
             return ""
     except Exception:
@@ -509,6 +515,8 @@ class Normalizador:
             i += 1
 
     def finish(self) -> pd.DataFrame:
+        import pandas as pd  # solo al armar el resultado: importarlo al arrancar cuesta ~0.5 s
+
         df = pd.DataFrame(self.rows)
 
         # Orden natural de aparición
@@ -0,0 +1,108 @@
+"""
+Revisa el costo de arranque de los puntos de entrada de los tres proyectos con
+`python -X importtime` (cada uno en su propio proceso y desde su carpeta, como se ejecutan).
+
+Falla (código 1) si al importar un punto de entrada:
+- se carga un módulo pesado que solo hace falta al exportar o al abrir el navegador
+  (pandas, pyarrow, openpyxl, xlsxwriter, selenium.webdriver.remote, webdriver_manager, bs4);
+- se crea o modifica algún archivo o carpeta (p. ej. out/) en la carpeta del proyecto o en el
+  directorio de trabajo;
+- el tiempo acumulado pasa de --limite-ms (si se indica).
+
+    python verificar_arranque.py
+    python verificar_arranque.py --limite-ms 400 --top 8
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent
+
+# (carpeta del proyecto, módulo)
+ENTRADAS = [
+    ("BotST", "main"),
+    ("BotST", "benchmark_descarga"),
+    ("ComparadorDeExtradordinarios", "main"),
+    ("ComparadorDeExtradordinarios", "lote"),
+    ("normalizacionDePDFs", "main"),
+]
+
+# módulos que no deben cargarse solo por importar un punto de entrada
+PROHIBIDOS = ["pandas", "pyarrow", "openpyxl", "xlsxwriter", "selenium.webdriver.remote", "webdriver_manager", "bs4"]
+
+
+def _listado(carpeta: Path):
+    """Archivos y carpetas (con fecha de modificación), sin __pycache__."""
+    salida = {}
+    for raiz, dirs, archivos in os.walk(carpeta):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for nombre in dirs + archivos:
+            ruta = Path(raiz) / nombre
+            salida[str(ruta.relative_to(carpeta))] = ruta.stat().st_mtime_ns
+    return salida
+
+
+def medir_importacion(carpeta: Path, modulo: str):
+    """
+    Importa `modulo` en un proceso nuevo con -X importtime.
+    Devuelve (ms acumulados, {módulo: ms acumulados}, archivos creados o modificados).
+    """
+    antes = _listado(carpeta)
+    with tempfile.TemporaryDirectory() as cwd:
+        entorno = dict(os.environ, PYTHONPATH=str(carpeta), PYTHONDONTWRITEBYTECODE="1")
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+            cwd=cwd, env=entorno, capture_output=True, text=True,
+        )
+        creados_cwd = sorted(os.listdir(cwd))
+    if proc.returncode != 0:
+        raise RuntimeError(f"no se pudo importar {modulo}:\n{proc.stderr[-2000:]}")
+    despues = _listado(carpeta)
+    cambios = sorted(k for k, v in despues.items() if antes.get(k) != v) + creados_cwd
+
+    tiempos, total = {}, 0.0
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith("import time:") or "[us]" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        ms = int(acumulado) / 1000
+        tiempos[nombre.strip()] = max(ms, tiempos.get(nombre.strip(), 0.0))
+        if nombre.strip() == modulo and not nombre.startswith("  "):
+            total = ms
+    return total, tiempos, cambios
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Verifica el costo de arranque (-X importtime) de los puntos de entrada")
+    ap.add_argument("--limite-ms", type=float, default=None, help="Tiempo máximo de importación por punto de entrada")
+    ap.add_argument("--top", type=int, default=5, help="Módulos más lentos a mostrar por punto de entrada")
+    args = ap.parse_args()
+
+    fallos = 0
+    for proyecto, modulo in ENTRADAS:
+        total, tiempos, cambios = medir_importacion(RAIZ / proyecto, modulo)
+        prohibidos = [p for p in PROHIBIDOS if p in tiempos]
+        lento = args.limite_ms is not None and total > args.limite_ms
+        ok = not prohibidos and not cambios and not lento
+        fallos += not ok
+
+        print(f"{'OK   ' if ok else 'FALLA'} {proyecto}/{modulo}.py: {total:.0f} ms")
+        # solo módulos de primer nivel; "site" es el arranque del intérprete, no del proyecto
+        propios = {k: v for k, v in tiempos.items() if k not in (modulo, "site") and "." not in k}
+        for nombre, ms in sorted(propios.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"      {ms:8.1f} ms  {nombre}")
+        if prohibidos:
+            print(f"      -> carga al importar: {', '.join(prohibidos)}")
+        if cambios:
+            print(f"      -> crea/modifica al importar: {', '.join(cambios)}")
+        if lento:
+            print(f"      -> pasa el límite de {args.limite_ms:.0f} ms")
+
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
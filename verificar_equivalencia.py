@@ -0,0 +1,543 @@
+"""
+Arnés de equivalencia (salida dorada) para las rutas optimizadas de los tres proyectos.
+
+Corre la implementación de referencia y una candidata sobre los mismos fixtures, compara
+los resultados celda por celda (DataFrames, ComparisonResult, listas de registros) y
+reporta la primera diferencia de cada fixture y la aceleración (tiempo referencia / candidata).
+
+Proyectos (referencia -> candidata por defecto):
+- expedientes (BotST): expedientes_service:extraer_expediente_desde_html_bs4 ->
+  expedientes_service:extraer_expediente_desde_html. Fixtures: BotST/fixtures/expedientes/*.html
+  y páginas sintéticas del portal simulado; la salida es la lista de registros.
+- comparador: comparar_sets_base (abajo: la comparación original, registro por registro con
+  cadenas, sin TablaFirmas) -> comparator:comparar_sets y comparator_paralelo:comparar_sets_paralelo
+  (forzado a 2 procesos aunque haya pocos registros). Fixtures: pares de PDFs sintéticos doc/diag;
+  se extraen una vez y solo se mide la comparación.
+- normalizador: normalizador:normalizar_pdf -> la misma (todavía no hay otra). Fixtures: PDFs
+  sintéticos del molde Profesor_Asignatura (encabezado en dos niveles, varias claves por celda,
+  filas de continuación y TOTALES).
+
+Muestras reales anonimizadas: --muestras DIR (por defecto <proyecto>/fixtures/muestras, si existe):
+*.html para expedientes, *.pdf para normalizador y pares NOMBRE.doc.pdf / NOMBRE.diag.pdf para
+comparador.
+
+    python verificar_equivalencia.py                       # los tres proyectos, candidatas por defecto
+    python verificar_equivalencia.py --proyecto normalizador --candidata normalizador_rapido:normalizar_pdf
+    python verificar_equivalencia.py --proyecto comparador --filas 600 --repeticiones 3
+    python verificar_equivalencia.py --proyecto expedientes --candidata /ruta/mi_parser.py:extraer
+
+La candidata es "modulo:funcion" (importado desde la carpeta del proyecto) o "archivo.py:funcion",
+con la misma firma que la referencia. Cada proyecto corre en su propio proceso (los proyectos
+tienen módulos con el mismo nombre, como config.py y main.py).
+
+Sale con código 1 si alguna salida difiere.
+"""
+import argparse
+import copy
+import dataclasses
+import html
+import importlib
+import importlib.util
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent
+
+CARPETAS = {
+    "expedientes": RAIZ / "BotST",
+    "comparador": RAIZ / "ComparadorDeExtradordinarios",
+    "normalizador": RAIZ / "normalizacionDePDFs",
+}
+
+
+# -------------------------------------------------------------------------
+# DIFERENCIAS
+# -------------------------------------------------------------------------
+def _iguales(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return type(a) is type(b) and a == b
+
+
+def _diferencia_dataframe(ref, cand, ruta: str):
+    if list(ref.columns) != list(cand.columns):
+        for i, (a, b) in enumerate(zip(list(ref.columns) + [None] * len(cand.columns),
+                                       list(cand.columns) + [None] * len(ref.columns))):
+            if a != b:
+                return f"{ruta}.columns[{i}]: {a!r} != {b!r}"
+    if len(ref) != len(cand):
+        return f"{ruta}: {len(ref)} filas != {len(cand)} filas"
+    if list(ref.index) != list(cand.index):
+        return f"{ruta}.index: {list(ref.index)[:5]}... != {list(cand.index)[:5]}..."
+    for col in ref.columns:
+        if ref[col].dtype != cand[col].dtype:
+            return f"{ruta}[{col!r}].dtype: {ref[col].dtype} != {cand[col].dtype}"
+
+    # primera celda distinta en orden de lectura (fila, luego columna)
+    primera = None
+    for j, col in enumerate(ref.columns):
+        a, b = ref[col].to_numpy(), cand[col].to_numpy()
+        for i in range(len(a)):
+            if (primera is None or i < primera[0]) and not _iguales(a[i], b[i]):
+                primera = (i, j)
+                break
+    if primera is None:
+        return None
+    i, j = primera
+    col = ref.columns[j]
+    return f"{ruta}: fila {i}, columna {col!r}: {ref[col].iloc[i]!r} != {cand[col].iloc[i]!r}"
+
+
+def primera_diferencia(ref, cand, ruta: str = "salida"):
+    """Ruta y valores de la primera diferencia entre `ref` y `cand`, o None si son iguales."""
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(ref, pd.DataFrame):
+        if not isinstance(cand, pd.DataFrame):
+            return f"{ruta}: DataFrame != {type(cand).__name__}"
+        return _diferencia_dataframe(ref, cand, ruta)
+
+    if dataclasses.is_dataclass(ref) and not isinstance(ref, type):
+        if type(cand).__name__ != type(ref).__name__:
+            return f"{ruta}: {type(ref).__name__} != {type(cand).__name__}"
+        for f in dataclasses.fields(ref):
+            d = primera_diferencia(getattr(ref, f.name), getattr(cand, f.name, None), f"{ruta}.{f.name}")
+            if d:
+                return d
+        return None
+
+    if isinstance(ref, dict):
+        if not isinstance(cand, dict):
+            return f"{ruta}: dict != {type(cand).__name__}"
+        for k in ref:
+            if k not in cand:
+                return f"{ruta}: falta la llave {k!r} en la candidata"
+        for k in cand:
+            if k not in ref:
+                return f"{ruta}: llave {k!r} de más en la candidata"
+        for k in ref:
+            d = primera_diferencia(ref[k], cand[k], f"{ruta}[{k!r}]")
+            if d:
+                return d
+        return None
+
+    if isinstance(ref, (list, tuple)):
+        if not isinstance(cand, (list, tuple)) or type(ref) is not type(cand):
+            return f"{ruta}: {type(ref).__name__} != {type(cand).__name__}"
+        for i, (a, b) in enumerate(zip(ref, cand)):
+            d = primera_diferencia(a, b, f"{ruta}[{i}]")
+            if d:
+                return d
+        if len(ref) != len(cand):
+            i = min(len(ref), len(cand))
+            sobra = ref[i] if len(ref) > i else cand[i]
+            return f"{ruta}: {len(ref)} elementos != {len(cand)} (primero sin pareja, [{i}]: {sobra!r})"
+        return None
+
+    if isinstance(ref, (set, frozenset)):
+        if ref != cand:
+            solo_ref = sorted(map(repr, set(ref) - set(cand or ())))
+            solo_cand = sorted(map(repr, set(cand or ()) - set(ref)))
+            return f"{ruta}: solo en referencia {solo_ref[:3]}, solo en candidata {solo_cand[:3]}"
+        return None
+
+    if not _iguales(ref, cand):
+        return f"{ruta}: {ref!r} != {cand!r}"
+    return None
+
+
+# -------------------------------------------------------------------------
+# EJECUCIÓN Y TIEMPOS
+# -------------------------------------------------------------------------
+def cargar_funcion(spec: str):
+    """"modulo:funcion" (desde sys.path) o "archivo.py:funcion"."""
+    modulo, _, nombre = spec.rpartition(":")
+    if not modulo or not nombre:
+        raise ValueError(f"Se esperaba modulo:funcion, no {spec!r}")
+    if modulo.endswith(".py"):
+        ruta = Path(modulo).resolve()
+        sys.path.insert(0, str(ruta.parent))
+        especificacion = importlib.util.spec_from_file_location(ruta.stem, ruta)
+        mod = importlib.util.module_from_spec(especificacion)
+        especificacion.loader.exec_module(mod)
+    else:
+        mod = importlib.import_module(modulo)
+    return getattr(mod, nombre)
+
+
+def medir(fn, argumentos, repeticiones: int):
+    """(salida de la primera corrida, mejor tiempo en s); cada corrida recibe su propia copia."""
+    salida, mejor = None, float("inf")
+    for r in range(repeticiones):
+        copia = copy.deepcopy(argumentos)
+        t0 = time.perf_counter()
+        resultado = fn(*copia)
+        mejor = min(mejor, time.perf_counter() - t0)
+        if r == 0:
+            salida = resultado
+    return salida, mejor
+
+
+def comparar_implementaciones(nombre_ref, ref, nombre_cand, cand, fixtures, repeticiones: int) -> bool:
+    """`fixtures`: [(nombre, descripción, argumentos)]. Imprime una línea por fixture y el resumen."""
+    print(f"   referencia: {nombre_ref}")
+    print(f"   candidata:  {nombre_cand}")
+    if fixtures:
+        # calentamiento: los imports diferidos (bs4, pandas, ...) no cuentan en la primera medición
+        for fn in (ref, cand):
+            fn(*copy.deepcopy(fixtures[0][2]))
+    t_ref_total, t_cand_total, iguales, primera = 0.0, 0.0, 0, None
+    for nombre, descripcion, argumentos in fixtures:
+        salida_ref, t_ref = medir(ref, argumentos, repeticiones)
+        salida_cand, t_cand = medir(cand, argumentos, repeticiones)
+        t_ref_total += t_ref
+        t_cand_total += t_cand
+        diferencia = primera_diferencia(salida_ref, salida_cand)
+        tiempos = f"ref {t_ref * 1000:8.1f} ms | cand {t_cand * 1000:8.1f} ms | {t_ref / max(t_cand, 1e-9):5.2f}x"
+        if diferencia is None:
+            iguales += 1
+            print(f"   OK    {nombre:<34} {descripcion:<24} {tiempos}")
+        else:
+            primera = primera or (nombre, diferencia)
+            print(f"   FALLA {nombre:<34} {descripcion:<24} {tiempos}")
+            print(f"         {diferencia}")
+    print(
+        f"-> {iguales}/{len(fixtures)} fixtures iguales | referencia {t_ref_total:.3f} s | "
+        f"candidata {t_cand_total:.3f} s | aceleración {t_ref_total / max(t_cand_total, 1e-9):.2f}x"
+    )
+    if primera:
+        print(f"-> Primera diferencia ({primera[0]}): {primera[1]}")
+    return iguales == len(fixtures)
+
+
+# -------------------------------------------------------------------------
+# PDFs SINTÉTICOS (tablas con bordes; page.find_tables() las detecta)
+# -------------------------------------------------------------------------
+def _tabla_html(filas) -> str:
+    """Celdas con listas -> una línea por elemento (como las celdas multilínea de los PDFs reales)."""
+    def celda(v):
+        lineas = v if isinstance(v, (list, tuple)) else [v]
+        return "<br>".join(html.escape(str(x)) for x in lineas)
+
+    cuerpo = "".join(
+        "<tr>" + "".join(f"<td style='border:1px solid black'>{celda(c)}</td>" for c in fila) + "</tr>"
+        for fila in filas
+    )
+    return f"<table style='border-collapse:collapse;font-size:6px'>{cuerpo}</table>"
+
+
+def escribir_pdf_tablas(ruta: Path, encabezado, filas, filas_por_pagina: int):
+    """Una tabla por página, con el encabezado (una o varias filas) repetido en cada una."""
+    import pymupdf
+
+    doc = pymupdf.open()
+    for i in range(0, max(len(filas), 1), filas_por_pagina):
+        pagina = doc.new_page(width=842, height=595)   # A4 horizontal
+        pagina.insert_htmlbox(pagina.rect + (20, 20, -20, -20), _tabla_html(encabezado + filas[i:i + filas_por_pagina]))
+    doc.save(ruta)
+    doc.close()
+
+
+PROFESORES = ["Juan Pérez López", "María Núñez Ramírez", "José Hernández", "Ana Ruiz Díaz",
+              "Luis Ángel García", "Sofía Martínez", "Diana López Peña", "Emilio Ortega"]
+MATERIAS = ["CÁLCULO DIFERENCIAL", "ÁLGEBRA LINEAL", "REDES DE DATOS", "SISTEMAS OPERATIVOS",
+            "BASES DE DATOS", "COMPILADORES", "PROBABILIDAD", "ESTRUCTURAS DE DATOS"]
+
+
+def generar_par_comparador(carpeta: Path, nombre: str, filas: int, semilla: int):
+    """doc.pdf y diag.pdf con coincidencias, salones distintos, faltantes, sobrantes y duplicados."""
+    rnd = random.Random(semilla)
+    registros = []
+    for i in range(filas):
+        registros.append({
+            "clave": 1100 + rnd.randrange(max(filas // 3, 1)),
+            "grupo": f"EA{rnd.randint(10, 19)}",
+            "materia": rnd.choice(MATERIAS),
+            "profes": rnd.sample(PROFESORES, 2),
+            "dia": rnd.randint(5, 25),
+            "hora": rnd.choice([(8, 10), (10, 12), (12, 14), (16, 18)]),
+            "salon": rnd.choice(["A-1514", "L3", "virtual", "N/D", "A-201"]),
+        })
+
+    doc, diag = [], []
+    for r in registros:
+        g, (p1, p2) = r["grupo"], r["profes"]
+        fila_doc = [[str(r["clave"]), "2016"], [r["materia"], f"{g} {p1}", f"{g} {p2}"],
+                    f"{r['dia']:02d}/01/2025", f"{r['hora'][0]:02d}:00 - {r['hora'][1]:02d}:00", r["salon"]]
+        salon_diag = r["salon"].replace("-", "")
+        if rnd.random() < 0.1:
+            salon_diag = "B200"                      # discrepancia
+        fila_diag = [str(r["clave"]), g, r["materia"], p1, p2,
+                     f"2025-01-{r['dia']:02d}", f"{r['hora'][0]}:00-{r['hora'][1]}:00", salon_diag]
+        x = rnd.random()
+        if x < 0.05:
+            doc.append(fila_doc)                     # solo en doc
+            continue
+        if x < 0.10:
+            diag.append(fila_diag)                   # solo en diag
+            continue
+        doc.append(fila_doc)
+        diag.append(fila_diag)
+        if rnd.random() < 0.05:
+            doc.append(fila_doc)                     # duplicado interno
+    rnd.shuffle(diag)
+
+    ruta_doc, ruta_diag = carpeta / f"{nombre}.doc.pdf", carpeta / f"{nombre}.diag.pdf"
+    escribir_pdf_tablas(ruta_doc, [["CLAVE/PLAN", "MATERIA", "FECHA", "HORA", "SALON"]], doc, 25)
+    escribir_pdf_tablas(
+        ruta_diag, [["CVEMAT", "GRUPO", "ASIGNATURA", "PROFESOR 1", "PROFESOR 2", "FECHA", "HORA", "SALON"]], diag, 40
+    )
+    return ruta_doc, ruta_diag
+
+
+ENCABEZADO_NORMALIZADOR = [
+    ["No.", "Profesor", "Categoría", "Clave", "Asignatura", "Grupo", "",
+     "Horas sem. anterior", "", "", "Horas sem. actual", "", ""],
+    ["", "", "", "", "", "Anterior", "Actual", "Teo", "Pra", "Total", "Teo", "Pra", "Total"],
+]
+
+
+def generar_pdf_normalizador(ruta: Path, profesores: int, semilla: int):
+    """Molde Profesor_Asignatura: varias claves por celda, continuaciones y TOTALES INT/DEF."""
+    rnd = random.Random(semilla)
+    filas = []
+    for n in range(1, profesores + 1):
+        nombre = rnd.choice(PROFESORES).upper()
+        k = rnd.randint(1, 3)
+        claves = [str(rnd.randint(1100, 1999)) for _ in range(k)]
+        horas = [(rnd.randint(0, 6), rnd.choice([0, 1.5, 2])) for _ in range(k)]
+
+        def metricas(hs):
+            teo = [f"{t}" for t, _ in hs]
+            pra = [f"{p}".replace(".", ",") for _, p in hs]
+            tot = [f"{t + p:g}" for t, p in hs]
+            return [teo, pra, tot]
+
+        interino = rnd.random() < 0.5
+        categoria = "PROF. ASIG. A INT." if interino else "PROF. ASIG. B DEF."
+        if rnd.random() < 0.2:
+            categoria = "AYUD. DE PROF. B"
+        filas.append(
+            [str(n), nombre, categoria, claves, [rnd.choice(MATERIAS) for _ in range(k)],
+             [f"{rnd.randint(1101, 1199)}" for _ in range(k)], [f"{rnd.randint(1201, 1299)}" for _ in range(k)]]
+            + metricas(horas) + metricas(horas)
+        )
+        if rnd.random() < 0.3:
+            # continuación "derecha": sin No./Profesor/Categoría/Clave, con asignatura y métricas
+            extra = [(rnd.randint(1, 4), 0)]
+            filas.append(["", "", "", "", [rnd.choice(MATERIAS)], ["1150"], ["1250"]]
+                         + metricas(extra) + metricas(extra))
+            horas += extra
+        tot = [f"{sum(t for t, _ in horas)}", f"{sum(p for _, p in horas):g}",
+               f"{sum(t + p for t, p in horas):g}"]
+        etiqueta = "TOTALES INTERINO" if interino else "TOTALES DEFINITIVO"
+        filas.append(["", etiqueta, "", "", "", "", ""] + tot + tot)
+
+    escribir_pdf_tablas(ruta, ENCABEZADO_NORMALIZADOR, filas, 18)
+    return ruta
+
+
+# -------------------------------------------------------------------------
+# REFERENCIA BASE DEL COMPARADOR
+# -------------------------------------------------------------------------
+def _texto_registro(r) -> str:
+    pset = {r.get("P1", ""), r.get("P2", "")} - {""}
+    return (
+        f"GRUPO={r.get('GRUPO', '')}, FECHA={r.get('FECHA', '')}, "
+        f"HORA={r.get('HORA', '')}, SALON={r.get('SALON', '')}, "
+        f"PROFES={{{'; '.join(sorted(pset))}}}"
+    )
+
+
+def comparar_sets_base(A_rows, B_rows, source_a="doc.pdf", source_b="INGENIERIA EN COMPUTACION.pdf"):
+    """
+    La comparación tal como era antes de las optimizaciones (firmas como tuplas de cadenas,
+    dedup y orden registro por registro), independiente de TablaFirmas, comparar_clave y
+    comparator_paralelo; solo toma de comparator el contenedor ComparisonResult.
+    """
+    from comparator import ComparisonResult
+    from normalizers import norm_prof
+
+    def firma(r):
+        return (r.get("GRUPO", ""), r.get("FECHA", ""), r.get("HORA", ""), r.get("SALON", ""),
+                frozenset({norm_prof(r.get("P1", "")), norm_prof(r.get("P2", ""))} - {""}))
+
+    def orden(f):
+        return f[:4] + (tuple(sorted(f[4])),)
+
+    def dedup(rows, fuente):
+        por_clave, cuentas = {}, {}
+        for r in rows:
+            clave = str(r.get("CLAVE", "")).strip()
+            if not clave:
+                continue
+            f = firma(r)
+            por_clave.setdefault(clave, {}).setdefault(f, r)
+            cuentas.setdefault(clave, {})
+            cuentas[clave][f] = cuentas[clave].get(f, 0) + 1
+        log, total = [], 0
+        for clave, fdict in cuentas.items():
+            for f, c in fdict.items():
+                if c > 1:
+                    total += c - 1
+                    log.append(f"- [{fuente}] CLAVE {clave}: colapsados {c-1} duplicados → "
+                               f"{_texto_registro(por_clave[clave][f])}")
+        return por_clave, log, total
+
+    A, logA, totA = dedup(A_rows, source_a)
+    B, logB, totB = dedup(B_rows, source_b)
+    msgs, coincid_rows, discrep_rows = [], [], []
+    for clave in sorted(set(A) | set(B), key=lambda x: int(x) if x.isdigit() else x):
+        a, b = A.get(clave, {}), B.get(clave, {})
+        for f in sorted(set(a) & set(b), key=orden):
+            rec = a[f]
+            coincid_rows.append({"CLAVE": clave, **{k: rec.get(k, "") for k in
+                                 ("GRUPO", "MATERIA", "P1", "P2", "FECHA", "HORA", "SALON")}})
+        for solo, otro, fuente in ((a, b, source_a), (b, a, source_b)):
+            for f in sorted(set(solo) - set(otro), key=orden):
+                r = solo[f]
+                msgs.append(f"{len(msgs) + 1}. Discrepancia en materia {r.get('MATERIA', '')} con clave {clave}: "
+                            f"Registro presente solo en {fuente} → {_texto_registro(r)}")
+                discrep_rows.append({"FUENTE": fuente, "CLAVE": clave, **{k: r.get(k, "") for k in
+                                     ("GRUPO", "MATERIA", "P1", "P2", "FECHA", "HORA", "SALON")}})
+
+    return ComparisonResult(
+        coincidencias=len(coincid_rows), discrepancias=len(msgs), mensajes=msgs,
+        coincid_rows=coincid_rows, logA=logA, logB=logB, totA=totA, totB=totB,
+        discrep_rows=discrep_rows, source_a=source_a, source_b=source_b,
+    )
+
+
+# -------------------------------------------------------------------------
+# PROYECTOS
+# -------------------------------------------------------------------------
+def _muestras(args, proyecto: str) -> Path:
+    carpeta = Path(args.muestras) if args.muestras else CARPETAS[proyecto] / "fixtures" / "muestras"
+    return carpeta if carpeta.is_dir() else None
+
+
+def proyecto_expedientes(args, tmp: Path):
+    from string import Template
+    from portal_simulado import pagina_expediente, PLANTILLAS
+
+    referencia = "expedientes_service:extraer_expediente_desde_html_bs4"
+    candidata = args.candidata or "expedientes_service:extraer_expediente_desde_html"
+    ref_una, cand_una = cargar_funcion(referencia), cargar_funcion(candidata)
+
+    def por_pagina(fn):
+        return lambda paginas: [fn(h) for h in paginas]
+
+    fixtures = []
+    carpetas = [CARPETAS["expedientes"] / "fixtures" / "expedientes"]
+    if _muestras(args, "expedientes"):
+        carpetas.append(_muestras(args, "expedientes"))
+    for carpeta in carpetas:
+        for ruta in sorted(carpeta.glob("*.html")):
+            fixtures.append((ruta.name, "1 página", ([ruta.read_text(encoding="utf-8")],)))
+
+    con_cita, sin_cita = (Template((PLANTILLAS / f"expediente_{t}.html").read_text(encoding="utf-8"))
+                          for t in ("con_cita", "sin_cita"))
+    paginas = [pagina_expediente(n, con_cita, sin_cita).decode("utf-8") for n in range(1, args.filas + 1)]
+    fixtures.append(("portal_simulado", f"{len(paginas)} páginas", (paginas,)))
+    return referencia, por_pagina(ref_una), [(candidata, por_pagina(cand_una))], fixtures
+
+
+def proyecto_comparador(args, tmp: Path):
+    import comparator_paralelo
+    from parsers import load_doc, load_diag
+
+    referencia, ref = "verificar_equivalencia:comparar_sets_base", comparar_sets_base
+    if args.candidata:
+        candidatas = [(args.candidata, cargar_funcion(args.candidata))]
+    else:
+        # forzar la ruta en procesos aunque los fixtures sean chicos
+        comparator_paralelo.MIN_REGISTROS_PARALELO = 0
+
+        def paralelo(a, b):
+            return comparator_paralelo.comparar_sets_paralelo(a, b, n_workers=2, n_shards=4)
+
+        candidatas = [
+            ("comparator:comparar_sets", cargar_funcion("comparator:comparar_sets")),
+            ("comparator_paralelo:comparar_sets_paralelo (2 procesos)", paralelo),
+        ]
+
+    pares = [generar_par_comparador(tmp, f"sintetico_{i}", args.filas, semilla=i) for i in range(args.pdfs)]
+    if _muestras(args, "comparador"):
+        for ruta_doc in sorted(_muestras(args, "comparador").glob("*.doc.pdf")):
+            ruta_diag = ruta_doc.with_name(ruta_doc.name[:-len(".doc.pdf")] + ".diag.pdf")
+            if ruta_diag.exists():
+                pares.append((ruta_doc, ruta_diag))
+
+    fixtures = []
+    for ruta_doc, ruta_diag in pares:
+        filas_doc, filas_diag = load_doc(str(ruta_doc)), load_diag(str(ruta_diag))
+        nombre = ruta_doc.name[:-len(".doc.pdf")] if ruta_doc.name.endswith(".doc.pdf") else ruta_doc.stem
+        fixtures.append((nombre, f"{len(filas_doc)} + {len(filas_diag)} registros", (filas_doc, filas_diag)))
+    return referencia, ref, candidatas, fixtures
+
+
+def proyecto_normalizador(args, tmp: Path):
+    referencia = "normalizador:normalizar_pdf"
+    candidata = args.candidata or referencia
+    ref, cand = cargar_funcion(referencia), cargar_funcion(candidata)
+
+    rutas = [generar_pdf_normalizador(tmp / f"sintetico_{i}.pdf", args.filas // 4 or 1, semilla=i)
+             for i in range(args.pdfs)]
+    if _muestras(args, "normalizador"):
+        rutas += sorted(_muestras(args, "normalizador").glob("*.pdf"))
+    fixtures = [(ruta.name, "PDF", (ruta,)) for ruta in rutas]
+    return referencia, ref, [(candidata, cand)], fixtures
+
+
+PROYECTOS = {
+    "expedientes": proyecto_expedientes,
+    "comparador": proyecto_comparador,
+    "normalizador": proyecto_normalizador,
+}
+
+
+def correr_proyecto(args) -> bool:
+    sys.path.insert(0, str(CARPETAS[args.proyecto]))
+    print(f"\n== {args.proyecto} ({CARPETAS[args.proyecto].name})")
+    with tempfile.TemporaryDirectory() as tmp:
+        referencia, ref, candidatas, fixtures = PROYECTOS[args.proyecto](args, Path(tmp))
+        ok = True
+        for candidata, cand in candidatas:
+            if candidata == referencia:
+                print("   (sin candidata: se compara la referencia consigo misma)")
+            ok = comparar_implementaciones(referencia, ref, candidata, cand, fixtures, args.repeticiones) and ok
+        return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compara una implementación candidata contra la de referencia")
+    ap.add_argument("--proyecto", choices=list(PROYECTOS), default=None, help="Por defecto, los tres")
+    ap.add_argument("--candidata", default=None, metavar="MODULO:FUNCION",
+                    help="Implementación a verificar (requiere --proyecto)")
+    ap.add_argument("--muestras", default=None, metavar="DIR",
+                    help="Muestras reales anonimizadas (por defecto <proyecto>/fixtures/muestras)")
+    ap.add_argument("--filas", type=int, default=120,
+                    help="Registros por PDF sintético (profesores = filas/4) y páginas del portal simulado")
+    ap.add_argument("--pdfs", type=int, default=3, help="PDFs sintéticos por proyecto")
+    ap.add_argument("--repeticiones", type=int, default=1, help="Se reporta el mejor tiempo de N corridas")
+    args = ap.parse_args()
+
+    if args.proyecto is None:
+        if args.candidata:
+            ap.error("--candidata requiere --proyecto")
+        # un proceso por proyecto: comparten nombres de módulo (config, main, ...)
+        codigos = [
+            subprocess.run([sys.executable, __file__, *sys.argv[1:], "--proyecto", p], cwd=os.getcwd()).returncode
+            for p in PROYECTOS
+        ]
+        return 1 if any(codigos) else 0
+    return 0 if correr_proyecto(args) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())